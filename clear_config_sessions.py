@@ -0,0 +1,137 @@
+#!/usr/bin/env python
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+try:
+    # importing libraries
+    import argparse
+    import os
+    import sys
+    import time
+
+    from rich.console import Console
+    from rich.table import Table
+
+    import netlib
+except ImportError as error:
+    print(error)
+    quit()
+except Exception as exception:
+    print(exception)
+
+parser = argparse.ArgumentParser()
+switch_group = parser.add_mutually_exclusive_group(required=True)
+switch_group.add_argument(
+    "-s",
+    "--switch",
+    type=str,
+    metavar="switch.hostname.com",
+    help="Hostname of the switch",
+)
+switch_group.add_argument(
+    "-S",
+    "--switches",
+    type=str,
+    metavar="switches.txt",
+    help="A list of switch hostnames (FQDN) one per line",
+)
+parser.add_argument(
+    "-o",
+    "--output_directory",
+    type=str,
+    required=False,
+    default=os.environ.get("HOME", "/tmp"),
+    metavar="some_folder",
+    help="Folder for all outputs from the script",
+)
+parser.add_argument(
+    "-w",
+    "--workers",
+    type=int,
+    required=False,
+    default=32,
+    help="Number of switches cleaned up at once",
+)
+netlib.inventory.add_inventory_arguments(parser)
+args = parser.parse_args()
+output_dir = args.output_directory
+username, password = netlib.get_credentials("TACACS")
+
+# open a file for logging errors
+start_logger = netlib.setup_logging("clear_config_sessions", output_dir)
+logger = start_logger[0]
+logger_full_path = start_logger[1]
+
+
+def cleanup_switch(switch_hostname):
+    # two requests per switch whatever the number of sessions: the list, then
+    # every removal batched together
+    start_time = time.monotonic()
+    eapi = netlib.AristaPyeapi(username, password, switch_hostname, logger)
+    removed_sessions = eapi.cleanup_config_sessions()
+    return [removed_sessions, time.monotonic() - start_time]
+
+
+def skip_unreachable(unreachable):
+    failed_switches.append(unreachable["host"])
+
+
+if args.switches:
+    # streamed, the inventory is never held in full
+    switch_list = netlib.inventory.read_inventory(
+        args.switches, args.filter, args.shard
+    )
+else:
+    switch_list = [args.switch.strip()]
+failed_switches = []
+
+print("Removing configuration sessions.")
+# only the switches that had sessions make it to the table, the rest are
+# just counted
+cleanup_results = []
+cleaned_switches = 0
+removed_total = 0
+try:
+    for switch_hostname, cleanup_result in netlib.run_on_fleet(
+        netlib.iter_reachable_hosts(switch_list, skip_unreachable),
+        cleanup_switch,
+        args.workers,
+        logger,
+    ):
+        if cleanup_result is None or cleanup_result[0] is None:
+            failed_switches.append(switch_hostname)
+            continue
+        cleaned_switches += 1
+        removed_total += cleanup_result[0]
+        if cleanup_result[0]:
+            cleanup_results.append([switch_hostname] + cleanup_result)
+except KeyboardInterrupt:
+    print("Caught Keyboard Interrupt - Exiting the program.")
+    sys.exit()
+
+console = Console()
+sessions_table = Table(title="Configuration sessions removed")
+sessions_table.add_column("Hostname", justify="left", style="magenta")
+sessions_table.add_column("Sessions Removed", justify="right", style="cyan")
+sessions_table.add_column("Seconds", justify="right")
+for switch_hostname, removed_sessions, elapsed in sorted(cleanup_results):
+    sessions_table.add_row(switch_hostname, str(removed_sessions), f"{elapsed:.2f}")
+if cleanup_results:
+    console.print(sessions_table)
+print(f"Removed {removed_total} sessions on {cleaned_switches} switches.")
+if failed_switches:
+    print(f"\nCould not clean up {len(failed_switches)} switches:")
+    for failed_switch in sorted(failed_switches):
+        print(failed_switch)
+
+netlib.cleanup_log_if_empty(logger_full_path)
@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+try:
+    # importing libraries
+    import argparse
+    import datetime
+    import os
+    import sys
+    import time
+
+    import numpy as np
+
+    import netlib
+except ImportError as error:
+    print(error)
+    quit()
+except Exception as exception:
+    print(exception)
+
+parser = argparse.ArgumentParser()
+parser.add_argument(
+    "-s",
+    "--switch",
+    type=str,
+    required=True,
+    metavar="switch",
+    help="Short hostname of the switch, as stored by get_errors_and_discards.py",
+)
+parser.add_argument(
+    "-p", "--port", type=str, required=True, metavar="12/1", help="The port to look at"
+)
+parser.add_argument(
+    "-c",
+    "--counter",
+    type=str,
+    required=False,
+    default="fcsErrors",
+    choices=netlib.counter_store.STORE_COUNTERS,
+    help="Counter to report on",
+)
+parser.add_argument(
+    "-d",
+    "--days",
+    type=float,
+    required=False,
+    default=7,
+    help="How far back to look",
+)
+parser.add_argument(
+    "--store",
+    type=str,
+    required=False,
+    default=os.path.join(os.environ.get("HOME", "/tmp"), "counter_store"),
+    metavar="counter_store",
+    help="Folder of the counter history written by get_errors_and_discards.py",
+)
+args = parser.parse_args()
+
+port_name_long = args.port
+if not port_name_long.startswith(("Ethernet", "Port-Channel", "Management")):
+    port_name_long = f"Ethernet{port_name_long}"
+
+if not os.path.isdir(os.path.join(args.store, args.switch)):
+    print(f"No counter history for {args.switch} under {args.store}")
+    sys.exit(1)
+
+store = netlib.counter_store.CounterStore(args.store, args.switch)
+since = time.time() - args.days * 86400
+timestamps, values = store.query(port_name_long, args.counter, since=since)
+if len(timestamps) == 0:
+    print(
+        f"No samples of {port_name_long} on {args.switch} in the last {args.days} days"
+    )
+    sys.exit()
+rate_timestamps, rates = store.rate(port_name_long, args.counter, since=since)
+
+
+def utc(timestamp):
+    return datetime.datetime.utcfromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M:%S")
+
+
+print(f"Hostname: {args.switch}")
+print(f"Port: {port_name_long} Counter: {args.counter}")
+print(
+    f"Samples: {len(timestamps)} from {utc(timestamps[0])} to {utc(timestamps[-1])} UTC"
+)
+print(f"Current value: {values[-1]}")
+if len(rates):
+    increases = np.diff(values)
+    increases = np.where(increases < 0, values[1:], increases)
+    elapsed = timestamps[-1] - timestamps[0]
+    print(f"Increase over the period: {int(increases.sum())}")
+    if elapsed > 0:
+        print(f"Average rate: {increases.sum() / elapsed * 3600:.2f} per hour")
+    worst = np.nanargmax(rates)
+    print(
+        f"Highest rate: {rates[worst] * 3600:.2f} per hour "
+        f"at {utc(rate_timestamps[worst])} UTC"
+    )
@@ -0,0 +1,280 @@
+#!/usr/bin/env python
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Usage example:
+#   coordinator, waits for workers on port 8765 and writes everything they send:
+#     get_distributed_collection.py -S switches.txt -c power -l :8765
+#   worker, on every jump host that should take part:
+#     get_distributed_collection.py -C coordinator.example.com:8765
+#   everything on one box, with 4 local worker processes:
+#     get_distributed_collection.py -S switches.txt -c power --local_workers 4
+# Set NETLIB_COORDINATOR_TOKEN to the same value on the coordinator and the
+# workers to keep other hosts from joining. Without it the coordinator only
+# listens on the loopback address, so only local workers can join.
+
+try:
+    # importing libraries
+    import argparse
+    import os
+    import socket
+    import subprocess
+    import sys
+    from datetime import datetime
+
+    from rich.console import Console
+    from rich.table import Table
+
+    import netlib
+except ImportError as error:
+    print(error)
+    quit()
+except Exception as exception:
+    print(exception)
+
+parser = argparse.ArgumentParser()
+role_group = parser.add_mutually_exclusive_group(required=True)
+role_group.add_argument(
+    "-S",
+    "--switches",
+    type=str,
+    metavar="switches.txt",
+    help="Run as the coordinator for this inventory of switches",
+)
+role_group.add_argument(
+    "-C",
+    "--coordinator",
+    type=str,
+    metavar="coordinator.example.com:8765",
+    help="Run as a worker of this coordinator",
+)
+parser.add_argument(
+    "-c",
+    "--collector",
+    type=str,
+    required=False,
+    default="errors_and_discards",
+    choices=sorted(netlib.distributed.COLLECTORS),
+    help="What the workers collect from every switch (coordinator)",
+)
+parser.add_argument(
+    "-l",
+    "--listen",
+    type=str,
+    required=False,
+    default=None,
+    metavar="address:port",
+    help="Address the coordinator waits for workers on, 0.0.0.0:8765 with a "
+    "token and 127.0.0.1:8765 without",
+)
+parser.add_argument(
+    "-t",
+    "--timeout",
+    type=float,
+    required=False,
+    default=3600,
+    help="Seconds before the coordinator gives up on the switches not "
+    "collected yet, 0 waits for as long as it takes",
+)
+parser.add_argument(
+    "--local_workers",
+    type=int,
+    required=False,
+    default=0,
+    help="Worker processes the coordinator starts on this machine",
+)
+parser.add_argument(
+    "--chunk_size",
+    type=int,
+    required=False,
+    default=50,
+    help="Switches handed to a worker at a time",
+)
+parser.add_argument(
+    "-o",
+    "--output_directory",
+    type=str,
+    required=False,
+    default=os.environ.get("HOME", "/tmp"),
+    metavar="some_folder",
+    help="Folder for all outputs from the script",
+)
+parser.add_argument(
+    "-f",
+    "--output_format",
+    type=str,
+    required=False,
+    default="jsonl",
+    choices=[
+        output_format
+        for output_format in netlib.sinks.OUTPUT_FORMATS
+        if output_format != "table"
+    ],
+    help="File the coordinator writes the merged results to",
+)
+parser.add_argument(
+    "-w",
+    "--workers",
+    type=int,
+    required=False,
+    default=32,
+    help="Number of switches each worker collects from at once",
+)
+netlib.inventory.add_inventory_arguments(parser)
+args = parser.parse_args()
+output_dir = args.output_directory
+username, password = netlib.get_credentials("TACACS")
+token = os.environ.get("NETLIB_COORDINATOR_TOKEN", "")
+
+# open a file for logging errors, one per worker process as several of them
+# can share a machine and an output folder
+if args.coordinator:
+    start_logger = netlib.setup_logging(
+        f"get_distributed_collection_worker_{os.getpid()}", output_dir
+    )
+else:
+    start_logger = netlib.setup_logging("get_distributed_collection", output_dir)
+logger = start_logger[0]
+logger_full_path = start_logger[1]
+
+
+def start_local_workers(coordinator_port):
+    # same script in worker mode, the credentials are handed over in the
+    # environment so the workers do not prompt
+    worker_environment = dict(
+        os.environ, TACACS_USERNAME=username, TACACS_PASSWORD=password
+    )
+    return [
+        subprocess.Popen(
+            [
+                sys.executable,
+                os.path.abspath(__file__),
+                "-C",
+                f"127.0.0.1:{coordinator_port}",
+                "-w",
+                str(args.workers),
+                "-o",
+                output_dir,
+            ],
+            env=worker_environment,
+        )
+        for _ in range(args.local_workers)
+    ]
+
+
+def write_result(sink, switch_hostname, worker_name, result):
+    # upgrade checks are text and go to one file per switch like
+    # get_upgrade_checks.py, the other collectors go to the sink as they are
+    if args.collector == "upgrade_checks":
+        result = {
+            "file": netlib.collectors.write_upgrade_checks(
+                output_dir, result, logs_time_stamp
+            )
+        }
+    sink.write(args.collector, switch_hostname, dict(result, worker=worker_name))
+
+
+def print_worker_summary(worker_counts, failed_switches):
+    worker_table = Table(title=f"{args.collector} collected per worker")
+    worker_table.add_column("Worker", justify="left", style="magenta")
+    worker_table.add_column("Switches", justify="right", style="cyan")
+    for worker_name, switch_count in sorted(worker_counts.items()):
+        worker_table.add_row(worker_name, str(switch_count))
+    if worker_counts:
+        Console().print(worker_table)
+    if failed_switches:
+        print(f"\nCould not collect from {len(failed_switches)} switches:")
+        for failed_switch in sorted(failed_switches):
+            print(failed_switch)
+
+
+logs_time_stamp = datetime.now().strftime("%Y-%m-%d_%H:%M:%S")
+
+if args.coordinator:
+    worker_name = f"{socket.gethostname()}:{os.getpid()}"
+    try:
+        collected_hosts = netlib.distributed.run_worker(
+            netlib.distributed.parse_address(args.coordinator),
+            username,
+            password,
+            worker_name,
+            args.workers,
+            logger,
+            token,
+        )
+    except KeyboardInterrupt:
+        print("Caught Keyboard Interrupt - Exiting the program.")
+        sys.exit()
+    except OSError as error:
+        print(f"Lost the coordinator at {args.coordinator}: {error}")
+        logger.warning(f"Lost the coordinator: {error}")
+        sys.exit(1)
+    print(f"Worker {worker_name} collected from {collected_hosts} switches.")
+    netlib.cleanup_log_if_empty(logger_full_path)
+    sys.exit()
+
+switch_list = list(
+    netlib.inventory.read_inventory(args.switches, args.filter, args.shard)
+)
+listen_address = args.listen or ("0.0.0.0:8765" if token else "127.0.0.1:8765")
+try:
+    coordinator = netlib.distributed.Coordinator(
+        switch_list,
+        args.collector,
+        netlib.distributed.parse_address(listen_address),
+        args.chunk_size,
+        token,
+        logger,
+    )
+except ValueError as error:
+    print(f"{error} (NETLIB_COORDINATOR_TOKEN).")
+    netlib.cleanup_log_if_empty(logger_full_path)
+    sys.exit(1)
+coordinator.start()
+coordinator_port = coordinator.address()[1]
+local_workers = start_local_workers(coordinator_port)
+print(
+    f"Coordinating {args.collector} for {len(switch_list)} switches on port "
+    f"{coordinator_port}, {len(local_workers)} local workers started."
+)
+
+sink = netlib.open_sink(
+    args.output_format, output_dir, f"get_distributed_collection_{args.collector}"
+)
+worker_counts = {}
+failed_switches = []
+try:
+    with sink:
+        for switch_hostname, worker_name, result in coordinator.results(
+            args.timeout or None, local_workers
+        ):
+            if worker_name is not None:
+                worker_counts[worker_name] = worker_counts.get(worker_name, 0) + 1
+            if result is None:
+                failed_switches.append(switch_hostname)
+            else:
+                write_result(sink, switch_hostname, worker_name, result)
+except KeyboardInterrupt:
+    print("Caught Keyboard Interrupt - Exiting the program.")
+    for local_worker in local_workers:
+        local_worker.terminate()
+    sys.exit()
+
+for local_worker in local_workers:
+    # every switch is accounted for, a worker still busy after that is stuck
+    try:
+        local_worker.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        local_worker.terminate()
+print_worker_summary(worker_counts, failed_switches)
+netlib.cleanup_log_if_empty(logger_full_path)
@@ -15,6 +15,7 @@
 try:
     # importing libraries
     import argparse
+    import concurrent.futures
     import datetime
     import os
     import sys
@@ -32,89 +33,332 @@ except Exception as exception:
     print(exception)
 
 
-def read_the_errors():
-    get_errors = eapi.get_interface_errors()
+def print_errors_table(interface_errors_array, hostname_short):
+    interface_errors_array = netlib.counters.nonzero_rows(interface_errors_array)
     interface_counters_table = Table(title="show interfaces counters errors | nz")
     interface_counters_table.add_column("Port", justify="right", style="magenta")
-    interface_counters_table.add_column("FCS", justify="right")
-    interface_counters_table.add_column("Align", justify="right")
-    interface_counters_table.add_column("Symbol", justify="right")
-    interface_counters_table.add_column("Rx", justify="right")
-    interface_counters_table.add_column("Runts", justify="right")
-    interface_counters_table.add_column("Giants", justify="right")
-    interface_counters_table.add_column("Tx", justify="right")
-    interface_errors_array = {}
-    number_of_errors = 0
-    for interface in get_errors:
-        interface_errors = get_errors[interface]
-        port_alignment_errors = interface_errors["alignmentErrors"]
-        port_fcs_errors = interface_errors["fcsErrors"]
-        port_frame_too_longs = interface_errors["frameTooLongs"]
-        port_frame_too_shorts = interface_errors["frameTooShorts"]
-        port_in_errors = interface_errors["inErrors"]
-        port_out_errors = interface_errors["outErrors"]
-        port_symbol_errors = interface_errors["symbolErrors"]
-        if (
-            port_alignment_errors != 0
-            or port_fcs_errors != 0
-            or port_frame_too_longs != 0
-            or port_frame_too_shorts != 0
-            or port_in_errors != 0
-            or port_out_errors != 0
-            or port_symbol_errors != 0
-        ):
-            number_of_errors += 1
-            interface_counters_table.add_row(
-                interface,
-                str(port_fcs_errors),
-                str(port_alignment_errors),
-                str(port_symbol_errors),
-                str(port_in_errors),
-                str(port_frame_too_shorts),
-                str(port_frame_too_longs),
-                str(port_out_errors),
-            )
-            interface_errors_array[interface] = [
-                port_fcs_errors,
-                port_alignment_errors,
-                port_symbol_errors,
-                port_in_errors,
-                port_frame_too_shorts,
-                port_frame_too_longs,
-                port_out_errors,
-            ]
-    if number_of_errors > 0:
+    for counter_key in netlib.counters.ERROR_COUNTERS:
+        interface_counters_table.add_column(counter_key[1], justify="right")
+    for interface, values in interface_errors_array.items():
+        interface_counters_table.add_row(interface, *[str(value) for value in values])
+    if interface_errors_array:
         console.print(interface_counters_table)
     else:
         print(f"No errors seen currently for {hostname_short}.")
-    return interface_errors_array
 
 
-def read_the_discards():
-    get_discards = eapi.get_interface_discards()
-    interface_discard_array = {}
+def print_discards_table(interface_discard_array, hostname_short):
+    interface_discard_array = netlib.counters.nonzero_rows(interface_discard_array)
     interface_discard_table = Table(title="show interfaces counters discards | nz")
     interface_discard_table.add_column("Port", justify="right", style="magenta")
-    interface_discard_table.add_column("In Discards", justify="right")
-    interface_discard_table.add_column("Out Discards", justify="right")
-    number_of_discards = 0
-    for interface in get_discards:
-        interface_discards = get_discards[interface]
-        port_in_discards = interface_discards["inDiscards"]
-        port_out_discards = interface_discards["outDiscards"]
-        if port_in_discards != 0 or port_out_discards != 0:
-            number_of_discards += 1
-            interface_discard_table.add_row(
-                interface, str(port_in_discards), str(port_out_discards)
-            )
-            interface_discard_array[interface] = [port_in_discards, port_out_discards]
-    if number_of_discards > 0:
+    for counter_key in netlib.counters.DISCARD_COUNTERS:
+        interface_discard_table.add_column(counter_key[1], justify="right")
+    for interface, values in interface_discard_array.items():
+        interface_discard_table.add_row(interface, *[str(value) for value in values])
+    if interface_discard_array:
         console.print(interface_discard_table)
     else:
         print(f"No discards seen currently for {hostname_short}.")
+
+
+def read_the_errors(eapi, hostname_short):
+    interface_errors_array = netlib.counters.read_error_counters(
+        eapi, nonzero_only=False
+    )
+    print_errors_table(interface_errors_array, hostname_short)
+    return interface_errors_array
+
+
+def read_the_discards(eapi, hostname_short):
+    interface_discard_array = netlib.counters.read_discard_counters(
+        eapi, nonzero_only=False
+    )
+    print_discards_table(interface_discard_array, hostname_short)
     return interface_discard_array
 
 
+def store_counters(hostname_short, error_rows, discard_rows):
+    # keep every sample in the on-disk counter history when --store is given
+    if args.store is not None:
+        netlib.counter_store.store_sample(
+            args.store, hostname_short, error_rows, discard_rows
+        )
+
+
+def scan_switch(switch_hostname):
+    # fleet worker for the machine readable outputs, nothing is rendered here
+    eapi = netlib.AristaPyeapi(username, password, switch_hostname, logger)
+    hostname_short = eapi.get_hostname_short()
+    first_time = time.monotonic()
+    first_errors = netlib.counters.read_error_counters(eapi, nonzero_only=False)
+    first_discards = netlib.counters.read_discard_counters(eapi, nonzero_only=False)
+    store_counters(hostname_short, first_errors, first_discards)
+    second_time = time.monotonic()
+    second_errors = netlib.counters.read_error_counters(eapi, nonzero_only=False)
+    second_discards = netlib.counters.read_discard_counters(eapi, nonzero_only=False)
+    store_counters(hostname_short, second_errors, second_discards)
+    error_change = netlib.counters.compare_counters(first_errors, second_errors)
+    discard_change = netlib.counters.compare_counters(first_discards, second_discards)
+    return {
+        "hostname_short": hostname_short,
+        "changes": [error_change, discard_change, second_time - first_time],
+        "errors": netlib.counters.counter_records(
+            netlib.counters.nonzero_rows(second_errors),
+            netlib.counters.ERROR_COUNTERS,
+        ),
+        "discards": netlib.counters.counter_records(
+            netlib.counters.nonzero_rows(second_discards),
+            netlib.counters.DISCARD_COUNTERS,
+        ),
+        "error_deltas": netlib.counters.delta_records(
+            error_change, netlib.counters.ERROR_COUNTERS
+        ),
+        "discard_deltas": netlib.counters.delta_records(
+            discard_change, netlib.counters.DISCARD_COUNTERS
+        ),
+    }
+
+
+def print_worst_interfaces():
+    # one table for the whole fleet once every switch was scanned, so the
+    # offenders do not scroll away with the per switch output
+    ranking = worst_interfaces.ranking()
+    if not ranking:
+        print("\nNo interface saw new errors or discards during the scan.")
+        return
+    worst_table = Table(
+        title=f"Worst {len(ranking)} interfaces across the fleet by {args.rank_by}"
+    )
+    worst_table.add_column("Hostname", justify="left", style="magenta")
+    worst_table.add_column("Port", justify="right", style="cyan")
+    worst_table.add_column("New Errors", justify="right", style="red")
+    worst_table.add_column("New Discards", justify="right", style="red")
+    worst_table.add_column("Per Second", justify="right")
+    for hostname_short, interface, errors, discards, rate in ranking:
+        worst_table.add_row(
+            hostname_short, interface, str(errors), str(discards), f"{rate:.3f}"
+        )
+    console.print(worst_table)
+
+
+# switches journaled per sink flush in the file output modes
+CHECKPOINT_EVERY = 50
+
+# --watch state per switch: eAPI instance, last counters seen and the
+# interfaces that moved on the last poll ("hot")
+watch_state = {}
+
+
+def watch_poll(switch_hostname):
+    # a switch with hot interfaces is asked about those only, the full table
+    # is read again at least every --max_interval to catch new offenders
+    state = watch_state[switch_hostname]
+    if state["eapi"] is None:
+        eapi = netlib.AristaPyeapi(username, password, switch_hostname, logger)
+        state["hostname_short"] = eapi.get_hostname_short()
+        state["eapi"] = eapi
+    full_poll = (
+        not state["hot"] or time.monotonic() - state["full_time"] >= args.max_interval
+    )
+    sample = netlib.collectors.collect_counters(
+        state["eapi"], None if full_poll else sorted(state["hot"])
+    )
+    if sample is None:
+        return None
+    return [full_poll, time.time()] + sample
+
+
+def watch_changes(last_rows, rows):
+    # only the interfaces in this sample are compared, a scoped poll says
+    # nothing about the others
+    if last_rows is None:
+        return {}
+    return netlib.counters.compare_counters(
+        {
+            interface: last_rows[interface]
+            for interface in rows
+            if interface in last_rows
+        },
+        rows,
+    )
+
+
+def report_watch_changes(hostname_short, poll_time, changes, counter_keys, kind):
+    # kind is "errors" or "discards", the sink record type is error_delta or
+    # discard_delta
+    moving = set()
+    for record in netlib.counters.delta_records(changes, counter_keys):
+        moving.add(record["interface"])
+        counts = " ".join(
+            f"{counter_key[1]}: {record[counter_key[0]]}"
+            for counter_key in counter_keys
+            if record[counter_key[0]]
+        )
+        print(
+            f"{poll_time} {hostname_short} {record['interface']} "
+            f"saw new {kind}. {counts}"
+        )
+        if sink is not None:
+            sink.write(f"{kind[:-1]}_delta", hostname_short, record)
+    return moving
+
+
+def watch_update(switch_hostname, poll_result):
+    state = watch_state[switch_hostname]
+    full_poll, sample_time, error_rows, discard_rows = poll_result
+    hostname_short = state["hostname_short"]
+    poll_time = datetime.datetime.fromtimestamp(sample_time).strftime(
+        "%Y-%m-%d %H:%M:%S"
+    )
+    if full_poll:
+        state["full_time"] = time.monotonic()
+        store_counters(hostname_short, error_rows, discard_rows)
+    moving = report_watch_changes(
+        hostname_short,
+        poll_time,
+        watch_changes(state["errors"], error_rows),
+        netlib.counters.ERROR_COUNTERS,
+        "errors",
+    ) | report_watch_changes(
+        hostname_short,
+        poll_time,
+        watch_changes(state["discards"], discard_rows),
+        netlib.counters.DISCARD_COUNTERS,
+        "discards",
+    )
+    if state["errors"] is None:
+        state["errors"], state["discards"] = error_rows, discard_rows
+    else:
+        state["errors"].update(error_rows)
+        state["discards"].update(discard_rows)
+    state["hot"] = moving
+    return bool(moving)
+
+
+def print_anomalies(anomalies):
+    # ranked by how far each port is above its own usual rate, so a port that
+    # always logs a few errors does not hide one that just started bursting
+    anomaly_table = Table(title="Anomalous ports, highest score first")
+    anomaly_table.add_column("Hostname", justify="left", style="magenta")
+    anomaly_table.add_column("Port", justify="right", style="cyan")
+    anomaly_table.add_column("Counter", justify="left")
+    anomaly_table.add_column("Per Second", justify="right", style="red")
+    anomaly_table.add_column("Usual", justify="right")
+    anomaly_table.add_column("Score", justify="right", style="red")
+    for hostname_short, interface, rate, per_second, baseline, score in anomalies:
+        anomaly_table.add_row(
+            hostname_short,
+            interface,
+            rate,
+            f"{per_second:.3f}",
+            f"{baseline:.3f}",
+            f"{score:.1f}",
+        )
+        if sink is not None:
+            sink.write(
+                "anomaly",
+                hostname_short,
+                {
+                    "interface": interface,
+                    "counter": rate,
+                    "per_second": per_second,
+                    "baseline": baseline,
+                    "score": score,
+                },
+            )
+    console.print(anomaly_table)
+
+
+def watch_cost(switch_hostname):
+    # the first poll of a switch also asks for its hostname
+    return 2 if watch_state[switch_hostname]["eapi"] is None else 1
+
+
+def watch_results(finished_polls, scheduler, scorer):
+    samples = []
+    for switch_hostname, future in finished_polls:
+        try:
+            poll_result = future.result()
+        except (Exception, SystemExit) as exception:
+            print(f"{switch_hostname} failed: {exception}")
+            logger.warning(
+                f"Watch poll failed: {exception}", extra={"host": switch_hostname}
+            )
+            poll_result = None
+        if poll_result is None:
+            # unreachable for now, try again at the slow pace
+            scheduler.done(switch_hostname, False)
+            continue
+        scheduler.done(switch_hostname, watch_update(switch_hostname, poll_result))
+        samples.append(
+            [watch_state[switch_hostname]["hostname_short"]] + poll_result[1:]
+        )
+    if not samples:
+        return
+    # every switch that finished together is scored in one step
+    anomalies = scorer.update(samples)
+    if anomalies:
+        print_anomalies(anomalies)
+    if sink is not None:
+        sink.flush()
+
+
+def watch_fleet():
+    # each switch runs on its own clock: polled every --min_interval while its
+    # counters move, backing off to --max_interval while quiet, with --budget
+    # capping the eAPI requests per second over the whole fleet. Switches are
+    # submitted one by one as they come due and the budget allows, and handled
+    # as each one finishes, so a slow switch only holds up itself
+    budget = args.budget or len(switch_list) / 60
+    scorer = netlib.anomaly.AnomalyScorer(threshold=args.z_threshold)
+    scheduler = netlib.scheduler.AdaptiveScheduler(
+        args.min_interval, args.max_interval, budget
+    )
+    for switch_hostname in switch_list:
+        watch_state[switch_hostname] = {
+            "eapi": None,
+            "hostname_short": switch_hostname,
+            "errors": None,
+            "discards": None,
+            "hot": set(),
+            "full_time": 0.0,
+        }
+        scheduler.add(switch_hostname)
+    print(
+        f"Watching {len(switch_list)} switches every {args.min_interval} to "
+        f"{args.max_interval} seconds, at most {budget:.2f} requests per second."
+    )
+    with concurrent.futures.ThreadPoolExecutor(max_workers=args.workers) as executor:
+        polls = {}
+        try:
+            while polls or scheduler.pending():
+                for switch_hostname in scheduler.ready(
+                    args.workers - len(polls), watch_cost
+                ):
+                    poll = executor.submit(watch_poll, switch_hostname)
+                    polls[poll] = switch_hostname
+                if not polls:
+                    time.sleep(scheduler.wait_time())
+                    continue
+                # wake up for the next switch due, unless every worker is busy
+                finished, _ = concurrent.futures.wait(
+                    polls,
+                    timeout=(
+                        None if len(polls) >= args.workers else scheduler.wait_time()
+                    ),
+                    return_when=concurrent.futures.FIRST_COMPLETED,
+                )
+                watch_results(
+                    [[polls.pop(future), future] for future in finished],
+                    scheduler,
+                    scorer,
+                )
+        except KeyboardInterrupt:
+            for future in polls:
+                future.cancel()
+            raise
+
+
 parser = argparse.ArgumentParser()
 parser.add_argument(
     "-s",
@@ -133,21 +377,181 @@ parser.add_argument(
     metavar="some_folder",
     help="Folder for all outputs from the script",
 )
+parser.add_argument(
+    "-f",
+    "--output_format",
+    type=str,
+    required=False,
+    default="table",
+    choices=netlib.sinks.OUTPUT_FORMATS,
+    help="table renders on screen, the others stream per switch results to a file",
+)
+parser.add_argument(
+    "-w",
+    "--workers",
+    type=int,
+    required=False,
+    default=32,
+    help="Number of switches scanned at once for file outputs",
+)
+parser.add_argument(
+    "--store",
+    type=str,
+    required=False,
+    default=None,
+    metavar="counter_store",
+    help="Folder of the counter history, every sample taken is appended to it",
+)
+parser.add_argument(
+    "--json_log",
+    action="store_true",
+    help="Write the log file as JSON lines with host/command fields",
+)
+parser.add_argument(
+    "--watch",
+    action="store_true",
+    help="Keep polling until Ctrl-C, busy switches more often than quiet ones",
+)
+parser.add_argument(
+    "--min_interval",
+    type=float,
+    required=False,
+    default=10,
+    help="Seconds between polls of a switch whose counters are moving (--watch)",
+)
+parser.add_argument(
+    "--max_interval",
+    type=float,
+    required=False,
+    default=300,
+    help="Slowest poll of a quiet switch, and of the full counters table (--watch)",
+)
+parser.add_argument(
+    "--budget",
+    type=float,
+    required=False,
+    default=None,
+    help="eAPI requests per second for the whole fleet (--watch), "
+    "defaults to one poll per switch per minute",
+)
+parser.add_argument(
+    "--z_threshold",
+    type=float,
+    required=False,
+    default=3.0,
+    help="Standard deviations above its usual rate for a port to be "
+    "reported as anomalous (--watch)",
+)
+parser.add_argument(
+    "--resume",
+    action="store_true",
+    help="Skip the switches finished by the previous, interrupted run",
+)
+parser.add_argument(
+    "-n",
+    "--top",
+    type=int,
+    required=False,
+    default=20,
+    help="Number of interfaces in the fleet summary printed after the scan",
+)
+parser.add_argument(
+    "--rank_by",
+    type=str,
+    required=False,
+    default="errors",
+    choices=netlib.ranking.RANK_BY,
+    help="Order of the fleet summary: new errors, new discards, or both per second",
+)
 
 console = Console()
 
+netlib.inventory.add_inventory_arguments(parser)
 args = parser.parse_args()
-switch_list = open(args.switches)
+# streamed, only --watch keeps the list of switches
+switch_list = netlib.inventory.read_inventory(args.switches, args.filter, args.shard)
 output_dir = args.output_directory
 username, password = netlib.get_credentials("TACACS")
 
 # open a file for logging errors
-start_logger = netlib.setup_logging("get_errors_and_discards", output_dir)
+start_logger = netlib.setup_logging(
+    "get_errors_and_discards", output_dir, json_lines=args.json_log
+)
 logger = start_logger[0]
 logger_full_path = start_logger[1]
 
-all_switch_errors = {}
-all_switch_discards = {}
+# every finished switch is journaled, --resume skips the ones already done by
+# an interrupted run
+journal = None
+if not args.watch:
+    journal = netlib.checkpoint.CheckpointJournal(
+        netlib.checkpoint.journal_path(output_dir, "get_errors_and_discards"),
+        resume=args.resume,
+    )
+    if args.resume:
+        completed_switches = journal.completed()
+        switch_list = (
+            switch for switch in switch_list if switch not in completed_switches
+        )
+        print(f"Resuming, {len(completed_switches)} switches were already scanned.")
+
+
+def skip_unreachable(unreachable):
+    print(f"Skipping {unreachable['host']}, not reachable on the eAPI port.")
+    logger.warning(
+        f"{unreachable['host']} was skipped, {unreachable['loss']}% probe loss.",
+        extra={"host": unreachable["host"]},
+    )
+
+
+# pre-flight: probe the switches in parallel, a chunk at a time as the scan
+# needs more, skip the unreachable ones and scan the closest switches first
+switch_list = netlib.iter_reachable_hosts(switch_list, skip_unreachable)
+if args.watch:
+    # every switch is polled over and over, keep them
+    switch_list = list(switch_list)
+
+sink = netlib.open_sink(args.output_format, output_dir, "get_errors_and_discards")
+worst_interfaces = netlib.ranking.WorstInterfaces(args.top, args.rank_by)
+if args.watch:
+    try:
+        watch_fleet()
+    except KeyboardInterrupt:
+        print("Caught Keyboard Interrupt - Stopping the watch.")
+    finally:
+        if sink is not None:
+            sink.close()
+    netlib.cleanup_log_if_empty(logger_full_path)
+    sys.exit()
+if sink is not None:
+    print("Scanning the switches, results are written as they arrive.")
+    # switches are journaled once their records are on disk, which is after a
+    # sink flush, so every CHECKPOINT_EVERY switches and when the sink closes
+    pending_switches = []
+    try:
+        with sink:
+            for switch_hostname, results in netlib.run_on_fleet(
+                switch_list, scan_switch, args.workers, logger
+            ):
+                if results is None:
+                    continue
+                hostname_short = results.pop("hostname_short")
+                worst_interfaces.add_switch(hostname_short, *results.pop("changes"))
+                for record_type, records in results.items():
+                    sink.write_many(record_type, hostname_short, records)
+                pending_switches.append(switch_hostname)
+                if len(pending_switches) >= CHECKPOINT_EVERY:
+                    sink.flush()
+                    journal.record_many(pending_switches, sink.filename)
+                    pending_switches = []
+    except KeyboardInterrupt:
+        print("Caught Keyboard Interrupt - Exiting the program.")
+        sys.exit()
+    finally:
+        journal.record_many(pending_switches, sink.filename)
+    print_worst_interfaces()
+    netlib.cleanup_log_if_empty(logger_full_path)
+    sys.exit()
 
 print("Please wait while first scans for all complete.")
 
@@ -172,8 +576,14 @@ for switch_hostname in switch_list:
     )
 
     try:
-        all_switch_errors[hostname_short] = read_the_errors()
-        all_switch_discards[hostname_short] = read_the_discards()
+        first_time = time.monotonic()
+        first_interface_errors_array = read_the_errors(eapi, hostname_short)
+        first_interface_discard_array = read_the_discards(eapi, hostname_short)
+        store_counters(
+            hostname_short,
+            first_interface_errors_array,
+            first_interface_discard_array,
+        )
 
         current_time = datetime.datetime.fromtimestamp(time.time()).strftime(
             "%Y-%m-%d %H:%M:%S"
@@ -190,20 +600,26 @@ for switch_hostname in switch_list:
             "#############################################"
         )
 
-        second_interface_errors_array = read_the_errors()
-        second_interface_discard_array = read_the_discards()
-        compare_interface_errors_change = {}
-        compare_interface_discards_change = {}
-        for interface in all_switch_errors[hostname_short]:
-            compare_interface_errors_change[interface] = np.subtract(
-                second_interface_errors_array[interface],
-                all_switch_errors[hostname_short][interface],
-            )
-        for interface in all_switch_discards[hostname_short]:
-            compare_interface_discards_change[interface] = np.subtract(
-                second_interface_discard_array[interface],
-                all_switch_discards[hostname_short][interface],
-            )
+        second_time = time.monotonic()
+        second_interface_errors_array = read_the_errors(eapi, hostname_short)
+        second_interface_discard_array = read_the_discards(eapi, hostname_short)
+        store_counters(
+            hostname_short,
+            second_interface_errors_array,
+            second_interface_discard_array,
+        )
+        compare_interface_errors_change = netlib.counters.compare_counters(
+            first_interface_errors_array, second_interface_errors_array
+        )
+        compare_interface_discards_change = netlib.counters.compare_counters(
+            first_interface_discard_array, second_interface_discard_array
+        )
+        worst_interfaces.add_switch(
+            hostname_short,
+            compare_interface_errors_change,
+            compare_interface_discards_change,
+            second_time - first_time,
+        )
         for interface in compare_interface_errors_change:
             int_values = compare_interface_errors_change[interface]
             if np.any(int_values):
@@ -222,9 +638,11 @@ for switch_hostname in switch_list:
                     f"Interface: {interface} saw new discards. Discards In: "
                     f"{str(int_values[0])} Discards Out: {str(int_values[1])}"
                 )
+        journal.record(switch_hostname)
 
     except KeyboardInterrupt:
         print("Caught Keyboard Interrupt - Exiting the program.")
         sys.exit()
 
+print_worst_interfaces()
 netlib.cleanup_log_if_empty(logger_full_path)
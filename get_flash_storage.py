@@ -15,7 +15,12 @@
 try:
     # importing libraries
     import argparse
+    import datetime
     import os
+    import sys
+
+    from rich.console import Console
+    from rich.table import Table
 
     import netlib
 except ImportError as error:
@@ -25,14 +30,21 @@ except Exception as exception:
     print(exception)
 
 parser = argparse.ArgumentParser()
-parser.add_argument(
+switch_group = parser.add_mutually_exclusive_group(required=True)
+switch_group.add_argument(
     "-s",
     "--switch",
     type=str,
-    required=True,
     metavar="somehostname.com",
     help="Hostname of the switch",
 )
+switch_group.add_argument(
+    "-S",
+    "--switches",
+    type=str,
+    metavar="switches.txt",
+    help="A list of switch hostnames (FQDN) one per line for a capacity scan",
+)
 parser.add_argument(
     "-o",
     "--output_directory",
@@ -42,6 +54,49 @@ parser.add_argument(
     metavar="some_folder",
     help="Folder for all outputs from the script",
 )
+parser.add_argument(
+    "-f",
+    "--output_format",
+    type=str,
+    required=False,
+    default="table",
+    choices=netlib.sinks.OUTPUT_FORMATS,
+    help="table renders the --switches scan on screen, the others write a file",
+)
+parser.add_argument(
+    "-w",
+    "--workers",
+    type=int,
+    required=False,
+    default=32,
+    help="Number of switches scanned at once with --switches",
+)
+parser.add_argument(
+    "-n",
+    "--top",
+    type=int,
+    required=False,
+    default=5,
+    help="Overlay consumers and deleted open files shown per switch",
+)
+parser.add_argument(
+    "--files",
+    type=str,
+    required=False,
+    action="append",
+    default=None,
+    metavar='"*.swi"',
+    help="Flash file name or glob to audit (size and mtime), can be repeated",
+)
+parser.add_argument(
+    "--hash",
+    type=str,
+    required=False,
+    default=None,
+    choices=netlib.capacity.HASH_ALGORITHMS,
+    help="Also hash the files matched by --files",
+)
+netlib.inventory.add_inventory_arguments(parser)
 args = parser.parse_args()
 switch_hostname = args.switch
 output_dir = args.output_directory
@@ -52,6 +107,157 @@ start_logger = netlib.setup_logging("get_flash", output_dir)
 logger = start_logger[0]
 logger_full_path = start_logger[1]
 
+
+def scan_switch(switch_hostname):
+    eapi = netlib.AristaPyeapi(username, password, switch_hostname, logger)
+    return netlib.collectors.collect_capacity(eapi, args.files, args.hash)
+
+
+def print_files_table(files_by_host):
+    files_table = Table(title="Flash files")
+    files_table.add_column("Hostname", justify="left", style="magenta")
+    files_table.add_column("File", justify="left", style="cyan")
+    files_table.add_column("Size", justify="right")
+    files_table.add_column("Modified (UTC)", justify="left")
+    if args.hash:
+        files_table.add_column(args.hash, justify="left")
+    for hostname, flash_files in files_by_host:
+        for flash_file in flash_files:
+            file_row = [
+                hostname,
+                flash_file["name"],
+                netlib.capacity.format_bytes(flash_file["size"]),
+                datetime.datetime.utcfromtimestamp(flash_file["mtime"]).strftime(
+                    "%Y-%m-%d %H:%M:%S"
+                ),
+            ]
+            if args.hash:
+                file_row.append(flash_file.get("hash", ""))
+            files_table.add_row(*file_row)
+    if files_table.row_count:
+        Console().print(files_table)
+    else:
+        print(f"No flash files match {' '.join(args.files)}.")
+
+
+def print_capacity_tables(fleet_capacity):
+    console = Console()
+    capacity_table = Table(title="Flash and overlay utilization, fullest first")
+    capacity_table.add_column("Hostname", justify="left", style="magenta")
+    capacity_table.add_column("Flash Used", justify="right")
+    capacity_table.add_column("Flash Free", justify="right")
+    capacity_table.add_column("Overlay Used", justify="right")
+    capacity_table.add_column("Overlay Free", justify="right")
+    capacity_table.add_column("Deleted Open", justify="right")
+    for capacity_data in fleet_capacity:
+        columns = []
+        for mount in ["flash", "overlay"]:
+            if capacity_data[mount] is None:
+                columns += ["-", "-"]
+                continue
+            use_percent = capacity_data[mount]["use_percent"]
+            if use_percent >= 90:
+                columns.append(f"[red]{use_percent}%[/red]")
+            elif use_percent >= 75:
+                columns.append(f"[yellow]{use_percent}%[/yellow]")
+            else:
+                columns.append(f"{use_percent}%")
+            columns.append(
+                netlib.capacity.format_bytes(capacity_data[mount]["available"])
+            )
+        capacity_table.add_row(
+            capacity_data["hostname"],
+            *columns,
+            netlib.capacity.format_bytes(capacity_data["deleted_open_bytes"]),
+        )
+    console.print(capacity_table)
+
+    consumers_table = Table(title="Largest overlay consumers and deleted open files")
+    consumers_table.add_column("Hostname", justify="left", style="magenta")
+    consumers_table.add_column("Size", justify="right")
+    consumers_table.add_column("Path", justify="left")
+    consumers_table.add_column("Held Open By", justify="left")
+    for capacity_data in fleet_capacity:
+        for consumer in capacity_data["overlay_consumers"][: args.top]:
+            consumers_table.add_row(
+                capacity_data["hostname"],
+                netlib.capacity.format_bytes(consumer["bytes"]),
+                consumer["path"],
+                "",
+            )
+        for open_file in capacity_data["deleted_open_files"][: args.top]:
+            consumers_table.add_row(
+                capacity_data["hostname"],
+                netlib.capacity.format_bytes(open_file["size"]),
+                f"[red]{open_file['name']}[/red]",
+                f"{open_file['command']} ({open_file['pid']})",
+            )
+    if consumers_table.row_count:
+        console.print(consumers_table)
+
+
+def write_capacity(sink, capacity_data):
+    hostname = capacity_data["hostname"]
+    sink.write_many("filesystem", hostname, capacity_data["filesystems"])
+    sink.write_many("overlay_consumer", hostname, capacity_data["overlay_consumers"])
+    sink.write_many("deleted_open_file", hostname, capacity_data["deleted_open_files"])
+    sink.write_many("flash_file", hostname, capacity_data["flash_files"])
+
+
+def skip_switch(switch_hostname):
+    if sink is not None:
+        sink.write("unreachable", switch_hostname, {})
+    else:
+        failed_switches.append(switch_hostname)
+
+
+if args.switches:
+    # streamed, the inventory is never held in full and with a sink every
+    # switch is written as it finishes; only the tables need the whole fleet
+    switch_list = netlib.iter_reachable_hosts(
+        netlib.inventory.read_inventory(args.switches, args.filter, args.shard),
+        lambda unreachable: skip_switch(unreachable["host"]),
+    )
+    # None when printing the results
+    sink = netlib.open_sink(args.output_format, output_dir, "get_flash_storage")
+    failed_switches = []
+    fleet_capacity = []
+    print("Scanning flash and overlay capacity.")
+    try:
+        for switch_hostname, capacity_data in netlib.run_on_fleet(
+            switch_list, scan_switch, args.workers, logger
+        ):
+            if capacity_data is None:
+                skip_switch(switch_hostname)
+            elif sink is not None:
+                write_capacity(sink, capacity_data)
+            else:
+                fleet_capacity.append(capacity_data)
+    except KeyboardInterrupt:
+        print("Caught Keyboard Interrupt - Exiting the program.")
+        sys.exit()
+    finally:
+        if sink is not None:
+            sink.close()
+    if fleet_capacity:
+        fleet_capacity.sort(
+            key=lambda capacity_data: -netlib.capacity.utilization(capacity_data)
+        )
+        print_capacity_tables(fleet_capacity)
+    if fleet_capacity and args.files:
+        print_files_table(
+            [
+                [capacity_data["hostname"], capacity_data["flash_files"]]
+                for capacity_data in fleet_capacity
+            ]
+        )
+    if failed_switches:
+        print(f"\nCould not scan {len(failed_switches)} switches:")
+        for failed_switch in sorted(failed_switches):
+            print(failed_switch)
+    netlib.cleanup_log_if_empty(logger_full_path)
+    sys.exit()
+
 # instantiate the eAPI library
 eapi = netlib.AristaPyeapi(username, password, switch_hostname, logger)
 
@@ -76,4 +282,9 @@ print(f"OS Version: {version}")
 print(f"\n{hostname_short}# bash timeout 2 sudo df -lh")
 get_storage()
 
+if args.files:
+    flash_files = eapi.get_flash_files(args.files, args.hash)
+    if flash_files is not None:
+        print_files_table([[hostname_short, flash_files]])
+
 netlib.cleanup_log_if_empty(logger_full_path)
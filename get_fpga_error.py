@@ -17,6 +17,7 @@ try:
     import argparse
     import datetime
     import os
+    import sys
     from datetime import timedelta
 
     from rich.console import Console
@@ -30,14 +31,22 @@ except Exception as exception:
     print(exception)
 
 parser = argparse.ArgumentParser()
-parser.add_argument(
+switch_group = parser.add_mutually_exclusive_group(required=True)
+switch_group.add_argument(
     "-s",
     "--switch",
     type=str,
-    required=True,
     metavar="switch.hostname.com",
     help="Hostname of the switch",
 )
+switch_group.add_argument(
+    "-S",
+    "--switches",
+    type=str,
+    metavar="switches.txt",
+    help="A list of switch hostnames (FQDN) one per line, every switch is queried "
+    "on every sweep but only errors new since the previous sweep are reported",
+)
 parser.add_argument(
     "-o",
     "--output_directory",
@@ -47,6 +56,32 @@ parser.add_argument(
     metavar="some_folder",
     help="Folder for all outputs from the script",
 )
+parser.add_argument(
+    "-f",
+    "--output_format",
+    type=str,
+    required=False,
+    default="table",
+    choices=netlib.sinks.OUTPUT_FORMATS,
+    help="table renders on screen, the others write the results to a file",
+)
+parser.add_argument(
+    "-w",
+    "--workers",
+    type=int,
+    required=False,
+    default=32,
+    help="Number of switches swept at once with --switches",
+)
+parser.add_argument(
+    "--index",
+    type=str,
+    required=False,
+    default=None,
+    metavar="fpga_index.json",
+    help="Counters seen by the previous sweeps, default under the output folder",
+)
+netlib.inventory.add_inventory_arguments(parser)
 args = parser.parse_args()
 switch_hostname = args.switch
 output_dir = args.output_directory
@@ -58,6 +93,125 @@ logger = start_logger[0]
 logger_full_path = start_logger[1]
 
 console = Console()
+# None when rendering tables on screen
+sink = netlib.open_sink(args.output_format, output_dir, "get_fpga_errors")
+
+
+def sweep_switch(switch_hostname):
+    eapi = netlib.AristaPyeapi(username, password, switch_hostname, logger)
+    return netlib.collectors.collect_fpga_errors(eapi)
+
+
+def skip_switch(switch_hostname):
+    if sink is not None:
+        sink.write("unreachable", switch_hostname, {})
+    else:
+        failed_switches.append(switch_hostname)
+
+
+def report_new_error(hostname, occurrence):
+    # written as found with a sink, kept for the table otherwise
+    if sink is None:
+        new_errors.append([hostname] + occurrence)
+        return
+    fpga, new_count, count, last, rebooted = occurrence
+    sink.write(
+        "fpga_new_error",
+        hostname,
+        {
+            "fpga": fpga,
+            "new_count": new_count,
+            "count": count,
+            "last_occurrence": last,
+            "rebooted": rebooted,
+        },
+    )
+
+
+def fpga_sweep(switch_list, fpga_index):
+    unchanged_switches = 0
+    try:
+        for switch_hostname, fpga_data in netlib.run_on_fleet(
+            switch_list, sweep_switch, args.workers, logger
+        ):
+            if fpga_data is None:
+                skip_switch(switch_hostname)
+                continue
+            if netlib.fpga.unchanged(
+                fpga_index.get(switch_hostname),
+                fpga_data["boot_time"],
+                fpga_data["fpga_uncorrected"],
+            ):
+                # no reload and no new errors, the index entry still holds
+                unchanged_switches += 1
+                continue
+            for occurrence in netlib.fpga.new_occurrences(
+                fpga_index.get(switch_hostname),
+                fpga_data["boot_time"],
+                fpga_data["fpga_uncorrected"],
+            ):
+                report_new_error(fpga_data["hostname"], occurrence)
+            fpga_index[switch_hostname] = netlib.fpga.index_entry(
+                fpga_data["hostname"],
+                fpga_data["boot_time"],
+                fpga_data["fpga_uncorrected"],
+            )
+    finally:
+        # keep what was swept, an interrupted sweep still moves the index on
+        netlib.fpga.save_index(index_file, fpga_index)
+    return unchanged_switches
+
+
+if args.switches:
+    index_file = args.index or f"{output_dir}/fpga_index.json"
+    fpga_index = netlib.fpga.load_index(index_file)
+    # streamed, the inventory is never held in full
+    switch_list = netlib.iter_reachable_hosts(
+        netlib.inventory.read_inventory(args.switches, args.filter, args.shard),
+        lambda unreachable: skip_switch(unreachable["host"]),
+    )
+    new_errors = []
+    failed_switches = []
+    print("Sweeping FPGA errors.")
+    try:
+        unchanged_switches = fpga_sweep(switch_list, fpga_index)
+    except KeyboardInterrupt:
+        print("Caught Keyboard Interrupt - Exiting the program.")
+        sys.exit()
+    finally:
+        if sink is not None:
+            sink.close()
+    print(
+        f"{unchanged_switches} switches have not reloaded or counted new "
+        "errors since the previous sweep."
+    )
+    if sink is None:
+        # most new errors first
+        new_errors.sort(key=lambda new_error: -new_error[2])
+        fpga_table = Table(title="FPGA uncorrectable CRCs since the previous sweep")
+        fpga_table.add_column("Hostname", justify="left", style="magenta")
+        fpga_table.add_column("FPGA", justify="left", style="cyan")
+        fpga_table.add_column("New Errors", justify="right", style="red")
+        fpga_table.add_column("Error Count", justify="right")
+        fpga_table.add_column("Last Occurence (UTC)", justify="left")
+        for hostname, fpga, new_count, count, last, rebooted in new_errors:
+            fpga_table.add_row(
+                hostname,
+                fpga,
+                f"{new_count} (rebooted)" if rebooted else str(new_count),
+                str(count),
+                str(datetime.datetime.utcfromtimestamp(last)),
+            )
+        if new_errors:
+            console.print(fpga_table)
+        else:
+            print("No new FPGA errors since the previous sweep.")
+        if failed_switches:
+            print(f"\nCould not sweep {len(failed_switches)} switches:")
+            for failed_switch in sorted(failed_switches):
+                print(failed_switch)
+    netlib.cleanup_log_if_empty(logger_full_path)
+    sys.exit()
 
 # instantiate the eAPI library
 eapi = netlib.AristaPyeapi(username, password, switch_hostname, logger)
@@ -72,6 +226,33 @@ model = show_version["model"]
 hardware_rev = show_version["hardware_rev"]
 uptime = str(timedelta(seconds=show_version["uptime"]))
 
+if sink is not None:
+    with sink:
+        sink.write(
+            "version",
+            switch_hostname,
+            {
+                "model": model,
+                "hardware_rev": hardware_rev,
+                "serial_number": serial_number,
+                "eos_version": version,
+                "uptime": show_version["uptime"],
+            },
+        )
+        for value in fpga_uncorrected:
+            sink.write(
+                "fpga_error",
+                switch_hostname,
+                {
+                    "fpga": value,
+                    "count": fpga_uncorrected[value]["count"],
+                    "first_occurrence": fpga_uncorrected[value].get("firstOccurrence"),
+                    "last_occurrence": fpga_uncorrected[value].get("lastOccurrence"),
+                },
+            )
+    netlib.cleanup_log_if_empty(logger_full_path)
+    sys.exit()
+
 print(f"Hostname: {switch_hostname}")
 print(f"Model: {model}, Hardware Revision: {hardware_rev}")
 print(f"Serial Number: {serial_number}")
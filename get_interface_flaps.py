@@ -0,0 +1,216 @@
+#!/usr/bin/env python
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Usage example:
+#   watch a list of switches every 30 seconds until Ctrl-C:
+#     get_interface_flaps.py -S switches.txt -i 30
+
+try:
+    # importing libraries
+    import argparse
+    import datetime
+    import os
+    import time
+
+    from rich.console import Console
+    from rich.table import Table
+
+    import netlib
+except ImportError as error:
+    print(error)
+    quit()
+except Exception as exception:
+    print(exception)
+
+parser = argparse.ArgumentParser()
+switch_group = parser.add_mutually_exclusive_group(required=True)
+switch_group.add_argument(
+    "-s",
+    "--switch",
+    type=str,
+    metavar="switch.hostname.com",
+    help="Hostname of the switch",
+)
+switch_group.add_argument(
+    "-S",
+    "--switches",
+    type=str,
+    metavar="switches.txt",
+    help="A list of switch hostnames (FQDN) one per line",
+)
+parser.add_argument(
+    "-o",
+    "--output_directory",
+    type=str,
+    required=False,
+    default=os.environ.get("HOME", "/tmp"),
+    metavar="some_folder",
+    help="Folder for all outputs from the script",
+)
+parser.add_argument(
+    "-f",
+    "--output_format",
+    type=str,
+    required=False,
+    default="table",
+    choices=netlib.sinks.OUTPUT_FORMATS,
+    help="table prints the transitions, the others also write them to a file",
+)
+parser.add_argument(
+    "-w",
+    "--workers",
+    type=int,
+    required=False,
+    default=32,
+    help="Number of switches polled at once",
+)
+parser.add_argument(
+    "-i",
+    "--interval",
+    type=float,
+    required=False,
+    default=30,
+    help="Seconds between the start of two polls of the same switch",
+)
+parser.add_argument(
+    "-c",
+    "--count",
+    type=int,
+    required=False,
+    default=0,
+    help="Number of polls before stopping, 0 watches until Ctrl-C",
+)
+netlib.inventory.add_inventory_arguments(parser)
+args = parser.parse_args()
+output_dir = args.output_directory
+username, password = netlib.get_credentials("TACACS")
+
+# open a file for logging errors
+start_logger = netlib.setup_logging("get_interface_flaps", output_dir)
+logger = start_logger[0]
+logger_full_path = start_logger[1]
+
+# one eAPI instance and one state tracker per switch for the whole watch
+eapi_by_switch = {}
+trackers = {}
+
+
+def poll_switch(switch_hostname):
+    if switch_hostname not in eapi_by_switch:
+        eapi_by_switch[switch_hostname] = netlib.AristaPyeapi(
+            username, password, switch_hostname, logger
+        )
+    return eapi_by_switch[switch_hostname].get_interfaces_status()
+
+
+def utc(timestamp):
+    return datetime.datetime.utcfromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def report_transition(switch_hostname, poll_time, transition, sink):
+    interface, old_link, new_link, old_protocol, new_protocol, flaps = transition
+    print(
+        f"{utc(poll_time)} UTC {switch_hostname} {interface} "
+        f"{old_link}/{old_protocol} -> {new_link}/{new_protocol} (flaps: {flaps})"
+    )
+    if sink is not None:
+        sink.write(
+            "transition",
+            switch_hostname,
+            {
+                "timestamp": poll_time,
+                "interface": interface,
+                "old_link": old_link,
+                "new_link": new_link,
+                "old_protocol": old_protocol,
+                "new_protocol": new_protocol,
+                "flaps": flaps,
+            },
+        )
+
+
+def poll_fleet(switch_list, sink):
+    # one request per switch, only the interfaces that changed state since
+    # the previous poll are reported
+    poll_time = time.time()
+    for switch_hostname, interface_statuses in netlib.run_on_fleet(
+        switch_list, poll_switch, args.workers, logger
+    ):
+        if interface_statuses is None:
+            continue
+        tracker = trackers.setdefault(
+            switch_hostname, netlib.flaps.InterfaceStateTracker()
+        )
+        for transition in tracker.update(interface_statuses):
+            report_transition(switch_hostname, poll_time, transition, sink)
+    if sink is not None:
+        # transitions reach the file every poll, not only when the watch ends
+        sink.flush()
+
+
+def print_flap_summary():
+    flap_table = Table(title="Interface flaps during the watch")
+    flap_table.add_column("Hostname", justify="left", style="magenta")
+    flap_table.add_column("Interface", justify="left", style="cyan")
+    flap_table.add_column("Flaps", justify="right", style="red")
+    flap_rows = [
+        [switch_hostname, interface, flaps]
+        for switch_hostname, tracker in trackers.items()
+        for interface, flaps in tracker.flap_counts().items()
+    ]
+    for switch_hostname, interface, flaps in sorted(
+        flap_rows, key=lambda flap_row: -flap_row[2]
+    ):
+        flap_table.add_row(switch_hostname, interface, str(flaps))
+    if flap_rows:
+        Console().print(flap_table)
+    else:
+        print("No interface flapped during the watch.")
+
+
+def skip_unreachable(unreachable):
+    print(f"Skipping {unreachable['host']}, not reachable on the eAPI port.")
+
+
+if args.switches:
+    switch_list = netlib.inventory.read_inventory(
+        args.switches, args.filter, args.shard
+    )
+else:
+    switch_list = [args.switch.strip()]
+# every poll goes over the same switches, so the reachable ones are kept, but
+# the inventory is probed a chunk at a time on the way in
+switch_list = list(netlib.iter_reachable_hosts(switch_list, skip_unreachable))
+
+# None when only printing
+sink = netlib.open_sink(args.output_format, output_dir, "get_interface_flaps")
+print(f"Watching {len(switch_list)} switches every {args.interval} seconds.")
+polls = 0
+try:
+    while args.count == 0 or polls < args.count:
+        poll_start = time.monotonic()
+        poll_fleet(switch_list, sink)
+        polls += 1
+        if args.count and polls >= args.count:
+            break
+        # keep the cadence, a slow poll eats into the wait rather than adding to it
+        time.sleep(max(0.0, args.interval - (time.monotonic() - poll_start)))
+except KeyboardInterrupt:
+    print("Caught Keyboard Interrupt - Stopping the watch.")
+finally:
+    if sink is not None:
+        sink.close()
+
+print_flap_summary()
+netlib.cleanup_log_if_empty(logger_full_path)
@@ -0,0 +1,181 @@
+#!/usr/bin/env python
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Usage example:
+#   refresh the index from the fleet (only switches older than --max_age):
+#     get_ip_mac_locator.py -S switches.txt
+#   find where an address or a MAC (full or partial) lives:
+#     get_ip_mac_locator.py -l 10.1.2.3 -l aa:bb:cc
+
+try:
+    # importing libraries
+    import argparse
+    import datetime
+    import os
+    import sys
+
+    from rich.console import Console
+    from rich.table import Table
+
+    import netlib
+except ImportError as error:
+    print(error)
+    quit()
+except Exception as exception:
+    print(exception)
+
+parser = argparse.ArgumentParser()
+parser.add_argument(
+    "-S",
+    "--switches",
+    type=str,
+    required=False,
+    metavar="switches.txt",
+    help="A list of switch hostnames (FQDN) one per line to refresh the index from",
+)
+parser.add_argument(
+    "-l",
+    "--lookup",
+    type=str,
+    required=False,
+    action="append",
+    default=[],
+    metavar="10.1.2.3",
+    help="IP address or (partial) MAC to locate, can be given several times",
+)
+parser.add_argument(
+    "-o",
+    "--output_directory",
+    type=str,
+    required=False,
+    default=os.environ.get("HOME", "/tmp"),
+    metavar="some_folder",
+    help="Folder for all outputs from the script",
+)
+parser.add_argument(
+    "--index",
+    type=str,
+    required=False,
+    default=None,
+    metavar="locator.sqlite",
+    help="The locator index, default under the output folder",
+)
+parser.add_argument(
+    "--max_age",
+    type=float,
+    required=False,
+    default=1,
+    help="Hours before a switch's entries are refreshed, 0 refreshes every switch",
+)
+parser.add_argument(
+    "-w",
+    "--workers",
+    type=int,
+    required=False,
+    default=32,
+    help="Number of switches refreshed at once",
+)
+netlib.inventory.add_inventory_arguments(parser)
+args = parser.parse_args()
+if not args.switches and not args.lookup:
+    parser.error("give --switches to refresh the index, --lookup to search it, or both")
+output_dir = args.output_directory
+index_file = args.index or f"{output_dir}/locator.sqlite"
+
+# open a file for logging errors
+start_logger = netlib.setup_logging("get_ip_mac_locator", output_dir)
+logger = start_logger[0]
+logger_full_path = start_logger[1]
+
+
+def refresh_switch(switch_hostname):
+    eapi = netlib.AristaPyeapi(username, password, switch_hostname, logger)
+    return netlib.collectors.collect_neighbors(eapi)
+
+
+def refresh_index(locator_index, switch_list):
+    failed_switches = []
+    switch_list = netlib.iter_reachable_hosts(
+        locator_index.stale_switches(switch_list, args.max_age * 3600),
+        lambda unreachable: failed_switches.append(unreachable["host"]),
+    )
+    print("Refreshing ARP and IPv6 neighbor entries.")
+    switch_count = 0
+    entry_count = 0
+    # workers only collect, the index is written from this thread as each
+    # switch comes back, one transaction per switch
+    for switch_hostname, neighbor_data in netlib.run_on_fleet(
+        switch_list, refresh_switch, args.workers, logger
+    ):
+        if neighbor_data is None:
+            failed_switches.append(switch_hostname)
+            continue
+        locator_index.replace_switch(
+            switch_hostname, neighbor_data["hostname"], neighbor_data["entries"]
+        )
+        switch_count += 1
+        entry_count += len(neighbor_data["entries"])
+    print(f"Indexed {entry_count} entries from {switch_count} switches.")
+    if failed_switches:
+        print(f"\nCould not refresh {len(failed_switches)} switches:")
+        for failed_switch in sorted(failed_switches):
+            print(failed_switch)
+
+
+def print_lookup(locator_index, query):
+    try:
+        locations = locator_index.lookup(query)
+    except ValueError as value_error:
+        print(value_error)
+        return
+    if not locations:
+        print(f"{query} is not in the index.")
+        return
+    lookup_table = Table(title=f"Where is {query}")
+    lookup_table.add_column("Hostname", justify="left", style="magenta")
+    lookup_table.add_column("Interface", justify="left", style="cyan")
+    lookup_table.add_column("VLAN", justify="right")
+    lookup_table.add_column("Address", justify="left")
+    lookup_table.add_column("MAC", justify="left")
+    lookup_table.add_column("Indexed (UTC)", justify="left")
+    for location in locations:
+        lookup_table.add_row(
+            location["hostname"],
+            location["interface"],
+            "" if location["vlan"] is None else str(location["vlan"]),
+            location["address"],
+            location["mac"],
+            datetime.datetime.utcfromtimestamp(location["refreshed"]).strftime(
+                "%Y-%m-%d %H:%M:%S"
+            ),
+        )
+    Console().print(lookup_table)
+
+
+with netlib.locator.LocatorIndex(index_file) as locator_index:
+    if args.switches:
+        username, password = netlib.get_credentials("TACACS")
+        # streamed, the inventory is never held in full
+        switch_list = netlib.inventory.read_inventory(
+            args.switches, args.filter, args.shard
+        )
+        try:
+            refresh_index(locator_index, switch_list)
+        except KeyboardInterrupt:
+            print("Caught Keyboard Interrupt - Exiting the program.")
+            sys.exit()
+    for query in args.lookup:
+        print_lookup(locator_index, query)
+
+netlib.cleanup_log_if_empty(logger_full_path)
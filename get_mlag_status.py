@@ -16,6 +16,7 @@ try:
     # importing libraries
     import argparse
     import os
+    import sys
 
     from termcolor import colored
 
@@ -27,14 +28,37 @@ except Exception as exception:
     print(exception)
 
 parser = argparse.ArgumentParser()
-parser.add_argument(
+switch_group = parser.add_mutually_exclusive_group(required=True)
+switch_group.add_argument(
     "-s",
     "--switch",
     type=str,
-    required=True,
     metavar="switch.hostname.com",
     help="Hostname of the switch",
 )
+switch_group.add_argument(
+    "-S",
+    "--switches",
+    type=str,
+    metavar="switches.txt",
+    help="A list of switch hostnames (FQDN) one per line, checks every MLAG domain",
+)
+parser.add_argument(
+    "-p",
+    "--pair",
+    action="store_true",
+    help="Also query the MLAG peer of --switch and check both agree",
+)
+parser.add_argument(
+    "-P",
+    "--peer",
+    type=str,
+    required=False,
+    default=None,
+    metavar="peer.hostname.com",
+    help="The MLAG peer of --switch, both are then queried at once (implies "
+    "--pair); without it the peer is found from the switch's LLDP first",
+)
 parser.add_argument(
     "-o",
     "--output_directory",
@@ -44,6 +68,24 @@ parser.add_argument(
     metavar="some_folder",
     help="Folder for all outputs from the script",
 )
+parser.add_argument(
+    "-f",
+    "--output_format",
+    type=str,
+    required=False,
+    default="table",
+    choices=netlib.sinks.OUTPUT_FORMATS,
+    help="table prints the results, the others write them to a file",
+)
+parser.add_argument(
+    "-w",
+    "--workers",
+    type=int,
+    required=False,
+    default=32,
+    help="Number of switches queried at once with --switches",
+)
+netlib.inventory.add_inventory_arguments(parser)
 args = parser.parse_args()
 switch_hostname = args.switch
 output_dir = args.output_directory
@@ -54,6 +96,149 @@ start_logger = netlib.setup_logging("get_mlag", output_dir)
 logger = start_logger[0]
 logger_full_path = start_logger[1]
 
+
+def query_switch(switch_hostname):
+    eapi = netlib.AristaPyeapi(username, password, switch_hostname, logger)
+    return netlib.collectors.collect_mlag(eapi)
+
+
+def sweep_mlag(switch_list):
+    # first pass queries every listed switch, the second only the peers that
+    # were not in the list, then the switches are grouped into domains and
+    # each domain is checked.
+    # switch_list can be a generator, it is only read once
+    collected = {}
+    not_mlag = []
+    failed_switches = []
+    queried = set()
+
+    def skip_unreachable(unreachable):
+        failed_switches.append(unreachable["host"])
+        queried.add(unreachable["host"])
+
+    pending = netlib.iter_reachable_hosts(switch_list, skip_unreachable)
+    while pending:
+        for switch_hostname, mlag_data in netlib.run_on_fleet(
+            pending, query_switch, args.workers, logger
+        ):
+            queried.add(switch_hostname)
+            if mlag_data is None:
+                failed_switches.append(switch_hostname)
+            elif mlag_data["mlag"].get("state") == "disabled":
+                not_mlag.append(mlag_data["hostname"])
+            else:
+                collected[mlag_data["hostname"]] = mlag_data
+        # peers found by their peer-link address are known by it as well
+        known = (
+            set(collected)
+            | set(not_mlag)
+            | {mlag_data["local_address"] for mlag_data in collected.values()}
+        )
+        pending = sorted(
+            {
+                peer_name
+                for peer_name in map(netlib.mlag.peer_fqdn, collected.values())
+                if peer_name
+                and peer_name not in queried
+                and peer_name not in known
+                and peer_name.split(".")[0] not in known
+            }
+        )
+    mlag_domains = []
+    for members in netlib.mlag.group_domains(collected.values()):
+        if len(members) > 2:
+            logger.warning(
+                f"{len(members)} switches in one MLAG domain: "
+                + ", ".join(member["hostname"] for member in members)
+            )
+        mlag_domains.append([members, netlib.mlag.check_domain(members)])
+    return mlag_domains, not_mlag, failed_switches
+
+
+def print_switch_mlag(mlag_data):
+    show_mlag = mlag_data["mlag"]
+    print(f"\nHostname: {mlag_data['hostname']}")
+    if show_mlag.get("peerLinkStatus") == "up":
+        print(f"Mlag Config Sanity: {show_mlag.get('configSanity')}")
+    print(f"Mlag Peer Link: {show_mlag.get('peerLink')}")
+    print(f"Mlag Peer Link Status: {show_mlag.get('peerLinkStatus')}")
+    print(f"Mlag Negotiation Status: {show_mlag.get('negStatus')}")
+    print(f"Mlag State: {show_mlag.get('state')}")
+    print("\nActive Ports: ")
+    for port in mlag_data["peer_link_active"]:
+        print(colored(port, "green"))
+    print("\nInactive Ports: ")
+    for port in mlag_data["peer_link_inactive"]:
+        print(colored(port, "red"))
+
+
+if args.peer:
+    args.pair = True
+
+if args.switches or args.pair:
+    if args.switches:
+        # streamed, the inventory is never held in full
+        switch_list = netlib.inventory.read_inventory(
+            args.switches, args.filter, args.shard
+        )
+    else:
+        # with --peer both peers go out in the same run_on_fleet pass
+        switch_list = [switch_hostname.strip()]
+        if args.peer:
+            switch_list.append(args.peer.strip())
+    try:
+        mlag_domains, not_mlag, failed_switches = sweep_mlag(switch_list)
+    except KeyboardInterrupt:
+        print("Caught Keyboard Interrupt - Exiting the program.")
+        sys.exit()
+    # None when printing the results
+    sink = netlib.open_sink(args.output_format, output_dir, "get_mlag_status")
+    if sink is not None:
+        with sink:
+            for members, issues in mlag_domains:
+                first, peers = members[0], members[1:]
+                sink.write(
+                    "mlag_domain",
+                    first["hostname"],
+                    {
+                        "peer": ", ".join(peer["hostname"] for peer in peers) or None,
+                        "domain_id": first["mlag"].get("domainId"),
+                        "state": first["mlag"].get("state"),
+                        "peer_state": ", ".join(
+                            str(peer["mlag"].get("state")) for peer in peers
+                        )
+                        or None,
+                        "consistent": not issues,
+                        "issues": "; ".join(issues),
+                    },
+                )
+            for failed_switch in failed_switches:
+                sink.write("unreachable", failed_switch, {})
+    else:
+        for members, issues in mlag_domains:
+            if args.pair:
+                for member in members:
+                    print_switch_mlag(member)
+                print()
+            member_names = [member["hostname"] for member in members]
+            if len(member_names) == 1:
+                member_names.append("?")
+            domain_name = " / ".join(member_names)
+            if issues:
+                print(colored(f"{domain_name}: {len(issues)} issues", "red"))
+                for issue in issues:
+                    print(colored(f"    {issue}", "red"))
+            else:
+                print(colored(f"{domain_name}: consistent", "green"))
+        if not_mlag and args.switches:
+            print(f"\nMLAG is not configured on {len(not_mlag)} switches.")
+        if failed_switches:
+            print(f"\nCould not query {len(failed_switches)} switches:")
+            for failed_switch in sorted(failed_switches):
+                print(failed_switch)
+    netlib.cleanup_log_if_empty(logger_full_path)
+    sys.exit()
+
 # instantiate the eAPI library
 eapi = netlib.AristaPyeapi(username, password, switch_hostname, logger)
 
@@ -0,0 +1,277 @@
+#!/usr/bin/env python
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+try:
+    # importing libraries
+    import argparse
+    import os
+    import sys
+
+    import numpy as np
+    from rich.console import Console
+    from rich.table import Table
+
+    import netlib
+except ImportError as error:
+    print(error)
+    quit()
+except Exception as exception:
+    print(exception)
+
+parser = argparse.ArgumentParser()
+parser.add_argument(
+    "-s",
+    "--switches",
+    type=str,
+    required=True,
+    metavar="switches.txt",
+    help="A list of switch hostnames (FQDN) one per line",
+)
+parser.add_argument(
+    "-o",
+    "--output_directory",
+    type=str,
+    required=False,
+    default=os.environ.get("HOME", "/tmp"),
+    metavar="some_folder",
+    help="Folder for all outputs from the script",
+)
+parser.add_argument(
+    "-f",
+    "--output_format",
+    type=str,
+    required=False,
+    default="table",
+    choices=netlib.sinks.OUTPUT_FORMATS,
+    help="table renders the flagged optics on screen, the others write a file",
+)
+parser.add_argument(
+    "-w",
+    "--workers",
+    type=int,
+    required=False,
+    default=32,
+    help="Number of switches scanned at once",
+)
+parser.add_argument(
+    "-t",
+    "--thresholds",
+    type=str,
+    required=False,
+    default=None,
+    metavar="thresholds.json",
+    help='Override DOM thresholds, e.g. {"rxPower": [-14, -12, 3.5, 4.5]}',
+)
+parser.add_argument(
+    "--max_link_loss",
+    type=float,
+    required=False,
+    default=4.0,
+    help="Flag links losing more dB than this between Tx and the far end Rx",
+)
+parser.add_argument(
+    "--max_rx_drop",
+    type=float,
+    required=False,
+    default=2.0,
+    help="Flag ports whose Rx power dropped more dB than this since the baseline",
+)
+parser.add_argument(
+    "--update_baseline",
+    action="store_true",
+    help="Move the Rx baseline of every scanned port to this scan's levels",
+)
+parser.add_argument(
+    "-p",
+    "--processes",
+    type=int,
+    required=False,
+    default=0,
+    help="Processes parsing the replies into DOM arrays, 0 does it in the "
+    "main process",
+)
+netlib.inventory.add_inventory_arguments(parser)
+args = parser.parse_args()
+# streamed, the inventory is never held in full
+switch_list = netlib.inventory.read_inventory(args.switches, args.filter, args.shard)
+output_dir = args.output_directory
+username, password = netlib.get_credentials("TACACS")
+
+# open a file for logging errors
+start_logger = netlib.setup_logging("get_optics_scan", output_dir)
+logger = start_logger[0]
+logger_full_path = start_logger[1]
+
+console = Console()
+baseline_file = f"{output_dir}/optics_baseline.npz"
+
+
+def scan_switch(switch_hostname):
+    eapi = netlib.AristaPyeapi(username, password, switch_hostname, logger)
+    # one request per switch for everything the analysis needs, left as raw
+    # bytes for compact_reply to parse off the I/O threads
+    return eapi.try_eapi_command(
+        ["show hostname", "show interfaces transceiver", "show lldp neighbors"],
+        "raw",
+    )
+
+
+def skip_unreachable(unreachable):
+    print(f"Skipping {unreachable['host']}, not reachable on the eAPI port.")
+    logger.warning(
+        f"{unreachable['host']} was skipped, {unreachable['loss']}% probe loss.",
+        extra={"host": unreachable["host"]},
+    )
+
+
+switch_list = netlib.iter_reachable_hosts(switch_list, skip_unreachable)
+print("Collecting transceiver DOM data.")
+# the I/O threads only fetch, each switch's reply is parsed and reduced to
+# NumPy arrays by compact_reply as it arrives, on --processes worker processes
+# when given, so only the compact arrays of the fleet are kept for the link loss
+switch_arrays = []
+lldp_pairs = []
+host_aliases = {}
+try:
+    for switch_hostname, compact_results in netlib.analyze_on_pool(
+        netlib.run_on_fleet(switch_list, scan_switch, args.workers, logger),
+        netlib.optics.compact_reply,
+        args.processes,
+        logger,
+    ):
+        if compact_results is None:
+            continue
+        hostname_short = compact_results["hostname"]
+        switch_arrays.append(
+            [hostname_short, compact_results["ports"], compact_results["dom_values"]]
+        )
+        host_aliases[compact_results["fqdn"]] = hostname_short
+        host_aliases[switch_hostname] = hostname_short
+        lldp_pairs.extend(compact_results["lldp_pairs"])
+except KeyboardInterrupt:
+    print("Caught Keyboard Interrupt - Exiting the program.")
+    sys.exit()
+
+hosts, ports, dom_values = netlib.optics.merge_dom_arrays(switch_arrays)
+thresholds = netlib.optics.load_thresholds(args.thresholds)
+dom_status = netlib.optics.classify_dom(dom_values, thresholds)
+worst_status = dom_status.max(axis=1) if len(hosts) else np.zeros(0, dtype="i1")
+rx_drop = netlib.optics.rx_drop_since_baseline(baseline_file, hosts, ports, dom_values)
+with np.errstate(invalid="ignore"):
+    degrading = rx_drop > args.max_rx_drop
+local_rows, remote_rows, loss_db = netlib.optics.link_loss(
+    hosts, ports, dom_values, lldp_pairs, host_aliases
+)
+with np.errstate(invalid="ignore"):
+    lossy_links = np.flatnonzero(loss_db > args.max_link_loss)
+flagged = np.flatnonzero((worst_status > netlib.optics.OPTIC_OK) | degrading)
+# worst first: alarms, then warnings, then the biggest Rx drop
+flagged = flagged[
+    np.lexsort((-np.nan_to_num(rx_drop[flagged]), -worst_status[flagged]))
+]
+
+print(
+    f"Scanned {len(hosts)} optics on {len(switch_arrays)} switches: "
+    f"{int(np.sum(worst_status == netlib.optics.OPTIC_ALARM))} alarms, "
+    f"{int(np.sum(worst_status == netlib.optics.OPTIC_WARNING))} warnings, "
+    f"{int(np.sum(degrading))} degrading, {len(lossy_links)} lossy links."
+)
+
+
+def flagged_fields(row):
+    return ", ".join(
+        f"{field} {netlib.optics.OPTIC_STATUS_NAMES[dom_status[row, column]]}"
+        for column, field in enumerate(netlib.optics.OPTIC_FIELDS)
+        if dom_status[row, column] > netlib.optics.OPTIC_OK
+    )
+
+
+sink = netlib.open_sink(args.output_format, output_dir, "get_optics_scan")
+if sink is not None:
+    with sink:
+        for row in flagged:
+            record = {"port": ports[row]}
+            for column, field in enumerate(netlib.optics.OPTIC_FIELDS):
+                record[field] = float(dom_values[row, column])
+            record["status"] = netlib.optics.OPTIC_STATUS_NAMES[worst_status[row]]
+            record["flagged"] = flagged_fields(row)
+            record["rx_drop_db"] = float(rx_drop[row])
+            sink.write("optic", hosts[row], record)
+        for link in lossy_links:
+            sink.write(
+                "link_loss",
+                hosts[local_rows[link]],
+                {
+                    "port": ports[local_rows[link]],
+                    "neighbor": hosts[remote_rows[link]],
+                    "neighbor_port": ports[remote_rows[link]],
+                    "loss_db": float(loss_db[link]),
+                },
+            )
+else:
+    optics_table = Table(title="Flagged optics")
+    optics_table.add_column("Hostname", justify="left", style="magenta")
+    optics_table.add_column("Port", justify="left")
+    optics_table.add_column("Status", justify="center")
+    optics_table.add_column("Temp(C)", justify="right")
+    optics_table.add_column("Voltage", justify="right")
+    optics_table.add_column("Bias Current", justify="right")
+    optics_table.add_column("Tx (dBm)", justify="right")
+    optics_table.add_column("Rx (dBm)", justify="right")
+    optics_table.add_column("Rx Drop (dB)", justify="right")
+    for row in flagged:
+        status = netlib.optics.OPTIC_STATUS_NAMES[worst_status[row]]
+        if worst_status[row] == netlib.optics.OPTIC_ALARM:
+            status = f"[red]{status}[/red]"
+        elif worst_status[row] == netlib.optics.OPTIC_WARNING:
+            status = f"[yellow]{status}[/yellow]"
+        else:
+            status = "[yellow]degrading[/yellow]"
+        optics_table.add_row(
+            hosts[row],
+            ports[row],
+            status,
+            *[f"{value:.2f}" for value in dom_values[row]],
+            "" if np.isnan(rx_drop[row]) else f"{rx_drop[row]:.2f}",
+        )
+    if len(flagged):
+        console.print(optics_table)
+    else:
+        print("No optics outside of thresholds.")
+    link_table = Table(title=f"Links losing more than {args.max_link_loss} dB")
+    link_table.add_column("Hostname", justify="left", style="magenta")
+    link_table.add_column("Port", justify="left")
+    link_table.add_column("Neighbor", justify="left", style="magenta")
+    link_table.add_column("Neighbor Port", justify="left")
+    link_table.add_column("Loss (dB)", justify="right")
+    for link in lossy_links[np.argsort(-loss_db[lossy_links])]:
+        link_table.add_row(
+            hosts[local_rows[link]],
+            ports[local_rows[link]],
+            hosts[remote_rows[link]],
+            ports[remote_rows[link]],
+            f"{loss_db[link]:.2f}",
+        )
+    if len(lossy_links):
+        console.print(link_table)
+
+# new ports join the baseline, the known ones only move with --update_baseline
+if len(hosts):
+    netlib.optics.save_baseline(
+        baseline_file, hosts, ports, dom_values, args.update_baseline
+    )
+    if args.update_baseline:
+        print(f"Rx baseline updated for {len(hosts)} optics in {baseline_file}")
+
+netlib.cleanup_log_if_empty(logger_full_path)
@@ -42,6 +42,23 @@ parser.add_argument(
     metavar="some_folder",
     help="Folder for all outputs from the script",
 )
+parser.add_argument(
+    "-n",
+    "--top",
+    type=int,
+    required=False,
+    default=50,
+    help="Largest entries kept from each listing",
+)
+parser.add_argument(
+    "-t",
+    "--timeout",
+    type=int,
+    required=False,
+    default=20,
+    help="Seconds each walk may run on the switch, sorting gets 5 more, keep "
+    "the two under 30",
+)
 args = parser.parse_args()
 switch_hostname = args.switch
 output_dir = args.output_directory
@@ -57,35 +74,49 @@ logger_full_path = start_logger[1]
 # instantiate the eAPI library
 eapi = netlib.AristaPyeapi(username, password, switch_hostname, logger)
 
-sudo_du = eapi.try_eapi_command(
-    "bash timeout 2 sudo du -sch /.overlay/* | sort -k1 -hr",
-    "enable",
-)["messages"]
-
-sudo_ls = eapi.try_eapi_command(
-    "bash timeout 2 sudo ls -alSRh /.overlay",
-    "enable",
-)["messages"]
-
-sudo_lsof = eapi.try_eapi_command(
-    "bash timeout 30 sudo lsof -nP | grep '(deleted)'",
-    "enable",
-)["messages"]
+# everything is sorted and cut to --top entries on the switch, with a totals
+# line, so a leaking box sends back the same few KB as a healthy one
+overlay_commands = [
+    [
+        "sudo_du.txt",
+        "directories",
+        netlib.capacity.overlay_du_command(args.top, args.timeout),
+    ],
+    [
+        "sudo_ls.txt",
+        "files",
+        netlib.capacity.overlay_files_command(args.top, args.timeout),
+    ],
+    [
+        "sudo_lsof.txt",
+        "deleted open files",
+        netlib.capacity.deleted_files_command(args.top, args.timeout),
+    ],
+]
 
 
-def json_to_file(filename, json_source):
+def lines_to_file(filename, lines):
     new_filename = f"{output_dir}/{switch_hostname.strip()}_{filename}"
     with open(new_filename, "w") as my_file:
-        if filename.startswith("sudo"):
-            for each_line in json_source:
-                my_file.write("%s\n" % each_line)
-        else:
-            my_file.write(json_source)
+        for each_line in lines:
+            my_file.write("%s\n" % each_line)
         print(f"Outputs written to {new_filename}")
 
 
-json_to_file("sudo_du.txt", sudo_du)
-json_to_file("sudo_ls.txt", sudo_ls)
-json_to_file("sudo_lsof.txt", sudo_lsof)
+# one command at a time, each written out as soon as it returns so a slow
+# lsof never holds back (or loses) the du and find results
+for filename, description, command in overlay_commands:
+    command_output = eapi.try_eapi_command(command, "enable")
+    if command_output is None:
+        print(f"Could not collect the {description} from {switch_hostname}.")
+        continue
+    lines, totals = netlib.capacity.parse_top_output(
+        "".join(command_output["messages"])
+    )
+    lines_to_file(filename, lines)
+    print(
+        f"{totals[0]} {description} using "
+        f"{netlib.capacity.format_bytes(totals[1])}, largest {len(lines)} kept."
+    )
 
 netlib.cleanup_log_if_empty(logger_full_path)
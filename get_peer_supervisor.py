@@ -0,0 +1,155 @@
+#!/usr/bin/env python
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Usage example:
+#   get_peer_supervisor.py -S chassis.txt -c "show version" -c "show reload cause"
+
+try:
+    # importing libraries
+    import argparse
+    import os
+    import sys
+    from datetime import datetime
+
+    import netlib
+except ImportError as error:
+    print(error)
+    quit()
+except Exception as exception:
+    print(exception)
+
+parser = argparse.ArgumentParser()
+switch_group = parser.add_mutually_exclusive_group(required=True)
+switch_group.add_argument(
+    "-s",
+    "--switch",
+    type=str,
+    metavar="switch.hostname.com",
+    help="Hostname of the chassis, the outputs are printed",
+)
+switch_group.add_argument(
+    "-S",
+    "--switches",
+    type=str,
+    metavar="switches.txt",
+    help="A list of chassis hostnames (FQDN) one per line, outputs go to files",
+)
+parser.add_argument(
+    "-c",
+    "--command",
+    type=str,
+    required=False,
+    action="append",
+    default=None,
+    metavar='"show version"',
+    help="Command to run on the standby supervisor, can be given several times",
+)
+parser.add_argument(
+    "-o",
+    "--output_directory",
+    type=str,
+    required=False,
+    default=os.environ.get("HOME", "/tmp"),
+    metavar="some_folder",
+    help="Folder for all outputs from the script",
+)
+parser.add_argument(
+    "-w",
+    "--workers",
+    type=int,
+    required=False,
+    default=32,
+    help="Number of chassis queried at once",
+)
+netlib.inventory.add_inventory_arguments(parser)
+args = parser.parse_args()
+output_dir = args.output_directory
+peer_commands = args.command or [
+    "show version",
+    "show redundancy status",
+    "show reload cause",
+    "show hardware fpga error",
+    "show file systems",
+]
+username, password = netlib.get_credentials("TACACS")
+
+# open a file for logging errors
+start_logger = netlib.setup_logging("get_peer_supervisor", output_dir)
+logger = start_logger[0]
+logger_full_path = start_logger[1]
+
+logs_time_stamp = datetime.now().strftime("%Y-%m-%d_%H:%M:%S")
+
+
+def query_peer(switch_hostname):
+    # one eAPI request and one Cli process per chassis for all the commands
+    eapi = netlib.AristaPyeapi(username, password, switch_hostname, logger)
+    return eapi.peer_supervisor_commands(peer_commands)
+
+
+def peer_output_text(switch_hostname, peer_outputs):
+    sections = []
+    for peer_command, command_output in zip(peer_commands, peer_outputs):
+        sections.append(
+            "\n##############################################################\n"
+            f"{switch_hostname}(peer)# {peer_command}"
+            "\n##############################################################\n\n"
+        )
+        if command_output is None:
+            sections.append("Command did not run before the timeout.\n")
+        else:
+            sections.append(command_output)
+    return "".join(sections)
+
+
+if args.switches:
+    # streamed, the inventory is never held in full
+    switch_list = netlib.inventory.read_inventory(
+        args.switches, args.filter, args.shard
+    )
+else:
+    switch_list = [args.switch.strip()]
+failed_switches = []
+
+try:
+    for switch_hostname, peer_outputs in netlib.run_on_fleet(
+        netlib.iter_reachable_hosts(
+            switch_list,
+            lambda unreachable: failed_switches.append(unreachable["host"]),
+        ),
+        query_peer,
+        args.workers,
+        logger,
+    ):
+        if peer_outputs is None:
+            failed_switches.append(switch_hostname)
+        elif args.switch:
+            print(peer_output_text(switch_hostname, peer_outputs))
+        else:
+            filename = (
+                f"{output_dir}/{switch_hostname}_{logs_time_stamp}_peer_supervisor.txt"
+            )
+            with open(filename, "w") as my_file:
+                my_file.write(peer_output_text(switch_hostname, peer_outputs))
+            print(f"Outputs written to {filename}")
+except KeyboardInterrupt:
+    print("Caught Keyboard Interrupt - Exiting the program.")
+    sys.exit()
+
+if failed_switches:
+    print(f"\nCould not reach the peer supervisor on {len(failed_switches)} switches:")
+    for failed_switch in sorted(failed_switches):
+        print(failed_switch)
+
+netlib.cleanup_log_if_empty(logger_full_path)
@@ -0,0 +1,203 @@
+#!/usr/bin/env python
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+try:
+    # importing libraries
+    import argparse
+    import os
+    import sys
+    import time
+
+    from rich.console import Console
+    from rich.table import Table
+
+    import netlib
+except ImportError as error:
+    print(error)
+    quit()
+except Exception as exception:
+    print(exception)
+
+parser = argparse.ArgumentParser()
+switch_group = parser.add_mutually_exclusive_group(required=True)
+switch_group.add_argument(
+    "-s",
+    "--switch",
+    type=str,
+    metavar="switch.hostname.com",
+    help="Hostname of the switch",
+)
+switch_group.add_argument(
+    "-S",
+    "--switches",
+    type=str,
+    metavar="switches.txt",
+    help="A list of switch hostnames (FQDN) one per line",
+)
+parser.add_argument(
+    "-o",
+    "--output_directory",
+    type=str,
+    required=False,
+    default=os.environ.get("HOME", "/tmp"),
+    metavar="some_folder",
+    help="Folder for all outputs from the script",
+)
+parser.add_argument(
+    "-f",
+    "--output_format",
+    type=str,
+    required=False,
+    default="table",
+    choices=netlib.sinks.OUTPUT_FORMATS,
+    help="table renders on screen, the others write the results to a file",
+)
+parser.add_argument(
+    "-w",
+    "--workers",
+    type=int,
+    required=False,
+    default=32,
+    help="Number of switches queried at once",
+)
+parser.add_argument(
+    "-i",
+    "--interval",
+    type=int,
+    required=False,
+    default=20,
+    help="Seconds between the two counter samples",
+)
+netlib.inventory.add_inventory_arguments(parser)
+args = parser.parse_args()
+output_dir = args.output_directory
+username, password = netlib.get_credentials("TACACS")
+
+# open a file for logging errors
+start_logger = netlib.setup_logging("get_port_channel_health", output_dir)
+logger = start_logger[0]
+logger_full_path = start_logger[1]
+
+
+def first_pass(switch_hostname):
+    eapi = netlib.AristaPyeapi(username, password, switch_hostname, logger)
+    return netlib.collectors.collect_lag_health(eapi)
+
+
+def second_pass(switch_hostname):
+    eapi = netlib.AristaPyeapi(username, password, switch_hostname, logger)
+    return netlib.collectors.collect_counters(eapi)
+
+
+def skip_switch(switch_hostname):
+    if sink is not None:
+        sink.write("unreachable", switch_hostname, {})
+    else:
+        failed_switches.append(switch_hostname)
+
+
+if args.switches:
+    # streamed, the inventory is never held in full
+    switch_list = netlib.inventory.read_inventory(
+        args.switches, args.filter, args.shard
+    )
+else:
+    switch_list = [args.switch.strip()]
+# None when rendering tables on screen
+sink = netlib.open_sink(args.output_format, output_dir, "get_port_channel_health")
+failed_switches = []
+
+# one request per switch and pass, both passes run across the whole fleet at
+# once so the interval is only waited for a single time
+print("Reading port-channels and counters.")
+first_samples = {}
+flagged_lags = []
+try:
+    for switch_hostname, lag_data in netlib.run_on_fleet(
+        netlib.iter_reachable_hosts(
+            switch_list, lambda unreachable: skip_switch(unreachable["host"])
+        ),
+        first_pass,
+        args.workers,
+        logger,
+    ):
+        if lag_data is None:
+            skip_switch(switch_hostname)
+        else:
+            first_samples[switch_hostname] = lag_data
+    if first_samples:
+        print(f"Sleeping for {args.interval} seconds and sampling the counters again.")
+        time.sleep(args.interval)
+    for switch_hostname, second_sample in netlib.run_on_fleet(
+        sorted(first_samples), second_pass, args.workers, logger
+    ):
+        # the first sample is done with once the deltas are taken
+        lag_data = first_samples.pop(switch_hostname)
+        if second_sample is None:
+            # the LAG membership is still worth reporting without the deltas
+            second_sample = lag_data["counters"]
+            skip_switch(switch_hostname)
+        for lag_record in netlib.lag.lag_health(
+            lag_data["port_channels"], lag_data["counters"], second_sample
+        ):
+            if sink is not None:
+                sink.write("port_channel", lag_data["hostname"], lag_record)
+            else:
+                flagged_lags.append([lag_data["hostname"], lag_record])
+except KeyboardInterrupt:
+    print("Caught Keyboard Interrupt - Exiting the program.")
+    sys.exit()
+finally:
+    if sink is not None:
+        sink.close()
+flagged_lags.sort(
+    key=lambda flagged_lag: (flagged_lag[0], flagged_lag[1]["port_channel"])
+)
+
+if sink is None:
+    console = Console()
+    lag_table = Table(title="Port-channels with inactive members or rising errors")
+    lag_table.add_column("Hostname", justify="left", style="magenta")
+    lag_table.add_column("Port-Channel", justify="left", style="cyan")
+    lag_table.add_column("Status", justify="left")
+    lag_table.add_column("Active", justify="right")
+    lag_table.add_column("Inactive Members", justify="left", style="red")
+    lag_table.add_column("Rising Errors", justify="left", style="red")
+    lag_table.add_column("Rising Discards", justify="left", style="yellow")
+    for hostname, lag_record in flagged_lags:
+        lag_table.add_row(
+            hostname,
+            lag_record["port_channel"],
+            str(lag_record["link_state"]),
+            str(len(lag_record["active_members"])),
+            "\n".join(lag_record["inactive_members"]),
+            "\n".join(
+                f"{member}: {errors}"
+                for member, errors in lag_record["rising_errors"].items()
+            ),
+            "\n".join(
+                f"{member}: {discards}"
+                for member, discards in lag_record["rising_discards"].items()
+            ),
+        )
+    if flagged_lags:
+        console.print(lag_table)
+    else:
+        print("All port-channel members are active with no rising errors.")
+    if failed_switches:
+        print(f"\nCould not read {len(failed_switches)} switches:")
+        for failed_switch in sorted(failed_switches):
+            print(failed_switch)
+
+netlib.cleanup_log_if_empty(logger_full_path)
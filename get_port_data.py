@@ -49,6 +49,15 @@ parser.add_argument(
     metavar="some_folder",
     help="Folder for all outputs from the script",
 )
+parser.add_argument(
+    "-f",
+    "--output_format",
+    type=str,
+    required=False,
+    default="table",
+    choices=netlib.sinks.OUTPUT_FORMATS,
+    help="table renders on screen, the others write the results to a file",
+)
 args = parser.parse_args()
 switch_hostname = args.switch
 port_name = args.port
@@ -61,6 +70,8 @@ logger = start_logger[0]
 logger_full_path = start_logger[1]
 
 console = Console()
+# None when rendering tables on screen
+sink = netlib.open_sink(args.output_format, output_dir, "get_port_data")
 
 eapi = netlib.AristaPyeapi(username, password, switch_hostname, logger)
 
@@ -79,6 +90,17 @@ else:
 
 def show_switch_version():
     show_version = eapi.get_version()
+    if sink is not None:
+        sink.write(
+            "version",
+            hostname_short,
+            {
+                "model": show_version["model"],
+                "eos_version": show_version["eos_version"],
+                "serial_number": show_version["serial_number"],
+            },
+        )
+        return
     switch_version_table = Table()
     switch_version_table.add_column(
         "Hostname", justify="left", style="magenta", no_wrap=True, vertical="middle"
@@ -100,6 +122,18 @@ def show_switch_version():
 def interface_inventory(base_port, port_name_long):
     get_interface_inventory = eapi.get_inventory("interfaces")[base_port]
     inventory_vendor = get_interface_inventory["mfgName"]
+    if sink is not None:
+        sink.write(
+            "inventory",
+            hostname_short,
+            {
+                "port": port_name_long,
+                "manufacturer": inventory_vendor,
+                "model": get_interface_inventory["modelName"],
+                "serial_number": get_interface_inventory["serialNum"],
+            },
+        )
+        return inventory_vendor
     port_inventory_table = Table()
     port_inventory_table.add_column(
         "Hostname", justify="left", style="magenta", no_wrap=True, vertical="middle"
@@ -126,6 +160,20 @@ def interface_errors(port_name_long):
     get_errors = eapi.try_eapi_command("show interfaces counters errors", "enable")[
         "interfaceErrorCounters"
     ][port_name_long]
+    if sink is not None:
+        sink.write_many(
+            "errors",
+            hostname_short,
+            netlib.counters.counter_records(
+                netlib.counters.counter_rows(
+                    {port_name_long: get_errors},
+                    netlib.counters.ERROR_COUNTERS,
+                    nonzero_only=False,
+                ),
+                netlib.counters.ERROR_COUNTERS,
+            ),
+        )
+        return
     interface_counters_table = Table()
     interface_counters_table.add_column(
         "Port", justify="left", style="magenta", no_wrap=True
@@ -168,6 +216,20 @@ def interface_transceiver(port_name_long, dash2, dash3, dash4):
 
     def get_transceiver(port):
         levels = get_interface_transceiver[port]
+        if sink is not None:
+            sink.write(
+                "transceiver",
+                hostname_short,
+                {
+                    "port": port,
+                    "temperature": levels["temperature"],
+                    "voltage": levels["voltage"],
+                    "tx_bias": levels["txBias"],
+                    "tx_power": levels["txPower"],
+                    "rx_power": levels["rxPower"],
+                },
+            )
+            return
         transceiver_results_table.add_row(
             port,
             f'{levels["temperature"]:.2f}',
@@ -182,6 +244,8 @@ def interface_transceiver(port_name_long, dash2, dash3, dash4):
         get_transceiver(dash2)
         get_transceiver(dash3)
         get_transceiver(dash4)
+    if sink is not None:
+        return
     print("")
     print(f"{hostname_short}# show interfaces transceiver")
     transceiver_results_table.float_format = ".2"
@@ -191,6 +255,13 @@ def interface_transceiver(port_name_long, dash2, dash3, dash4):
 def mac_details(port_name):
     mac_detail_command = f"show interfaces Ethernet {port_name} mac detail"
     get_mac_detail = eapi.try_eapi_command(mac_detail_command, "enable", "text")
+    if sink is not None:
+        sink.write(
+            "mac_detail",
+            hostname_short,
+            {"port": f"Ethernet{port_name}", "output": get_mac_detail},
+        )
+        return
     print(f"\n{hostname_short}# {mac_detail_command}")
     print(get_mac_detail)
 
@@ -223,18 +294,29 @@ else:
     my_neighbor_port = my_neighbor_port_long.replace("Ethernet", "Et")
     my_neighbor_port = my_neighbor_port_long.replace("Management", "Ma")
     my_neighbor_device = results_lldp[0]["neighborDevice"]
-    lldp_neighbor_table = Table()
-    lldp_neighbor_table.add_column(
-        "Hostname", justify="left", style="magenta", no_wrap=True, vertical="middle"
-    )
-    lldp_neighbor_table.add_column("Local Port", justify="center")
-    lldp_neighbor_table.add_column("LLDP Neighbor", justify="left")
-    lldp_neighbor_table.add_column("Remote Port", justify="center")
-    lldp_neighbor_table.add_row(
-        hostname_short, port_name_long, my_neighbor_device, my_neighbor_port_long
-    )
-    print(f"{hostname_short}# show lldp neighbors")
-    console.print(lldp_neighbor_table)
+    if sink is not None:
+        sink.write(
+            "lldp",
+            hostname_short,
+            {
+                "local_port": port_name_long,
+                "neighbor_device": my_neighbor_device,
+                "neighbor_port": my_neighbor_port_long,
+            },
+        )
+    else:
+        lldp_neighbor_table = Table()
+        lldp_neighbor_table.add_column(
+            "Hostname", justify="left", style="magenta", no_wrap=True, vertical="middle"
+        )
+        lldp_neighbor_table.add_column("Local Port", justify="center")
+        lldp_neighbor_table.add_column("LLDP Neighbor", justify="left")
+        lldp_neighbor_table.add_column("Remote Port", justify="center")
+        lldp_neighbor_table.add_row(
+            hostname_short, port_name_long, my_neighbor_device, my_neighbor_port_long
+        )
+        print(f"{hostname_short}# show lldp neighbors")
+        console.print(lldp_neighbor_table)
 
 print("\n**************************************************************************")
 show_switch_version()
@@ -270,4 +352,7 @@ if (
     interface_transceiver(port_name_long, dash2, dash3, dash4)
     mac_details(port_name)
 
+if sink is not None:
+    sink.close()
+
 netlib.cleanup_log_if_empty(logger_full_path)
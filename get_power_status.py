@@ -16,6 +16,7 @@ try:
     # importing libraries
     import argparse
     import os
+    import sys
 
     from rich.console import Console
     from rich.table import Table
@@ -28,14 +29,21 @@ except Exception as exception:
     print(exception)
 
 parser = argparse.ArgumentParser()
-parser.add_argument(
+switch_group = parser.add_mutually_exclusive_group(required=True)
+switch_group.add_argument(
     "-s",
     "--switch",
     type=str,
-    required=True,
     metavar="switch.hostname.com",
     help="Hostname of the switch",
 )
+switch_group.add_argument(
+    "-S",
+    "--switches",
+    type=str,
+    metavar="switches.txt",
+    help="A list of switch hostnames (FQDN) one per line for a fleet power audit",
+)
 parser.add_argument(
     "-o",
     "--output_directory",
@@ -45,29 +53,180 @@ parser.add_argument(
     metavar="some_folder",
     help="Folder for all outputs from the script",
 )
+parser.add_argument(
+    "-f",
+    "--output_format",
+    type=str,
+    required=False,
+    default="table",
+    choices=netlib.sinks.OUTPUT_FORMATS,
+    help="table renders on screen, the others write the results to a file",
+)
+parser.add_argument(
+    "-w",
+    "--workers",
+    type=int,
+    required=False,
+    default=32,
+    help="Number of switches audited at once with --switches",
+)
+netlib.inventory.add_inventory_arguments(parser)
 args = parser.parse_args()
 switch_hostname = args.switch
 output_dir = args.output_directory
 username, password = netlib.get_credentials("TACACS")
 
 # open a file for logging errors
-start_logger = netlib.setup_logging("port_data", output_dir)
+start_logger = netlib.setup_logging("get_power_status", output_dir)
 logger = start_logger[0]
 logger_full_path = start_logger[1]
 
+
+def audit_switch(switch_hostname):
+    eapi = netlib.AristaPyeapi(username, password, switch_hostname, logger)
+    return netlib.collectors.collect_power(eapi)
+
+
+def skip_switch(switch_hostname):
+    if sink is not None:
+        sink.write("unreachable", switch_hostname, {})
+    else:
+        failed_switches.append(switch_hostname)
+
+
+def fleet_power_audit(switch_list):
+    # every switch is asked once (one batched request) and only the PSUs that
+    # are not ok are kept, grouped by SNMP location to scope a power event, or
+    # written straight to the sink when there is one
+    degraded_by_location = {}
+    for switch_hostname, power_data in netlib.run_on_fleet(
+        switch_list, audit_switch, args.workers, logger
+    ):
+        if power_data is None:
+            skip_switch(switch_hostname)
+            continue
+        power_inventory = power_data["power_inventory"]
+        for power_supply, psu in power_data["power_supplies"].items():
+            if psu["state"] == "ok":
+                continue
+            degraded_psu = {
+                "hostname": power_data["hostname"],
+                "psu": power_supply,
+                "state": psu["state"],
+                "model": power_inventory.get(power_supply, {}).get("name"),
+                "serial_number": power_inventory.get(power_supply, {}).get("serialNum"),
+            }
+            if sink is not None:
+                sink.write(
+                    "degraded_psu",
+                    power_data["hostname"],
+                    {"location": power_data["location"], **degraded_psu},
+                )
+            else:
+                degraded_by_location.setdefault(power_data["location"], []).append(
+                    degraded_psu
+                )
+    return degraded_by_location
+
+
+if args.switches:
+    # streamed, the inventory is never held in full
+    switch_list = netlib.iter_reachable_hosts(
+        netlib.inventory.read_inventory(args.switches, args.filter, args.shard),
+        lambda unreachable: skip_switch(unreachable["host"]),
+    )
+    # None when rendering tables on screen
+    sink = netlib.open_sink(args.output_format, output_dir, "get_power_status")
+    failed_switches = []
+    print("Auditing power supplies.")
+    try:
+        degraded_by_location = fleet_power_audit(switch_list)
+    except KeyboardInterrupt:
+        print("Caught Keyboard Interrupt - Exiting the program.")
+        sys.exit()
+    finally:
+        if sink is not None:
+            sink.close()
+    # locations with the most affected switches first
+    locations = sorted(
+        degraded_by_location,
+        key=lambda location: -len(
+            {psu["hostname"] for psu in degraded_by_location[location]}
+        ),
+    )
+    if sink is None:
+        console = Console()
+        location_table = Table(title="Power supplies not ok, by SNMP location")
+        location_table.add_column("Location", justify="left", style="cyan")
+        location_table.add_column("Switches", justify="right")
+        location_table.add_column("PSUs", justify="right")
+        location_table.add_column("States", justify="left", style="red")
+        location_table.add_column("Hostnames", justify="left", style="magenta")
+        for location in locations:
+            degraded_psus = degraded_by_location[location]
+            hostnames = sorted({psu["hostname"] for psu in degraded_psus})
+            location_table.add_row(
+                location,
+                str(len(hostnames)),
+                str(len(degraded_psus)),
+                ", ".join(sorted({psu["state"] for psu in degraded_psus})),
+                ", ".join(hostnames),
+            )
+        if locations:
+            console.print(location_table)
+        else:
+            print("All power supplies are reporting ok.")
+        if failed_switches:
+            print(f"\nCould not audit {len(failed_switches)} switches:")
+            for failed_switch in sorted(failed_switches):
+                print(failed_switch)
+    netlib.cleanup_log_if_empty(logger_full_path)
+    sys.exit()
+
 # instantiate the eAPI library
 eapi = netlib.AristaPyeapi(username, password, switch_hostname, logger)
 
-show_version = eapi.get_version()
-power_status = eapi.try_eapi_command("show environment power", "enable", "text")
-power_status_json = eapi.get_power()
-get_hostname = eapi.get_hostname_short()
-get_power = eapi.get_inventory("power")
+# one batched request instead of a request per show command
+power_data = netlib.collectors.collect_power(eapi)
+if power_data is None:
+    print(f"Could not collect power data from {switch_hostname}.")
+    netlib.cleanup_log_if_empty(logger_full_path)
+    sys.exit(1)
+show_version = power_data["version"]
+power_status_json = power_data["power_supplies"]
+power_status = netlib.collectors.render_power_text(power_status_json)
+get_hostname = power_data["hostname"]
+get_power = power_data["power_inventory"]
+location = power_data["location"]
 
-if show_version["cli_commands"] == "old":
-    location = eapi.try_eapi_command("show snmp location", "enable")["location"]
-else:
-    location = eapi.try_eapi_command("show snmp v2-mib location", "enable")["location"]
+# None when rendering tables on screen
+sink = netlib.open_sink(args.output_format, output_dir, "get_power_status")
+if sink is not None:
+    with sink:
+        sink.write(
+            "version",
+            get_hostname,
+            {
+                "model": show_version["model"],
+                "hardware_rev": show_version["hardware_rev"],
+                "serial_number": show_version["serial_number"],
+                "eos_version": show_version["eos_version"],
+                "location": location,
+            },
+        )
+        for power_supply in power_status_json:
+            sink.write(
+                "psu",
+                get_hostname,
+                {
+                    "psu": power_supply,
+                    "state": power_status_json[power_supply]["state"],
+                    "model": get_power.get(power_supply, {}).get("name"),
+                    "serial_number": get_power.get(power_supply, {}).get("serialNum"),
+                },
+            )
+    netlib.cleanup_log_if_empty(logger_full_path)
+    sys.exit()
 
 try:
     pdu_table = Table()
@@ -17,6 +17,8 @@ try:
     import argparse
     import datetime
     import os
+    import sys
+    import time
     from datetime import timedelta
 
     from dateutil.relativedelta import relativedelta
@@ -31,14 +33,21 @@ except Exception as exception:
     print(exception)
 
 parser = argparse.ArgumentParser()
-parser.add_argument(
+switch_group = parser.add_mutually_exclusive_group(required=True)
+switch_group.add_argument(
     "-s",
     "--switch",
     type=str,
-    required=True,
     metavar="switch.hostname.com",
     help="Hostname of the switch",
 )
+switch_group.add_argument(
+    "-S",
+    "--switches",
+    type=str,
+    metavar="switches.txt",
+    help="A list of switch hostnames (FQDN) one per line for a fleet reload timeline",
+)
 parser.add_argument(
     "-o",
     "--output_directory",
@@ -48,24 +57,160 @@ parser.add_argument(
     metavar="some_folder",
     help="Folder for all outputs from the script",
 )
+parser.add_argument(
+    "-f",
+    "--output_format",
+    type=str,
+    required=False,
+    default="table",
+    choices=netlib.sinks.OUTPUT_FORMATS,
+    help="table renders on screen, the others write the fleet results to a file",
+)
+parser.add_argument(
+    "-w",
+    "--workers",
+    type=int,
+    required=False,
+    default=32,
+    help="Number of switches checked at once with --switches",
+)
+parser.add_argument(
+    "--hours",
+    type=float,
+    required=False,
+    default=24,
+    help="Only report reloads from the last N hours with --switches",
+)
+parser.add_argument(
+    "--gap",
+    type=float,
+    required=False,
+    default=5,
+    help="Minutes between reloads that still count as the same event",
+)
+netlib.inventory.add_inventory_arguments(parser)
 args = parser.parse_args()
 switch_hostname = args.switch
 output_dir = args.output_directory
 username, password = netlib.get_credentials("TACACS")
 
 # open a file for logging errors
-start_logger = netlib.setup_logging("port_data", output_dir)
+start_logger = netlib.setup_logging("get_reload_cause", output_dir)
 logger = start_logger[0]
 logger_full_path = start_logger[1]
 
-ping_results = netlib.util.check_ping(switch_hostname)
+
+def utc(timestamp, time_format="%Y-%m-%d %H:%M"):
+    return datetime.datetime.utcfromtimestamp(timestamp).strftime(time_format)
+
+
+def reload_switch(switch_hostname):
+    eapi = netlib.AristaPyeapi(username, password, switch_hostname, logger)
+    reload_data = netlib.collectors.collect_reload_cause(eapi)
+    if reload_data is None:
+        return None
+    uptime = reload_data["version"]["uptime"]
+    switch_reload = {
+        "hostname": reload_data["hostname"],
+        "uptime": uptime,
+        "boot_time": time.time() - uptime,
+        "recommendation": None,
+        "debug_file": None,
+    }
+    if reload_data["reset_causes"]:
+        reset_cause = reload_data["reset_causes"][0]
+        switch_reload["reason"] = reset_cause["description"]
+        switch_reload["timestamp"] = reset_cause["timestamp"]
+        switch_reload["recommendation"] = reset_cause.get("recommendedAction")
+        if "debugInfo" in reset_cause:
+            switch_reload["debug_file"] = netlib.collectors.write_reload_debug(
+                output_dir, reload_data["hostname"], reset_cause
+            )
+    else:
+        # no reset cause recorded, the boot time is still worth clustering
+        switch_reload["reason"] = "No information available"
+        switch_reload["timestamp"] = switch_reload["boot_time"]
+    return switch_reload
+
+
+def skip_switch(switch_hostname):
+    failed_switches.append(switch_hostname)
+    if sink is not None:
+        sink.write("unreachable", switch_hostname, {})
+
+
+def fleet_reload_timeline(switch_list):
+    # each recent reload goes to the sink as it is found, only its timestamp
+    # and reason are kept for the clustering
+    timestamps = []
+    reasons = []
+    since = time.time() - args.hours * 3600
+    for switch_hostname, switch_reload in netlib.run_on_fleet(
+        switch_list, reload_switch, args.workers, logger
+    ):
+        if switch_reload is None:
+            skip_switch(switch_hostname)
+        elif switch_reload["timestamp"] >= since:
+            timestamps.append(switch_reload["timestamp"])
+            reasons.append(switch_reload["reason"])
+            if sink is not None:
+                sink.write("reload", switch_reload["hostname"], switch_reload)
+    events = netlib.timeline.summarize_clusters(timestamps, reasons, args.gap * 60)
+    return len(timestamps), events
+
+
+if args.switches:
+    # streamed, the inventory is never held in full
+    switch_list = netlib.iter_reachable_hosts(
+        netlib.inventory.read_inventory(args.switches, args.filter, args.shard),
+        lambda unreachable: skip_switch(unreachable["host"]),
+    )
+    sink = netlib.open_sink(args.output_format, output_dir, "get_reload_cause")
+    failed_switches = []
+    print("Collecting reload causes.")
+    try:
+        reload_count, events = fleet_reload_timeline(switch_list)
+    except KeyboardInterrupt:
+        print("Caught Keyboard Interrupt - Exiting the program.")
+        if sink is not None:
+            sink.close()
+        sys.exit()
+    print(
+        f"{reload_count} switches reloaded in the last {args.hours:g} hours, "
+        f"{len(failed_switches)} could not be checked."
+    )
+    for event in events:
+        end_format = (
+            "%H:%M"
+            if utc(event["start"], "%Y-%m-%d") == utc(event["end"], "%Y-%m-%d")
+            else "%Y-%m-%d %H:%M"
+        )
+        print(
+            f"{event['count']} switches, {event['label']}, "
+            f"{utc(event['start'])}\u2013{utc(event['end'], end_format)} UTC"
+        )
+    if sink is not None:
+        with sink:
+            for event in events:
+                sink.write("reload_event", None, event)
+    netlib.cleanup_log_if_empty(logger_full_path)
+    sys.exit()
+
+# probe the eAPI port instead of shelling out to ping, unreachable boxes are
+# reported right away instead of waiting on the eAPI connection timeout
+ping_results = netlib.probe_hosts([switch_hostname])[0]["loss"]
 
 if ping_results < 10:
     # instantiate the eAPI library
     eapi = netlib.AristaPyeapi(username, password, switch_hostname, logger)
 
-    show_version = eapi.get_version()
-    reload_cause = eapi.get_reload_cause()
+    reload_data = netlib.collectors.collect_reload_cause(eapi)
+    if reload_data is None:
+        print(f"Could not collect the reload cause from {switch_hostname}.")
+        netlib.cleanup_log_if_empty(logger_full_path)
+        sys.exit(1)
+    show_version = reload_data["version"]
+    reload_cause = {"resetCauses": reload_data["reset_causes"]}
     if reload_cause["resetCauses"]:
         reload_reason = reload_cause["resetCauses"][0]["description"]
         reload_timestamp = str(
@@ -133,15 +278,18 @@ if ping_results < 10:
             "minutes",
         )
         if "debugInfo" in reload_cause["resetCauses"][0]:
-            print("Debug Information will be written to debug.txt file.")
-            with open("debug.txt", "w") as file:
-                for each_line in reload_cause["resetCauses"][0]["debugInfo"]:
-                    file.write("%s\n" % each_line)
+            debug_filename = netlib.collectors.write_reload_debug(
+                output_dir, reload_data["hostname"], reload_cause["resetCauses"][0]
+            )
+            print(f"Debug Information written to {debug_filename}")
         else:
             print("No debug information available")
     else:
         print("No information available about reload.")
 elif ping_results >= 10:
-    print(f"{switch_hostname} is not pinging, please check console and inspect device.")
+    print(
+        f"{switch_hostname} is not reachable on the eAPI port "
+        f"({ping_results}% loss), please check console and inspect device."
+    )
 
 netlib.cleanup_log_if_empty(logger_full_path)
@@ -27,14 +27,21 @@ except Exception as exception:
     print(exception)
 
 parser = argparse.ArgumentParser()
-parser.add_argument(
+switch_group = parser.add_mutually_exclusive_group(required=True)
+switch_group.add_argument(
     "-s",
     "--switch",
     type=str,
-    required=True,
     metavar="switch.hostname.com",
     help="Hostname of the switch",
 )
+switch_group.add_argument(
+    "-S",
+    "--switches",
+    type=str,
+    metavar="switches.txt",
+    help="A list of switch hostnames (FQDN) one per line",
+)
 parser.add_argument(
     "-o",
     "--output_directory",
@@ -44,8 +51,21 @@ parser.add_argument(
     metavar="some_folder",
     help="Folder for all outputs from the script",
 )
+parser.add_argument(
+    "-w",
+    "--workers",
+    type=int,
+    required=False,
+    default=32,
+    help="Number of switches checked at once",
+)
+parser.add_argument(
+    "--resume",
+    action="store_true",
+    help="Skip the switches finished by the previous, interrupted run",
+)
+netlib.inventory.add_inventory_arguments(parser)
 args = parser.parse_args()
-switch_hostname = args.switch
 output_dir = args.output_directory
 # check for environment variables for TACACS username & password, prompt if missing
 username, password = netlib.get_credentials("TACACS")
@@ -55,66 +75,61 @@ start_logger = netlib.setup_logging("get_upgrade_checks", output_dir)
 logger = start_logger[0]
 logger_full_path = start_logger[1]
 
-# instantiate the eAPI library
-eapi = netlib.AristaPyeapi(username, password, switch_hostname, logger)
 logs_time_stamp = datetime.now().strftime("%Y-%m-%d_%H:%M:%S")
 
-try:
-    switch_hostname_short = eapi.get_hostname_short()
-    show_command_array = [
-        "show ip route vrf all",
-        "show ipv6 route vrf all",
-        "show ip route summary",
-        "show ipv6 route summary",
-        "show ip bgp summary vrf all",
-        "show ipv6 bgp summary vrf all",
-        "show ip ospf neighbor",
-        "show ipv6 ospf neighbor",
-        "show ospfv3 neighbor",
-        "show interfaces status",
-        "show interfaces counters errors",
-        "show interfaces counters discards",
-        "show interfaces transceiver",
-        "show port-channel summary",
-        "show lldp neighbors",
-        "show mlag detail",
-        "show mlag interfaces",
-        "show ip arp",
-        "show inventory",
-        "show version",
-        "show extensions",
-        "show boot-extensions",
-    ]
 
-    show_version = eapi.get_version()
-    switch_eos_version = show_version["eos_version"]
-    switch_model = show_version["model"]
-    if ("DCS-750" in switch_model) or ("DCS-780" in switch_model):
-        show_command_array.insert(8, "show module")
-    filename = (
-        f"{output_dir}/{switch_hostname_short}_{switch_eos_version}_"
-        f"{logs_time_stamp}_upgrade_checks.txt"
+def upgrade_checks(switch_hostname):
+    # instantiate the eAPI library
+    eapi = netlib.AristaPyeapi(username, password, switch_hostname, logger)
+    if args.switch:
+        print(f"Grabbing the upgrade check outputs from {switch_hostname}")
+    return netlib.collectors.write_upgrade_checks(
+        output_dir, netlib.collectors.collect_upgrade_checks(eapi), logs_time_stamp
     )
 
-    for show_command in show_command_array:
-        print(f"Grabbing outputs for [{show_command}]")
-        command_output = eapi.try_eapi_command(show_command, "enable", "text")
-        with open(filename, "a+") as my_file:
-            my_file.write(
-                "\n##############################################################\n"
-            )
-            my_file.write(f"{switch_hostname_short}# {show_command}")
-            my_file.write(
-                "\n##############################################################\n\n"
-            )
-            if command_output is None:
-                my_file.write("Command returned no data.\n")
-            else:
-                my_file.write(command_output)
-    print(f"Finished outputing all commands to {filename}")
 
+if args.switches:
+    # streamed, the inventory is never held in full
+    switch_list = netlib.inventory.read_inventory(
+        args.switches, args.filter, args.shard
+    )
+else:
+    switch_list = [args.switch.strip()]
+
+# every finished switch is journaled with its output file, --resume skips the
+# ones already done by an interrupted run
+journal = netlib.checkpoint.CheckpointJournal(
+    netlib.checkpoint.journal_path(output_dir, "get_upgrade_checks"),
+    resume=args.resume,
+)
+if args.resume:
+    completed_switches = journal.completed()
+    switch_list = (switch for switch in switch_list if switch not in completed_switches)
+    print(f"Resuming, {len(completed_switches)} switches were already checked.")
+failed_switches = []
+
+try:
+    for switch_hostname, filename in netlib.run_on_fleet(
+        netlib.iter_reachable_hosts(
+            switch_list,
+            lambda unreachable: failed_switches.append(unreachable["host"]),
+        ),
+        upgrade_checks,
+        args.workers,
+        logger,
+    ):
+        if filename is None:
+            failed_switches.append(switch_hostname)
+            continue
+        journal.record(switch_hostname, filename)
+        print(f"Finished outputing all commands to {filename}")
 except KeyboardInterrupt:
     print("Caught Keyboard Interrupt - Exiting the program.")
     sys.exit()
 
+if failed_switches:
+    print(f"\nCould not check {len(failed_switches)} switches:")
+    for failed_switch in sorted(failed_switches):
+        print(failed_switch)
+
 netlib.cleanup_log_if_empty(logger_full_path)
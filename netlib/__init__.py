@@ -1,2 +1,24 @@
+from netlib import (
+    anomaly,
+    capacity,
+    checkpoint,
+    collectors,
+    counter_store,
+    counters,
+    distributed,
+    flaps,
+    fpga,
+    inventory,
+    lag,
+    locator,
+    mlag,
+    optics,
+    ranking,
+    scheduler,
+    timeline,
+)
 from netlib.arista_pyeapi import AristaPyeapi
+from netlib.fleet import analyze_on_pool, run_on_fleet
+from netlib.reachability import iter_reachable_hosts, probe_hosts, reachable_hosts
+from netlib.sinks import open_sink
 from netlib.util import cleanup_log_if_empty, get_credentials, setup_logging
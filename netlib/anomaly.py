@@ -0,0 +1,180 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Per-interface error and discard rate baselines. Every (switch, interface)
+# is one row of a set of NumPy arrays holding its last counters and the EWMA
+# mean and variance of its rates, so a batch of samples from many switches is
+# scored and folded into the baselines with a handful of array operations.
+# A port with a steady trickle of errors keeps a low score, a port that starts
+# bursting scores high until its baseline catches up.
+
+try:
+    # importing libraries
+    import numpy as np
+except ImportError as error:
+    print(error)
+    quit()
+except Exception as exception:
+    print(exception)
+
+# the columns of the rate arrays: all error counters summed, then all discard
+# counters summed, per second
+ANOMALY_RATES = ["errors", "discards"]
+
+
+def _totals(counter_rows, interfaces):
+    # one summed counter per interface, in the order of interfaces
+    return np.fromiter(
+        (sum(counter_rows.get(interface, ())) for interface in interfaces),
+        dtype="i8",
+        count=len(interfaces),
+    )
+
+
+class AnomalyScorer:
+    # Usage example:
+    # scorer = AnomalyScorer(alpha=0.1, threshold=3.0)
+    # anomalies = scorer.update([[hostname_short, time.time(), error_rows,
+    #                             discard_rows], ...])
+    # each anomaly is [switch, interface, "errors", 12.5, 0.02, 41.3]
+    def __init__(self, alpha=0.1, threshold=3.0, warmup=5, min_std=0.01):
+        # alpha is the EWMA weight of a new rate, warmup the number of rates
+        # seen before a port can be reported, min_std (per second) keeps a port
+        # that never had errors from scoring infinite on its first one
+        self.alpha = alpha
+        self.threshold = threshold
+        self.warmup = warmup
+        self.min_std = min_std
+        self.index = {}
+        self.keys = []
+        self.switch_rows = {}
+        self.last_values = np.zeros((0, len(ANOMALY_RATES)), dtype="i8")
+        self.last_time = np.zeros(0, dtype="f8")
+        self.mean = np.zeros((0, len(ANOMALY_RATES)), dtype="f8")
+        self.var = np.zeros((0, len(ANOMALY_RATES)), dtype="f8")
+        self.samples = np.zeros(0, dtype="i4")
+
+    def _grow(self, count):
+        # the arrays double when full, so new ports cost an amortized copy
+        needed = len(self.keys) + count
+        if needed <= len(self.last_time):
+            return
+        extra = max(64, 2 * needed) - len(self.last_time)
+        self.last_values = np.concatenate(
+            [self.last_values, np.zeros((extra, len(ANOMALY_RATES)), dtype="i8")]
+        )
+        self.last_time = np.concatenate([self.last_time, np.zeros(extra, dtype="f8")])
+        self.mean = np.concatenate(
+            [self.mean, np.zeros((extra, len(ANOMALY_RATES)), dtype="f8")]
+        )
+        self.var = np.concatenate(
+            [self.var, np.zeros((extra, len(ANOMALY_RATES)), dtype="f8")]
+        )
+        self.samples = np.concatenate([self.samples, np.zeros(extra, dtype="i4")])
+
+    def _rows(self, switch, interfaces):
+        # the row numbers of a switch are cached while its interface list stays
+        # the same, which is every poll but the first in practice
+        cached = self.switch_rows.get(switch)
+        if cached is not None and cached[0] == interfaces:
+            return cached[1]
+        new_keys = [
+            (switch, interface)
+            for interface in interfaces
+            if (switch, interface) not in self.index
+        ]
+        self._grow(len(new_keys))
+        for key in new_keys:
+            self.index[key] = len(self.keys)
+            self.keys.append(key)
+        rows = np.array(
+            [self.index[(switch, interface)] for interface in interfaces],
+            dtype=np.intp,
+        )
+        self.switch_rows[switch] = [interfaces, rows]
+        return rows
+
+    def update(self, samples):
+        # samples is a list of [switch, timestamp, error_rows, discard_rows],
+        # each switch at most once. Returns the anomalous ports of this batch
+        # as [switch, interface, "errors" or "discards", per second, baseline,
+        # score], highest score first.
+        row_parts = []
+        time_parts = []
+        value_parts = []
+        for switch, timestamp, error_rows, discard_rows in samples:
+            if not error_rows:
+                continue
+            interfaces = list(error_rows)
+            row_parts.append(self._rows(switch, interfaces))
+            time_parts.append(np.full(len(interfaces), timestamp, dtype="f8"))
+            value_parts.append(
+                np.column_stack(
+                    [
+                        _totals(error_rows, interfaces),
+                        _totals(discard_rows, interfaces),
+                    ]
+                )
+            )
+        if not row_parts:
+            return []
+        rows = np.concatenate(row_parts)
+        times = np.concatenate(time_parts)
+        values = np.concatenate(value_parts)
+
+        rates_seen = np.maximum(self.samples[rows] - 1, 0)
+        has_previous = (self.samples[rows] > 0)[:, None]
+        elapsed = np.maximum(times - self.last_time[rows], 1e-3)[:, None]
+        delta = values - self.last_values[rows]
+        # counters that went backwards were cleared, that sample counts as quiet
+        rates = np.where(has_previous & (delta > 0), delta / elapsed, 0.0)
+
+        mean = self.mean[rows]
+        var = self.var[rows]
+        scores = (rates - mean) / np.maximum(np.sqrt(var), self.min_std)
+        anomalous = (
+            (rates_seen >= self.warmup)[:, None]
+            & has_previous
+            & (rates > 0)
+            & (scores >= self.threshold)
+        )
+
+        # the first rate of a port seeds its baseline, later ones are blended in
+        difference = rates - mean
+        first_rate = (self.samples[rows] == 1)[:, None]
+        new_mean = np.where(first_rate, rates, mean + self.alpha * difference)
+        new_var = np.where(
+            first_rate, 0.0, (1 - self.alpha) * (var + self.alpha * difference**2)
+        )
+        self.mean[rows] = np.where(has_previous, new_mean, mean)
+        self.var[rows] = np.where(has_previous, new_var, var)
+        self.last_values[rows] = values
+        self.last_time[rows] = times
+        self.samples[rows] += 1
+
+        sample_index, rate_index = np.nonzero(anomalous)
+        order = np.argsort(-scores[sample_index, rate_index], kind="stable")
+        anomalies = []
+        for position in order:
+            sample = sample_index[position]
+            column = rate_index[position]
+            anomalies.append(
+                [
+                    self.keys[rows[sample]][0],
+                    self.keys[rows[sample]][1],
+                    ANOMALY_RATES[column],
+                    float(rates[sample, column]),
+                    float(mean[sample, column]),
+                    float(scores[sample, column]),
+                ]
+            )
+        return anomalies
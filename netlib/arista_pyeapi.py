@@ -21,6 +21,7 @@ try:
 
     import pyeapi
 
+    import netlib.capacity
     import netlib.util
 except ImportError as error:
     print(error)
@@ -29,6 +30,21 @@ except Exception as exception:
     print(exception)
 
 
+# printed between the outputs of peer_supervisor_commands
+PEER_MARKER = "===netlib-peer-command-"
+# peer_supervisor_commands stays under the EOS bash call limit however many
+# commands it is given; commands cut off by it come back as None
+PEER_SECONDS = 25
+
+
+def port_channel_name(port_channel):
+    # 10, "10" and "Port-Channel10" all name the same port-channel
+    port_channel = str(port_channel)
+    if port_channel.startswith("Port-Channel"):
+        return port_channel
+    return f"Port-Channel{port_channel}"
+
+
 class AristaPyeapi:
     def __init__(self, username, password, switch_hostname, logger=None, timeout=180):
         self.switch_hostname = switch_hostname.strip()
@@ -44,6 +60,9 @@ class AristaPyeapi:
             self.logger = netlib.util.setup_logging("generic_eapi")[0]
         else:
             self.logger = logger
+        # the CommandError of the last try_eapi_command call, None if it had
+        # none. Tells a command the switch rejected from a switch that failed
+        self.command_error = None
 
     def reset(self, username, password, switch_hostname, logger):
         self.__init__(username, password, switch_hostname, logger)
@@ -54,78 +73,166 @@ class AristaPyeapi:
         run_method="run_commands",
         encoding_type="json",
     ):
+        # structured fields for the log records, see netlib.util.setup_logging
+        log_fields = {"host": self.switch_hostname, "command": str(command)}
+        self.command_error = None
         try:
             pyeapi_log_level = pyeapi.eapilib._LOGGER.getEffectiveLevel()
             pyeapi.eapilib._LOGGER.setLevel(logging.CRITICAL)
-            # lower layer function, using enable or config mode is preferred
-            if run_method == "run_commands":
-                command_output = self.node.run_commands(command)[0]
-            # this one is best for getting show commands, use text encoding for getting
-            # back the same output as you'd see on the switch screen, default is json
-            # which will give you back the json formatted show values for better variable
-            # maninpulation with your scripts
-            elif run_method == "enable":
-                if encoding_type == "json":
-                    command_output = self.node.enable(command)[0]["result"]
-                elif encoding_type == "text":
-                    command_output = self.node.enable(command, encoding="text")[0][
-                        "result"
-                    ]["output"]
-            elif run_method == "config":
-                command_output = self.node.config(command)
-            elif run_method == "api":
-                command_output = eval(command)
-            return command_output
+            return self._run(command, run_method, encoding_type)
         except KeyboardInterrupt:
             print("Caught Keyboard Interrupt - Exiting the program.")
             sys.exit()
         except ImportError as import_error:
             print(f"Could not import module: {import_error}")
-            self.logger.warning(f"Import error: {import_error}")
+            self.logger.warning(f"Import error: {import_error}", extra=log_fields)
         except json.decoder.JSONDecodeError as json_error:
             print("Received unexpected JSON error, but non impacting. Continuing.")
         except KeyError as key_error:
             print(f"{self.switch_hostname} has a key error.")
             self.logger.warning(
-                f"Key error while running script against {self.switch_hostname}."
+                f"Key error while running script against {self.switch_hostname}.",
+                extra=log_fields,
             )
         except pyeapi.eapilib.CommandError as command_error:
+            self.command_error = command_error
             print(
                 f"Command error while executing [{command}] for {self.switch_hostname}:"
             )
             self.logger.warning(
-                f"Command error on {self.switch_hostname}: for [{command}]\n {str(command_error.command_error)}"
+                f"Command error on {self.switch_hostname}: for [{command}]\n "
+                f"{str(command_error.command_error)}",
+                extra=log_fields,
             )
         except pyeapi.eapilib.ConnectionError as conn_error:
             print(
-                f"########## WARNING ##########\nError connecting to the eAPI for {self.switch_hostname}:\n--{str(conn_error.message)}\n#############################"
+                "########## WARNING ##########\n"
+                f"Error connecting to the eAPI for {self.switch_hostname}:\n"
+                f"--{str(conn_error.message)}\n"
+                "#############################"
             )
             self.logger.warning(
-                f"Connection error on {self.switch_hostname}:\n--{str(conn_error.message)}"
+                f"Connection error on {self.switch_hostname}:\n"
+                f"--{str(conn_error.message)}",
+                extra=log_fields,
             )
             if "Name or service not known" in str(conn_error.message):
                 sys.exit(1)
         except TypeError as type_error:
             print(f"Ran into a Type error: {type_error}")
             self.logger.warning(
-                f"Type error while running scipt against {self.switch_hostname}."
+                f"Type error while running scipt against {self.switch_hostname}.",
+                extra=log_fields,
             )
         except Exception as exception:
             print(f"Hit some other exception: {exception}")
             self.logger.warning(
-                f"Hit another exception against {self.switch_hostname}.\n {str(exception)}"
+                f"Hit another exception against {self.switch_hostname}.\n "
+                f"{str(exception)}",
+                extra=log_fields,
             )
         finally:
             if pyeapi_log_level != pyeapi.eapilib._LOGGER.getEffectiveLevel():
                 pyeapi.eapilib._LOGGER.setLevel(pyeapi_log_level)
 
+    def _run(self, command, run_method, encoding_type):
+        # lower layer function, using enable or config mode is preferred
+        if run_method == "run_commands":
+            return self.node.run_commands(command)[0]
+        # this one is best for getting show commands, use text encoding for
+        # getting back the same output as you'd see on the switch screen,
+        # default is json which will give you back the json formatted show
+        # values for better variable maninpulation with your scripts
+        elif run_method == "enable":
+            if encoding_type == "json":
+                return self.node.enable(command)[0]["result"]
+            elif encoding_type == "text":
+                return self.node.enable(command, encoding="text")[0]["result"]["output"]
+        # several show commands in one eAPI request, returns a list with one
+        # result per command (the text output for text encoding)
+        elif run_method == "batch":
+            return [
+                response["result"]
+                if encoding_type == "json"
+                else response["result"]["output"]
+                for response in self.node.enable(
+                    command, encoding=encoding_type, strict=True
+                )
+            ]
+        elif run_method == "config":
+            return self.node.config(command)
+        elif run_method == "session":
+            return self._run_in_session(command)
+        # the undecoded reply body of several show commands, for when the
+        # JSON is parsed somewhere else, see _raw_reply
+        elif run_method == "raw":
+            return self._raw_reply(command)
+
+    def _run_in_session(self, commands):
+        # config commands in a named config session committed at the end of
+        # the same request, so they land in one transaction or not at all
+        session_name = f"netlib_{datetime.datetime.now().strftime('%Y%m%d%H%M%S%f')}"
+        try:
+            return self.node.run_commands(
+                [f"configure session {session_name}"] + list(commands) + ["commit"]
+            )[1:-1]
+        except pyeapi.eapilib.CommandError:
+            # nothing was committed, drop the half built session
+            self.node.run_commands([f"configure session {session_name}", "abort"])
+            raise
+
+    def _raw_reply(self, commands):
+        # pyeapi always runs json.loads on the reply in the calling thread.
+        # This posts the same request ("enable" first, like node.enable) and
+        # returns the body as it came off the wire, so the parsing can run on
+        # the process pool of netlib.fleet.analyze_on_pool instead of
+        # pickling the decoded reply over to it. Decode it with
+        # netlib.fleet.decode_reply
+        connection = self.node.connection
+        request = connection.request(["enable"] + list(commands), "json").encode()
+        transport = connection.transport
+        try:
+            transport.putrequest("POST", "/command-api")
+            transport.putheader("Content-type", "application/json-rpc")
+            transport.putheader("Content-length", str(len(request)))
+            if connection._auth:
+                transport.putheader(*connection._auth)
+            transport.endheaders(message_body=request)
+            response = transport.getresponse()
+            raw_reply = response.read()
+        except OSError as socket_error:
+            raise pyeapi.eapilib.ConnectionError(
+                str(connection), f"Socket error during eAPI connection: {socket_error}"
+            )
+        finally:
+            transport.close()
+        if response.status == 401:
+            raise pyeapi.eapilib.ConnectionError(
+                str(connection), f"{response.reason}. {raw_reply}"
+            )
+        return raw_reply
+
     def cleanup_config_sessions(self):
-        config_sessions = self.try_eapi_command(
+        # all removals go out in one request, returns how many sessions were
+        # removed (None if the sessions could not be read)
+        config_sessions = self.try_eapi_command("show configuration sessions", "enable")
+        if config_sessions is None:
+            return None
+        removal_commands = [
+            f"no configure session {session}" for session in config_sessions["sessions"]
+        ]
+        if not removal_commands:
+            return 0
+        if self.try_eapi_command(removal_commands, "batch") is not None:
+            return len(removal_commands)
+        # the switch stops at the first session it refuses to remove, count
+        # what the removals before it did
+        remaining_sessions = self.try_eapi_command(
             "show configuration sessions", "enable"
-        )["sessions"]
-        for session in config_sessions:
-            removal_command = f"no configure session {session}"
-            self.try_eapi_command(removal_command, "enable")
+        )
+        if remaining_sessions is None:
+            return None
+        return len(removal_commands) - len(remaining_sessions["sessions"])
 
     def copy_run_start(self):
         self.try_eapi_command("copy running-config startup-config", "enable")
@@ -146,6 +253,20 @@ class AristaPyeapi:
             get_file_date = get_file_date.strip()
         return get_file_date
 
+    def get_flash_files(self, patterns=None, hash_algorithm=None, timeout=None):
+        # size, mtime (and a hash if asked for) of every flash file matching
+        # the names or globs in patterns (every file by default), one request
+        # and one bash spawn
+        patterns = patterns or ["*"]
+        metadata_output = self.try_eapi_command(
+            netlib.capacity.file_metadata_command(patterns, hash_algorithm, timeout),
+            "enable",
+            "text",
+        )
+        if metadata_output is None:
+            return None
+        return netlib.capacity.parse_file_metadata(metadata_output)
+
     def get_flash_storage(self):
         get_flash_storage = self.try_eapi_command("dir flash:", "enable", "text")
         return get_flash_storage
@@ -319,7 +440,62 @@ class AristaPyeapi:
         )
         return run_peer_command
 
+    def peer_supervisor_commands(self, peer_commands, timeout=None):
+        # every command in one Cli process on the active supervisor, one eAPI
+        # request. An echoed marker before each command lets the combined
+        # output be split back up; returns one output per command (None for
+        # commands that did not get to run before the timeout)
+        timeout = min(timeout or 10 * len(peer_commands), PEER_SECONDS)
+        cli_lines = []
+        for index, peer_command in enumerate(peer_commands):
+            cli_lines.append(f"bash echo {PEER_MARKER}{index}")
+            cli_lines.append(f"session peer-supervisor {peer_command}")
+        quoted_lines = " ".join(
+            "'" + cli_line.replace("'", "'\\''") + "'" for cli_line in cli_lines
+        )
+        combined_output = self.try_eapi_command(
+            f"bash timeout {timeout} Cli -p15 -c \"$(printf '%s\\n' {quoted_lines})\"",
+            "enable",
+            "text",
+        )
+        if combined_output is None:
+            return None
+        peer_outputs = [None] * len(peer_commands)
+        marker_length = len(PEER_MARKER)
+        index = None
+        for output_line in combined_output.splitlines(keepends=True):
+            if output_line.startswith(PEER_MARKER):
+                index = int(output_line[marker_length:])
+                peer_outputs[index] = ""
+            elif index is not None:
+                peer_outputs[index] += output_line
+        return peer_outputs
+
     def set_lacp_timeout(self, port_channel, timeout_value):
-        set_command = f'self.node.api("interfaces").set_lacp_timeout("Port-Channel{port_channel}", {timeout_value})'
-        result = self.try_eapi_command(set_command, "api")
-        return result
+        return self.set_lacp_timeouts({port_channel: timeout_value})
+
+    def set_lacp_timeouts(self, lacp_timeouts):
+        # {port-channel number or name: LACP fallback timeout}, all of them in
+        # one config session (the same command pyeapi's set_lacp_timeout sends)
+        return self.configure_interfaces(
+            {
+                port_channel_name(port_channel): [
+                    f"port-channel lacp fallback timeout {timeout_value}"
+                ]
+                for port_channel, timeout_value in lacp_timeouts.items()
+            }
+        )
+
+    def configure_interfaces(self, interface_settings):
+        # {interface: [interface level config commands]} applied in a single
+        # config session with one commit, one request however many interfaces.
+        # Returns True once committed, None if anything was rejected (in which
+        # case the session is aborted and nothing changes)
+        session_commands = []
+        for interface, commands in interface_settings.items():
+            session_commands += [f"interface {interface}"] + list(commands) + ["exit"]
+        if not session_commands:
+            return True
+        if self.try_eapi_command(session_commands, "session") is None:
+            return None
+        return True
@@ -0,0 +1,235 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Parsers for the byte based (not -h) df/du/lsof outputs used by the flash and
+# overlay capacity scans, everything comes back as numeric records.
+
+try:
+    # importing libraries
+    import re
+    import shlex
+except ImportError as error:
+    print(error)
+    quit()
+except Exception as exception:
+    print(exception)
+
+FLASH_MOUNT = "/mnt/flash"
+OVERLAY_MOUNT = "/.overlay"
+
+# bash commands sent in the same eAPI request as show hostname
+DF_COMMAND = "bash timeout 5 sudo df -lP -B1"
+DU_COMMAND = (
+    f"bash timeout 15 sudo timeout 10 du -sxb {OVERLAY_MOUNT}/* 2>/dev/null | "
+    "sort -rn | head -20"
+)
+# -F gives one field per line (p=pid, c=command, f=fd, s=size, n=name) and +L1
+# keeps only files with no links left, i.e. deleted but still held open
+LSOF_COMMAND = "bash timeout 20 sudo lsof -nP +L1 -F pcfsn 2>/dev/null"
+
+
+def parse_df(df_output):
+    filesystems = []
+    for line in df_output.splitlines()[1:]:
+        fields = line.split()
+        if len(fields) < 6 or not fields[1].isdigit():
+            continue
+        size, used, available = int(fields[1]), int(fields[2]), int(fields[3])
+        filesystems.append(
+            {
+                "filesystem": fields[0],
+                "size": size,
+                "used": used,
+                "available": available,
+                "use_percent": round(100.0 * used / size, 1) if size else 0.0,
+                "mount": " ".join(fields[5:]),
+            }
+        )
+    return filesystems
+
+
+def parse_du(du_output):
+    consumers = []
+    for line in du_output.splitlines():
+        fields = line.split(None, 1)
+        if len(fields) == 2 and fields[0].isdigit():
+            consumers.append({"bytes": int(fields[0]), "path": fields[1]})
+    return consumers
+
+
+def parse_lsof_fields(lsof_output):
+    open_files = []
+    process = {}
+    open_file = None
+    for line in lsof_output.splitlines():
+        if not line:
+            continue
+        field, value = line[0], line[1:]
+        if field == "p":
+            process = {"pid": int(value) if value.isdigit() else value}
+        elif field == "c":
+            process["command"] = value
+        elif field == "f":
+            open_file = {
+                "pid": process.get("pid"),
+                "command": process.get("command"),
+                "fd": value,
+                "size": 0,
+                "name": None,
+            }
+            open_files.append(open_file)
+        elif field == "s" and open_file is not None:
+            open_file["size"] = int(value) if value.isdigit() else 0
+        elif field == "n" and open_file is not None:
+            open_file["name"] = value
+    return open_files
+
+
+def mount_usage(filesystems, mount):
+    for filesystem in filesystems:
+        if filesystem["mount"] == mount:
+            return filesystem
+    return None
+
+
+def format_bytes(size):
+    # byte counts stay exact in the records, this is only for the screen
+    for unit in ["B", "K", "M", "G"]:
+        if abs(size) < 1024:
+            return f"{size:.1f}{unit}" if unit != "B" else f"{size}{unit}"
+        size /= 1024.0
+    return f"{size:.1f}T"
+
+
+def utilization(capacity_data):
+    # the fuller of flash and overlay, what decides whether an upgrade fits
+    return max(
+        (capacity_data[mount]["use_percent"] if capacity_data[mount] else 0.0)
+        for mount in ["flash", "overlay"]
+    )
+
+
+# The listing commands below sort and cut on the switch, so only the top
+# entries plus a "total <count> <bytes>" line cross eAPI however big the
+# overlay or the leak is. Only the walk runs under the coreutils timeout, the
+# outer bash timeout gives sort and awk SORT_SECONDS more, so a killed walk
+# still returns the largest entries it had seen.
+SORT_SECONDS = 5
+
+
+def _bounded_walk(walk_command, timeout):
+    return (
+        f"bash timeout {int(timeout) + SORT_SECONDS} sudo timeout {int(timeout)} "
+        f"{walk_command} 2>/dev/null"
+    )
+
+
+def _top_and_total(top):
+    return (
+        f"sort -rn | awk -v top={int(top)} 'NR <= top {{print}} "
+        '{count++; total += $1} END {print "total", count + 0, total + 0}\''
+    )
+
+
+def overlay_files_command(top=50, timeout=20):
+    # "<bytes> <path>" for the largest files under the overlay
+    find_command = f"find {OVERLAY_MOUNT} -xdev -type f -printf '%s %p\\n'"
+    return f"{_bounded_walk(find_command, timeout)} | {_top_and_total(top)}"
+
+
+def deleted_files_command(top=50, timeout=20):
+    # "<bytes> <pid> <command> <path>" for the largest deleted but open files
+    return (
+        f"{_bounded_walk('lsof -nP +L1 -F pcfsn', timeout)} | awk "
+        "'/^p/ {pid = substr($0, 2)} /^c/ {command = substr($0, 2)} "
+        "/^f/ {size = 0} /^s/ {size = substr($0, 2)} "
+        "/^n/ {print size + 0, pid, command, substr($0, 2)}' | "
+        f"{_top_and_total(top)}"
+    )
+
+
+def overlay_du_command(top=50, timeout=20):
+    du_command = f"du -sxb {OVERLAY_MOUNT}/*"
+    return f"{_bounded_walk(du_command, timeout)} | {_top_and_total(top)}"
+
+
+def parse_top_output(top_output):
+    # returns the listed lines and the (count, bytes) totals of everything
+    # that was walked on the switch
+    lines = []
+    totals = [0, 0]
+    for line in top_output.splitlines():
+        if line.startswith("total "):
+            fields = line.split()
+            totals = [int(fields[1]), int(fields[2])]
+        elif line:
+            lines.append(line)
+    return lines, totals
+
+
+# file_metadata_command budgets, stat then hash, which together stay under the
+# EOS bash call limit like the walk plus SORT_SECONDS of the listing commands.
+# Hashing images takes a few seconds each, most of the budget goes there
+STAT_SECONDS = 5
+HASH_SECONDS = 20
+
+# hashes follow the stat lines after this marker in file_metadata_command
+HASH_MARKER = "===netlib-file-hashes==="
+HASH_ALGORITHMS = ["md5", "sha1", "sha256"]
+
+
+def _flash_pattern(pattern):
+    # plain names and globs are left for bash to expand, anything with other
+    # characters is quoted and taken literally
+    if re.fullmatch(r"[\w.*?\[\]/+-]+", pattern):
+        return pattern
+    return shlex.quote(pattern)
+
+
+def file_metadata_command(patterns, hash_algorithm=None, timeout=None):
+    # "<bytes>|<mtime>|<name>" for every file matching patterns (names or
+    # globs relative to flash), plus "<hash>  <name>" lines when asked for,
+    # all from one bash spawn. timeout is the budget of the hash step, capped
+    # at HASH_SECONDS; a killed hash step still returns the files it got to.
+    hash_timeout = min(timeout or HASH_SECONDS, HASH_SECONDS)
+    flash_patterns = " ".join(_flash_pattern(pattern) for pattern in patterns)
+    metadata_command = (
+        f"bash cd {FLASH_MOUNT} && timeout {STAT_SECONDS} "
+        f"sudo stat -c '%s|%Y|%n' -- {flash_patterns} 2>/dev/null"
+    )
+    if hash_algorithm:
+        if hash_algorithm not in HASH_ALGORITHMS:
+            raise ValueError(f"hash_algorithm must be one of {HASH_ALGORITHMS}")
+        metadata_command += (
+            f"; echo {HASH_MARKER}; timeout {int(hash_timeout)} "
+            f"sudo {hash_algorithm}sum -- {flash_patterns} 2>/dev/null"
+        )
+    return metadata_command
+
+
+def parse_file_metadata(metadata_output):
+    # one {"name", "size", "mtime"(, "hash")} record per file, by name
+    files = {}
+    stat_output, _, hash_output = metadata_output.partition(HASH_MARKER)
+    for line in stat_output.splitlines():
+        fields = line.split("|", 2)
+        if len(fields) == 3 and fields[0].isdigit():
+            files[fields[2]] = {
+                "name": fields[2],
+                "size": int(fields[0]),
+                "mtime": int(fields[1]),
+            }
+    for line in hash_output.splitlines():
+        fields = line.split(None, 1)
+        if len(fields) == 2 and fields[1] in files:
+            files[fields[1]]["hash"] = fields[0]
+    return sorted(files.values(), key=lambda flash_file: flash_file["name"])
@@ -0,0 +1,99 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Checkpoint journal for resumable fleet runs. Every finished host is one JSON
+# line ({"host", "result", "time"}) appended with a single write under an
+# exclusive lock and fsync'ed, so the journal survives Ctrl-C, a crash or a
+# reboot of the jump host, and two writers (threads or processes) never
+# interleave their lines. A torn last line from a crash is ignored when read.
+
+try:
+    # importing libraries
+    import fcntl
+    import json
+    import os
+    import threading
+    import time
+except ImportError as error:
+    print(error)
+    quit()
+except Exception as exception:
+    print(exception)
+
+
+def journal_path(output_dir, script_function):
+    return f"{output_dir}/{script_function}_checkpoint.jsonl"
+
+
+class CheckpointJournal:
+    # Usage example:
+    # journal = CheckpointJournal(journal_path(output_dir, "get_upgrade_checks"),
+    #                             resume=args.resume)
+    # switch_list = [switch for switch in switch_list
+    #                if switch not in journal.completed()]
+    # journal.record(switch_hostname, filename)
+    def __init__(self, journal_file, resume=False):
+        # without resume the previous run's journal is discarded and the run
+        # starts from the first host
+        self.journal_file = journal_file
+        self.lock = threading.Lock()
+        if not resume and os.path.exists(journal_file):
+            os.remove(journal_file)
+        self._terminate_torn_line()
+
+    def _terminate_torn_line(self):
+        # a line cut short by a crash would swallow the next entry, close it
+        if not os.path.exists(self.journal_file):
+            return
+        with open(self.journal_file, "rb+") as my_file:
+            my_file.seek(0, os.SEEK_END)
+            if my_file.tell() == 0:
+                return
+            my_file.seek(-1, os.SEEK_END)
+            if my_file.read(1) != b"\n":
+                my_file.write(b"\n")
+
+    def completed(self):
+        # {host: entry} of every host recorded so far
+        completed_hosts = {}
+        if not os.path.exists(self.journal_file):
+            return completed_hosts
+        with open(self.journal_file) as my_file:
+            for line in my_file:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                completed_hosts[entry["host"]] = entry
+        return completed_hosts
+
+    def record_many(self, hosts, result=None):
+        # one append and one fsync for the whole list of hosts
+        if not hosts:
+            return
+        now = time.time()
+        lines = "".join(
+            json.dumps({"host": host, "result": result, "time": now}) + "\n"
+            for host in hosts
+        )
+        with self.lock:
+            with open(self.journal_file, "a") as my_file:
+                fcntl.flock(my_file, fcntl.LOCK_EX)
+                try:
+                    my_file.write(lines)
+                    my_file.flush()
+                    os.fsync(my_file.fileno())
+                finally:
+                    fcntl.flock(my_file, fcntl.LOCK_UN)
+
+    def record(self, host, result=None):
+        self.record_many([host], result)
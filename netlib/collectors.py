@@ -0,0 +1,398 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Per switch collectors shared by the single switch scripts and the fleet
+# modes. Each one takes an AristaPyeapi instance, makes as few eAPI requests as
+# possible (batched) and returns plain dicts, or None if the switch failed.
+
+try:
+    # importing libraries
+    import re
+    import time
+
+    import netlib.capacity
+    import netlib.counters
+    import netlib.fpga
+    import netlib.locator
+except ImportError as error:
+    print(error)
+    quit()
+except Exception as exception:
+    print(exception)
+
+
+def version_dict(show_version):
+    # same keys as AristaPyeapi.get_version, from an already fetched result
+    if show_version["version"].startswith(("4.19", "4.20")) is True:
+        switch_cli_commands = "old"
+    else:
+        switch_cli_commands = "new"
+    return {
+        "eos_version": show_version["version"],
+        "hardware_rev": show_version["hardwareRevision"],
+        "model": show_version["modelName"],
+        "serial_number": show_version["serialNumber"],
+        "system_mac": show_version["systemMacAddress"],
+        "uptime": show_version["uptime"],
+        "cli_commands": switch_cli_commands,
+    }
+
+
+def collect_power(eapi):
+    power_commands = [
+        "show version",
+        "show hostname",
+        "show environment power",
+        "show inventory",
+        "show snmp v2-mib location",
+    ]
+    power_results = eapi.try_eapi_command(power_commands, "batch")
+    if power_results is None and eapi.command_error is not None:
+        # 4.19/4.20 only know the old location command, a second round trip
+        # for those is cheaper than asking every switch for its version first.
+        # Connection errors and timeouts are not retried
+        power_commands[-1] = "show snmp location"
+        power_results = eapi.try_eapi_command(power_commands, "batch")
+    if power_results is None:
+        return None
+    return {
+        "version": version_dict(power_results[0]),
+        "hostname": power_results[1]["hostname"],
+        "power_supplies": power_results[2]["powerSupplies"],
+        "power_inventory": power_results[3]["powerSupplySlots"],
+        "location": power_results[4]["location"],
+    }
+
+
+def _power_state_text(state):
+    # powerLoss -> Power Loss, ok -> Ok
+    return re.sub(r"(?<!^)([A-Z])", r" \1", state).title()
+
+
+def render_power_text(power_supplies):
+    # rebuilds the "show environment power" screen output from its JSON, so
+    # the text does not need a second request
+    lines = [
+        "Power                                  Input    Output     Output",
+        "Supply Model            Capacity       Current  Current    Power    Status",
+        "------ ---------------- -------------- -------- "
+        "---------- -------- ------------",
+    ]
+    for power_supply in sorted(power_supplies, key=lambda psu: (len(psu), psu)):
+        psu = power_supplies[power_supply]
+        capacity = f"{psu.get('capacity', 0):.0f}W"
+        input_current = f"{psu.get('inputCurrent', 0.0):.2f}A"
+        output_current = f"{psu.get('outputCurrent', 0.0):.2f}A"
+        output_power = f"{psu.get('outputPower', 0.0):.1f}W"
+        lines.append(
+            f"{power_supply:<6} {psu.get('modelName', ''):<16} {capacity:<14} "
+            f"{input_current:<8} {output_current:<10} {output_power:<8} "
+            f"{_power_state_text(psu.get('state', 'unknown'))}"
+        )
+    return "\n".join(lines) + "\n"
+
+
+def collect_reload_cause(eapi):
+    reload_results = eapi.try_eapi_command(
+        ["show version", "show hostname", "show reload cause"], "batch"
+    )
+    if reload_results is None:
+        return None
+    return {
+        "version": version_dict(reload_results[0]),
+        "hostname": reload_results[1]["hostname"],
+        "reset_causes": reload_results[2]["resetCauses"],
+    }
+
+
+def write_reload_debug(output_dir, hostname, reset_cause):
+    # one file per switch and reload, so fleet runs and repeated runs never
+    # overwrite each other's debug information
+    debug_filename = (
+        f"{output_dir}/{hostname}_reload_debug_{int(reset_cause['timestamp'])}.txt"
+    )
+    with open(debug_filename, "w") as file:
+        for each_line in reset_cause["debugInfo"]:
+            file.write("%s\n" % each_line)
+    return debug_filename
+
+
+# pre and post upgrade snapshot, "show module" is added for modular chassis
+UPGRADE_CHECK_COMMANDS = [
+    "show ip route vrf all",
+    "show ipv6 route vrf all",
+    "show ip route summary",
+    "show ipv6 route summary",
+    "show ip bgp summary vrf all",
+    "show ipv6 bgp summary vrf all",
+    "show ip ospf neighbor",
+    "show ipv6 ospf neighbor",
+    "show ospfv3 neighbor",
+    "show interfaces status",
+    "show interfaces counters errors",
+    "show interfaces counters discards",
+    "show interfaces transceiver",
+    "show port-channel summary",
+    "show lldp neighbors",
+    "show mlag detail",
+    "show mlag interfaces",
+    "show ip arp",
+    "show inventory",
+    "show version",
+    "show extensions",
+    "show boot-extensions",
+]
+
+
+def collect_upgrade_checks(eapi):
+    # one text request per command, so a command the platform does not know
+    # only loses its own output
+    show_version = eapi.get_version()
+    upgrade_commands = list(UPGRADE_CHECK_COMMANDS)
+    if ("DCS-750" in show_version["model"]) or ("DCS-780" in show_version["model"]):
+        upgrade_commands.insert(8, "show module")
+    return {
+        "hostname": eapi.get_hostname_short(),
+        "eos_version": show_version["eos_version"],
+        "outputs": [
+            [upgrade_command, eapi.try_eapi_command(upgrade_command, "enable", "text")]
+            for upgrade_command in upgrade_commands
+        ],
+    }
+
+
+def write_upgrade_checks(output_dir, upgrade_checks, time_stamp):
+    filename = (
+        f"{output_dir}/{upgrade_checks['hostname']}_{upgrade_checks['eos_version']}_"
+        f"{time_stamp}_upgrade_checks.txt"
+    )
+    with open(filename, "a+") as my_file:
+        for upgrade_command, command_output in upgrade_checks["outputs"]:
+            my_file.write(
+                "\n##############################################################\n"
+            )
+            my_file.write(f"{upgrade_checks['hostname']}# {upgrade_command}")
+            my_file.write(
+                "\n##############################################################\n\n"
+            )
+            if command_output is None:
+                my_file.write("Command returned no data.\n")
+            else:
+                my_file.write(command_output)
+    return filename
+
+
+def collect_capacity(eapi, file_patterns=None, hash_algorithm=None):
+    capacity_commands = [
+        "show hostname",
+        netlib.capacity.DF_COMMAND,
+        netlib.capacity.DU_COMMAND,
+        netlib.capacity.LSOF_COMMAND,
+    ]
+    if file_patterns:
+        # the flash file audit rides along in the same request
+        capacity_commands.append(
+            netlib.capacity.file_metadata_command(file_patterns, hash_algorithm)
+        )
+    capacity_results = eapi.try_eapi_command(capacity_commands, "batch")
+    if capacity_results is None:
+        return None
+    # bash output comes back as a list of messages in the JSON encoding
+    df_output, du_output, lsof_output, *metadata_output = [
+        "".join(bash_result.get("messages", [])) for bash_result in capacity_results[1:]
+    ]
+    filesystems = netlib.capacity.parse_df(df_output)
+    deleted_open_files = netlib.capacity.parse_lsof_fields(lsof_output)
+    deleted_open_files.sort(key=lambda open_file: -open_file["size"])
+    return {
+        "hostname": capacity_results[0]["hostname"],
+        "filesystems": filesystems,
+        "flash": netlib.capacity.mount_usage(filesystems, netlib.capacity.FLASH_MOUNT),
+        "overlay": netlib.capacity.mount_usage(
+            filesystems, netlib.capacity.OVERLAY_MOUNT
+        ),
+        "overlay_consumers": netlib.capacity.parse_du(du_output),
+        "deleted_open_files": deleted_open_files,
+        "deleted_open_bytes": sum(
+            open_file["size"] for open_file in deleted_open_files
+        ),
+        "flash_files": netlib.capacity.parse_file_metadata("".join(metadata_output)),
+    }
+
+
+def collect_fpga_errors(eapi):
+    fpga_results = eapi.try_eapi_command(
+        ["show version", "show hostname", "show hardware fpga error"], "batch"
+    )
+    if fpga_results is None:
+        return None
+    return {
+        "version": version_dict(fpga_results[0]),
+        "boot_time": netlib.fpga.boot_time(fpga_results[0]),
+        "hostname": fpga_results[1]["hostname"],
+        "fpga_uncorrected": fpga_results[2]["uncorrectableCrcs"],
+    }
+
+
+def collect_mlag(eapi):
+    mlag_results = eapi.try_eapi_command(
+        [
+            "show hostname",
+            "show mlag",
+            "show port-channel",
+            "show lldp neighbors",
+            "show ip interface brief",
+        ],
+        "batch",
+    )
+    if mlag_results is None:
+        return None
+    show_mlag = mlag_results[1]
+    # the address of the MLAG local interface (the peer-link SVI), the other
+    # peer has it as its peerAddress
+    local_interface = mlag_results[4]["interfaces"].get(
+        show_mlag.get("localInterface", ""), {}
+    )
+    peer_link = show_mlag.get("peerLink", "")
+    port_channel = mlag_results[2]["portChannels"].get(peer_link, {})
+    active_ports = list(port_channel.get("activePorts", {}))
+    inactive_ports = list(port_channel.get("inactivePorts", {}))
+    members = set(active_ports + inactive_ports)
+    return {
+        "hostname": mlag_results[0]["hostname"],
+        "fqdn": mlag_results[0]["fqdn"],
+        "mlag": show_mlag,
+        "local_address": local_interface.get("interfaceAddress", {})
+        .get("ipAddr", {})
+        .get("address"),
+        "peer_link_active": active_ports,
+        "peer_link_inactive": inactive_ports,
+        "peer_link_members": sorted(members),
+        "peer_link_neighbors": {
+            neighbor["port"]: neighbor
+            for neighbor in mlag_results[3]["lldpNeighbors"]
+            if neighbor["port"] in members
+        },
+    }
+
+
+# seconds between the two samples of sample_counter_deltas
+COUNTER_SAMPLE_SECONDS = 5
+
+
+def _counter_sample(show_errors, show_discards):
+    # [error_rows, discard_rows] for every interface, zeros included
+    return [
+        netlib.counters.counter_rows(
+            show_errors["interfaceErrorCounters"],
+            netlib.counters.ERROR_COUNTERS,
+            nonzero_only=False,
+        ),
+        netlib.counters.counter_rows(
+            show_discards["interfaces"],
+            netlib.counters.DISCARD_COUNTERS,
+            nonzero_only=False,
+        ),
+    ]
+
+
+def collect_counters(eapi, interfaces=None):
+    # interfaces limits the sample to a few ports, e.g. Ethernet1/1,Ethernet2/1,
+    # which keeps the reply small when only those are being watched closely
+    scope = f"{','.join(interfaces)} " if interfaces else ""
+    counter_results = eapi.try_eapi_command(
+        [
+            f"show interfaces {scope}counters errors",
+            f"show interfaces {scope}counters discards",
+        ],
+        "batch",
+    )
+    if counter_results is None:
+        return None
+    return _counter_sample(counter_results[0], counter_results[1])
+
+
+def sample_counter_deltas(eapi, interval=COUNTER_SAMPLE_SECONDS):
+    # two samples of every interface, interval seconds apart, as sink
+    # records: the second sample (nonzero interfaces only) and what moved in
+    # between. "show hostname" rides along with the first sample, so this is
+    # two requests per switch
+    counter_commands = [
+        "show interfaces counters errors",
+        "show interfaces counters discards",
+    ]
+    first_results = eapi.try_eapi_command(["show hostname"] + counter_commands, "batch")
+    if first_results is None:
+        return None
+    first_time = time.monotonic()
+    time.sleep(interval)
+    second_results = eapi.try_eapi_command(counter_commands, "batch")
+    if second_results is None:
+        return None
+    seconds = time.monotonic() - first_time
+    first_errors, first_discards = _counter_sample(*first_results[1:])
+    second_errors, second_discards = _counter_sample(*second_results)
+    return {
+        "hostname": first_results[0]["hostname"],
+        "seconds": seconds,
+        "errors": netlib.counters.counter_records(
+            netlib.counters.nonzero_rows(second_errors),
+            netlib.counters.ERROR_COUNTERS,
+        ),
+        "discards": netlib.counters.counter_records(
+            netlib.counters.nonzero_rows(second_discards),
+            netlib.counters.DISCARD_COUNTERS,
+        ),
+        "error_deltas": netlib.counters.delta_records(
+            netlib.counters.compare_counters(first_errors, second_errors),
+            netlib.counters.ERROR_COUNTERS,
+        ),
+        "discard_deltas": netlib.counters.delta_records(
+            netlib.counters.compare_counters(first_discards, second_discards),
+            netlib.counters.DISCARD_COUNTERS,
+        ),
+    }
+
+
+def collect_lag_health(eapi):
+    # the port-channel summary replaces a "show port-channel N" per LAG
+    lag_results = eapi.try_eapi_command(
+        [
+            "show hostname",
+            "show port-channel summary",
+            "show interfaces counters errors",
+            "show interfaces counters discards",
+        ],
+        "batch",
+    )
+    if lag_results is None:
+        return None
+    return {
+        "hostname": lag_results[0]["hostname"],
+        "port_channels": lag_results[1]["portChannels"],
+        "counters": _counter_sample(lag_results[2], lag_results[3]),
+    }
+
+
+def collect_neighbors(eapi):
+    neighbor_results = eapi.try_eapi_command(
+        ["show hostname", "show ip arp", "show ipv6 neighbors"], "batch"
+    )
+    if neighbor_results is None:
+        return None
+    return {
+        "hostname": neighbor_results[0]["hostname"],
+        "entries": netlib.locator.neighbor_entries(
+            neighbor_results[1]["ipV4Neighbors"], 4
+        )
+        + netlib.locator.neighbor_entries(neighbor_results[2]["ipV6Neighbors"], 6),
+    }
@@ -0,0 +1,184 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+try:
+    # importing libraries
+    import json
+    import os
+    import time
+
+    import numpy as np
+
+    import netlib.counters
+except ImportError as error:
+    print(error)
+    quit()
+except Exception as exception:
+    print(exception)
+
+# every sample stores the error counters followed by the discard counters
+STORE_COUNTERS = [
+    counter_key[0]
+    for counter_key in netlib.counters.ERROR_COUNTERS + netlib.counters.DISCARD_COUNTERS
+]
+
+
+class CounterStore:
+    # Append-only columnar store of interface counter samples for one switch.
+    #
+    # <store_dir>/<switch>/segment_NNNN/
+    #     schema.json    interface and counter names (the array axes)
+    #     timestamps.f8  float64 epoch seconds, one per sample
+    #     values.i8      int64, samples x interfaces x counters
+    #
+    # A sample is a fixed-width block, so appending is a single write and
+    # reads memory-map the files and slice only the rows and columns needed.
+    # A new segment starts whenever the interface list changes (new linecard,
+    # breakout change), older segments are left untouched.
+    # Usage example:
+    # store = CounterStore(f"{output_dir}/counter_store", hostname_short)
+    # store.append(time.time(), {"Ethernet1": [0, 0, 0, 0, 0, 0, 0, 0, 0]})
+    # timestamps, fcs = store.query("Ethernet1", "fcsErrors", since=week_ago)
+    def __init__(self, store_dir, switch, counters=STORE_COUNTERS):
+        self.switch_dir = os.path.join(store_dir, switch)
+        self.counters = list(counters)
+        os.makedirs(self.switch_dir, exist_ok=True)
+
+    def _segments(self):
+        return sorted(
+            entry
+            for entry in os.listdir(self.switch_dir)
+            if entry.startswith("segment_")
+        )
+
+    def _read_schema(self, segment):
+        with open(os.path.join(self.switch_dir, segment, "schema.json")) as my_file:
+            return json.load(my_file)
+
+    def _segment_for(self, interfaces):
+        segments = self._segments()
+        if segments:
+            schema = self._read_schema(segments[-1])
+            if schema == {"interfaces": interfaces, "counters": self.counters}:
+                return segments[-1]
+            segment = f"segment_{int(segments[-1].split('_')[1]) + 1:04d}"
+        else:
+            segment = "segment_0000"
+        os.makedirs(os.path.join(self.switch_dir, segment))
+        with open(os.path.join(self.switch_dir, segment, "schema.json"), "w") as f:
+            json.dump({"interfaces": interfaces, "counters": self.counters}, f)
+        return segment
+
+    def append(self, timestamp, rows):
+        # rows is {interface: [counter values in self.counters order]}, as
+        # returned by netlib.counters with nonzero_only=False
+        interfaces = sorted(rows)
+        segment_dir = os.path.join(self.switch_dir, self._segment_for(interfaces))
+        sample = np.array([rows[interface] for interface in interfaces], dtype="<i8")
+        timestamps_file = os.path.join(segment_dir, "timestamps.f8")
+        values_file = os.path.join(segment_dir, "values.i8")
+        # values first, then the timestamp: a sample only counts once its
+        # timestamp is on disk, and anything past the last committed sample
+        # (a crash mid-append) is cut off before writing the next one
+        if os.path.exists(timestamps_file):
+            committed = os.path.getsize(timestamps_file) // 8
+            with open(timestamps_file, "r+b") as my_file:
+                my_file.truncate(committed * 8)
+        else:
+            committed = 0
+        with open(values_file, "ab") as my_file:
+            my_file.truncate(committed * sample.nbytes)
+            my_file.write(sample.tobytes())
+        with open(timestamps_file, "ab") as my_file:
+            my_file.write(np.array([timestamp], dtype="<f8").tobytes())
+
+    def _open_segment(self, segment):
+        schema = self._read_schema(segment)
+        segment_dir = os.path.join(self.switch_dir, segment)
+        timestamps_file = os.path.join(segment_dir, "timestamps.f8")
+        values_file = os.path.join(segment_dir, "values.i8")
+        if not os.path.exists(timestamps_file) or not os.path.exists(values_file):
+            return schema, None, None
+        row_width = len(schema["interfaces"]) * len(schema["counters"])
+        samples = min(
+            os.path.getsize(timestamps_file) // 8,
+            os.path.getsize(values_file) // (8 * row_width),
+        )
+        if samples == 0:
+            return schema, None, None
+        timestamps = np.memmap(timestamps_file, dtype="<f8", mode="r", shape=(samples,))
+        values = np.memmap(
+            values_file,
+            dtype="<i8",
+            mode="r",
+            shape=(samples, len(schema["interfaces"]), len(schema["counters"])),
+        )
+        return schema, timestamps, values
+
+    def interfaces(self):
+        segments = self._segments()
+        if not segments:
+            return []
+        return self._read_schema(segments[-1])["interfaces"]
+
+    def query(self, interface, counter, since=None, until=None):
+        # returns (timestamps, values) numpy arrays for one interface/counter,
+        # only the matching time range of each segment is read from disk
+        query_timestamps = []
+        query_values = []
+        for segment in self._segments():
+            schema, timestamps, values = self._open_segment(segment)
+            if timestamps is None or interface not in schema["interfaces"]:
+                continue
+            start = 0 if since is None else np.searchsorted(timestamps, since, "left")
+            end = (
+                len(timestamps)
+                if until is None
+                else np.searchsorted(timestamps, until, "right")
+            )
+            if start >= end:
+                continue
+            interface_index = schema["interfaces"].index(interface)
+            counter_index = schema["counters"].index(counter)
+            query_timestamps.append(np.array(timestamps[start:end]))
+            query_values.append(
+                np.array(values[start:end, interface_index, counter_index])
+            )
+        if not query_timestamps:
+            return np.empty(0, dtype="<f8"), np.empty(0, dtype="<i8")
+        return np.concatenate(query_timestamps), np.concatenate(query_values)
+
+    def rate(self, interface, counter, since=None, until=None):
+        # per second rate between consecutive samples; a counter that went
+        # backwards was cleared or the switch reloaded, so count from zero
+        timestamps, values = self.query(interface, counter, since, until)
+        if len(timestamps) < 2:
+            return timestamps[1:], np.empty(0, dtype="f8")
+        deltas = np.diff(values)
+        deltas = np.where(deltas < 0, values[1:], deltas)
+        elapsed = np.diff(timestamps)
+        elapsed[elapsed <= 0] = np.nan
+        return timestamps[1:], deltas / elapsed
+
+
+def store_sample(store_dir, switch, error_rows, discard_rows, timestamp=None):
+    # combines full (nonzero_only=False) error and discard rows into one sample
+    if timestamp is None:
+        timestamp = time.time()
+    error_width = len(netlib.counters.ERROR_COUNTERS)
+    discard_width = len(netlib.counters.DISCARD_COUNTERS)
+    rows = {}
+    for interface in set(error_rows) | set(discard_rows):
+        rows[interface] = list(error_rows.get(interface, [0] * error_width)) + list(
+            discard_rows.get(interface, [0] * discard_width)
+        )
+    CounterStore(store_dir, switch).append(timestamp, rows)
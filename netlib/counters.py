@@ -0,0 +1,99 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+try:
+    # importing libraries
+    import numpy as np
+except ImportError as error:
+    print(error)
+    quit()
+except Exception as exception:
+    print(exception)
+
+# eAPI counter keys in the column order of "show interfaces counters errors"
+# and "show interfaces counters discards", with the short names used in tables
+ERROR_COUNTERS = [
+    ["fcsErrors", "FCS"],
+    ["alignmentErrors", "Align"],
+    ["symbolErrors", "Symbol"],
+    ["inErrors", "Rx"],
+    ["frameTooShorts", "Runts"],
+    ["frameTooLongs", "Giants"],
+    ["outErrors", "Tx"],
+]
+DISCARD_COUNTERS = [
+    ["inDiscards", "In Discards"],
+    ["outDiscards", "Out Discards"],
+]
+
+
+def counter_rows(interface_counters, counter_keys, nonzero_only=True):
+    # turns the eAPI {interface: {counter: value}} dict into
+    # {interface: [value, ...]} following the order of counter_keys
+    rows = {}
+    for interface, counters in interface_counters.items():
+        values = [counters.get(counter_key[0], 0) for counter_key in counter_keys]
+        if nonzero_only and not any(values):
+            continue
+        rows[interface] = values
+    return rows
+
+
+def nonzero_rows(rows):
+    return {interface: values for interface, values in rows.items() if any(values)}
+
+
+def read_error_counters(eapi, nonzero_only=True):
+    return counter_rows(eapi.get_interface_errors(), ERROR_COUNTERS, nonzero_only)
+
+
+def read_discard_counters(eapi, nonzero_only=True):
+    return counter_rows(eapi.get_interface_discards(), DISCARD_COUNTERS, nonzero_only)
+
+
+def counter_records(rows, counter_keys):
+    # flat per-interface dicts for the output sinks
+    records = []
+    for interface, values in rows.items():
+        record = {"interface": interface}
+        for counter_key, value in zip(counter_keys, values):
+            record[counter_key[0]] = int(value)
+        records.append(record)
+    return records
+
+
+def compare_counters(first_rows, second_rows):
+    # {interface: deltas} between two samples of counter rows. Interfaces
+    # that were clean on the first pass but not on the second are compared
+    # against zero, so brand new errors are reported too
+    compare_change = {}
+    for interface in sorted(set(first_rows) | set(second_rows)):
+        second_values = second_rows.get(interface)
+        first_values = first_rows.get(interface)
+        if second_values is None:
+            second_values = first_values
+        if first_values is None:
+            first_values = [0] * len(second_values)
+        compare_change[interface] = np.subtract(second_values, first_values)
+    return compare_change
+
+
+def delta_records(compare_change, counter_keys):
+    # the interfaces that moved, as counter_records for the output sinks
+    return counter_records(
+        {
+            interface: int_values
+            for interface, int_values in sorted(compare_change.items())
+            if np.any(int_values)
+        },
+        counter_keys,
+    )
@@ -0,0 +1,325 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Coordinator / worker collection across several machines. The coordinator
+# listens on a TCP port, workers connect to it and pull chunks of hosts, run
+# one of the collectors on them with run_on_fleet and stream every result back
+# as soon as it is ready. A chunk a worker did not finish (it died or lost the
+# connection) goes back in the queue for the others.
+#
+# Messages are JSON objects, each preceded by its length as a 4 byte big endian
+# unsigned integer:
+#   worker -> coordinator  {"type": "hello", "worker": name, "token": token}
+#   coordinator -> worker  {"type": "task", "collector": name, "hosts": [...]}
+#                          {"type": "done"}
+#   worker -> coordinator  {"type": "result", "host": host, "result": {...}}
+#                          {"type": "ready"} once the chunk is finished
+# Credentials never travel, every worker uses its own TACACS environment.
+
+try:
+    # importing libraries
+    import collections
+    import hmac
+    import ipaddress
+    import json
+    import queue
+    import socket
+    import struct
+    import threading
+    import time
+
+    import netlib.collectors
+    from netlib.arista_pyeapi import AristaPyeapi
+    from netlib.fleet import run_on_fleet
+except ImportError as error:
+    print(error)
+    quit()
+except Exception as exception:
+    print(exception)
+
+MESSAGE_HEADER = struct.Struct("!I")
+# a switch result larger than this is a protocol error, not data
+MAX_MESSAGE_BYTES = 256 * 1024 * 1024
+
+
+COLLECTORS = {
+    # two samples, the counters that moved in between come back as deltas
+    "errors_and_discards": netlib.collectors.sample_counter_deltas,
+    "power": netlib.collectors.collect_power,
+    "reload_cause": netlib.collectors.collect_reload_cause,
+    "upgrade_checks": netlib.collectors.collect_upgrade_checks,
+}
+
+
+def parse_address(text, default_host="0.0.0.0"):
+    # "host:port" or ":port" -> (host, port)
+    host, _, port = text.rpartition(":")
+    return (host or default_host, int(port))
+
+
+def is_loopback(host):
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return host == "localhost"
+
+
+def send_message(connection, message):
+    data = json.dumps(message, default=str).encode()
+    connection.sendall(MESSAGE_HEADER.pack(len(data)) + data)
+
+
+def _receive_exactly(connection, size):
+    chunks = []
+    received = 0
+    while received < size:
+        chunk = connection.recv(min(size - received, 1024 * 1024))
+        if not chunk:
+            if received == 0:
+                return None
+            raise ConnectionError("connection closed in the middle of a message")
+        chunks.append(chunk)
+        received += len(chunk)
+    return b"".join(chunks)
+
+
+def receive_message(connection):
+    # the next message, or None when the other side closed the connection
+    header = _receive_exactly(connection, MESSAGE_HEADER.size)
+    if header is None:
+        return None
+    (size,) = MESSAGE_HEADER.unpack(header)
+    if size > MAX_MESSAGE_BYTES:
+        raise ValueError(f"message of {size} bytes is over the limit")
+    data = _receive_exactly(connection, size)
+    if data is None:
+        raise ConnectionError("connection closed in the middle of a message")
+    return json.loads(data)
+
+
+def run_worker(
+    coordinator_address,
+    username,
+    password,
+    worker_name,
+    max_workers=32,
+    logger=None,
+    token="",
+):
+    # connects to the coordinator and collects chunks until told it is done,
+    # returns the number of hosts collected
+    collected_hosts = 0
+    with socket.create_connection(coordinator_address) as connection:
+        send_message(
+            connection, {"type": "hello", "worker": worker_name, "token": token}
+        )
+        while True:
+            message = receive_message(connection)
+            if message is None or message["type"] == "done":
+                return collected_hosts
+            collector = COLLECTORS[message["collector"]]
+
+            def collect(switch_hostname):
+                eapi = AristaPyeapi(username, password, switch_hostname, logger)
+                return collector(eapi)
+
+            for switch_hostname, result in run_on_fleet(
+                message["hosts"], collect, max_workers, logger
+            ):
+                send_message(
+                    connection,
+                    {"type": "result", "host": switch_hostname, "result": result},
+                )
+                collected_hosts += 1
+            send_message(connection, {"type": "ready"})
+
+
+class Coordinator:
+    # Usage example:
+    # coordinator = Coordinator(switch_list, "power", ("0.0.0.0", 8765), token=token)
+    # coordinator.start()
+    # for switch_hostname, worker_name, result in coordinator.results(3600):
+    #     sink.write("power", switch_hostname, result)
+    def __init__(
+        self, hosts, collector, listen_address, chunk_size=50, token="", logger=None
+    ):
+        if collector not in COLLECTORS:
+            raise ValueError(f"Unknown collector: {collector}")
+        # whoever joins gets the inventory and can send made up results
+        if not token and not is_loopback(listen_address[0]):
+            raise ValueError(
+                f"Refusing to listen on {listen_address[0]} without a token, "
+                "set one or listen on a loopback address"
+            )
+        self.collector = collector
+        self.token = token
+        self.logger = logger
+        self.chunks = collections.deque()
+        for start in range(0, len(hosts), chunk_size):
+            end = start + chunk_size
+            self.chunks.append(hosts[start:end])
+        # hosts nobody reported yet, a result for any other host (a late one
+        # after results() gave up on it) is dropped
+        self.unfinished = set(hosts)
+        self.total = len(self.unfinished)
+        # workers past the hello, there is nobody to hand chunks back to once
+        # this is 0 and the local workers are gone
+        self.connected = 0
+        # guards chunks, unfinished and connected, waited on by connections
+        # with nothing to hand out while other workers still hold chunks that
+        # may come back
+        self.condition = threading.Condition()
+        self.result_queue = queue.Queue()
+        self.server = socket.create_server(listen_address)
+
+    def address(self):
+        return self.server.getsockname()
+
+    def start(self):
+        threading.Thread(target=self._accept, daemon=True).start()
+
+    def _accept(self):
+        while True:
+            try:
+                connection, peer = self.server.accept()
+            except OSError:
+                # the server socket was closed, the run is over
+                return
+            threading.Thread(
+                target=self._serve, args=(connection, peer), daemon=True
+            ).start()
+
+    def _next_chunk(self):
+        with self.condition:
+            while not self.chunks and self.unfinished:
+                self.condition.wait()
+            if self.chunks:
+                return list(self.chunks.popleft())
+            return None
+
+    def _finished(self, switch_hostname, worker_name, result):
+        with self.condition:
+            if switch_hostname not in self.unfinished:
+                return
+            self.unfinished.remove(switch_hostname)
+            if not self.unfinished:
+                self.condition.notify_all()
+        self.result_queue.put([switch_hostname, worker_name, result])
+
+    def _abandon(self):
+        # gives up on every host not reported yet, the workers still
+        # connected are told they are done once they finish their chunk
+        with self.condition:
+            abandoned = sorted(self.unfinished)
+            self.unfinished.clear()
+            self.chunks.clear()
+            self.condition.notify_all()
+        return abandoned
+
+    def _workers_gone(self, local_workers):
+        with self.condition:
+            connected = self.connected
+        return connected == 0 and all(
+            local_worker.poll() is not None for local_worker in local_workers
+        )
+
+    def _requeue(self, hosts):
+        with self.condition:
+            self.chunks.appendleft(hosts)
+            self.condition.notify_all()
+
+    def _log(self, text, peer):
+        print(text)
+        if self.logger is not None:
+            self.logger.warning(text, extra={"host": f"{peer[0]}:{peer[1]}"})
+
+    def _serve(self, connection, peer):
+        chunk = []
+        joined = False
+        with connection:
+            try:
+                hello = receive_message(connection)
+                if (
+                    not hello
+                    or hello.get("type") != "hello"
+                    or not hmac.compare_digest(
+                        str(hello.get("token", "")).encode(), self.token.encode()
+                    )
+                ):
+                    self._log(f"Rejected a worker connection from {peer[0]}", peer)
+                    return
+                worker_name = hello.get("worker") or f"{peer[0]}:{peer[1]}"
+                with self.condition:
+                    self.connected += 1
+                joined = True
+                while True:
+                    chunk = self._next_chunk()
+                    if chunk is None:
+                        send_message(connection, {"type": "done"})
+                        return
+                    send_message(
+                        connection,
+                        {"type": "task", "collector": self.collector, "hosts": chunk},
+                    )
+                    while True:
+                        message = receive_message(connection)
+                        if message is None:
+                            raise ConnectionError("worker closed the connection")
+                        if message["type"] == "ready":
+                            break
+                        if message["host"] in chunk:
+                            chunk.remove(message["host"])
+                            self._finished(
+                                message["host"], worker_name, message["result"]
+                            )
+                    chunk = []
+            except (OSError, ValueError, KeyError) as exception:
+                if chunk:
+                    # whatever the worker did not report goes to another one
+                    self._requeue(chunk)
+                self._log(
+                    f"Worker {peer[0]} dropped out ({exception}), "
+                    f"{len(chunk)} hosts handed back",
+                    peer,
+                )
+            finally:
+                if joined:
+                    with self.condition:
+                        self.connected -= 1
+
+    def results(self, timeout=None, local_workers=()):
+        # (host, worker, result) for every host, as they arrive. The hosts
+        # nobody collected come out as (host, None, None), all at once when
+        # timeout seconds have gone by, or when the local_workers (the Popen
+        # handles of the workers started on this machine) have all exited and
+        # no other worker is connected to take over their chunks
+        deadline = None if timeout is None else time.monotonic() + timeout
+        reported = 0
+        try:
+            while reported < self.total:
+                try:
+                    yield self.result_queue.get(timeout=1)
+                    reported += 1
+                    continue
+                except queue.Empty:
+                    pass
+                if deadline is not None and time.monotonic() >= deadline:
+                    print(f"Gave up waiting for the workers after {timeout}s.")
+                elif local_workers and self._workers_gone(local_workers):
+                    print("Every worker exited before the collection finished.")
+                else:
+                    continue
+                for switch_hostname in self._abandon():
+                    yield switch_hostname, None, None
+                    reported += 1
+        finally:
+            self.server.close()
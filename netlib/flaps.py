@@ -0,0 +1,107 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Interface link state tracking for the flap watch. Each switch keeps its
+# last "show interfaces status" as a small int8 array (interface index x
+# [link, protocol]) so a poll is diffed with one vectorized comparison and
+# only the transitions are kept.
+
+try:
+    # importing libraries
+    import numpy as np
+except ImportError as error:
+    print(error)
+    quit()
+except Exception as exception:
+    print(exception)
+
+# "show interfaces status" linkStatus / lineProtocolStatus values, anything
+# not listed is stored as "unknown"
+LINK_STATES = ["unknown", "connected", "notconnect", "disabled", "errdisabled"]
+PROTOCOL_STATES = ["unknown", "up", "down", "lowerLayerDown", "notPresent", "dormant"]
+LINK_CODES = {state: code for code, state in enumerate(LINK_STATES)}
+PROTOCOL_CODES = {state: code for code, state in enumerate(PROTOCOL_STATES)}
+CONNECTED = LINK_CODES["connected"]
+
+
+def state_array(interface_statuses, interfaces):
+    # interfaces x [link, protocol] codes, in the order of interfaces
+    states = np.zeros((len(interfaces), 2), dtype="i1")
+    for index, interface in enumerate(interfaces):
+        status = interface_statuses[interface]
+        states[index, 0] = LINK_CODES.get(status.get("linkStatus"), 0)
+        states[index, 1] = PROTOCOL_CODES.get(status.get("lineProtocolStatus"), 0)
+    return states
+
+
+class InterfaceStateTracker:
+    def __init__(self):
+        self.interfaces = []
+        self.states = np.zeros((0, 2), dtype="i1")
+        self.flaps = np.zeros(0, dtype="i4")
+        self.known = np.zeros(0, dtype=bool)
+
+    def update(self, interface_statuses):
+        # returns [interface, old link, new link, old protocol, new protocol,
+        # flap count] for every interface whose state changed since the last
+        # update. A flap is counted each time a port leaves "connected".
+        interfaces = sorted(interface_statuses)
+        if interfaces != self.interfaces:
+            self._reindex(interfaces)
+        states = state_array(interface_statuses, interfaces)
+        changed = np.flatnonzero(np.any(states != self.states, axis=1))
+        # ports seen for the first time have nothing to compare against
+        changed = changed[self.known[changed]]
+        flapped = changed[
+            (self.states[changed, 0] == CONNECTED) & (states[changed, 0] != CONNECTED)
+        ]
+        self.flaps[flapped] += 1
+        transitions = [
+            [
+                interfaces[index],
+                LINK_STATES[self.states[index, 0]],
+                LINK_STATES[states[index, 0]],
+                PROTOCOL_STATES[self.states[index, 1]],
+                PROTOCOL_STATES[states[index, 1]],
+                int(self.flaps[index]),
+            ]
+            for index in changed
+        ]
+        self.states = states
+        self.known[:] = True
+        return transitions
+
+    def _reindex(self, interfaces):
+        # interfaces appeared or went away (linecard, breakout change), keep
+        # the state and flap count of the ones still there
+        old_index = {
+            interface: index for index, interface in enumerate(self.interfaces)
+        }
+        states = np.zeros((len(interfaces), 2), dtype="i1")
+        flaps = np.zeros(len(interfaces), dtype="i4")
+        known = np.zeros(len(interfaces), dtype=bool)
+        for index, interface in enumerate(interfaces):
+            if interface in old_index:
+                states[index] = self.states[old_index[interface]]
+                flaps[index] = self.flaps[old_index[interface]]
+                known[index] = True
+        self.interfaces = interfaces
+        self.states = states
+        self.flaps = flaps
+        self.known = known
+
+    def flap_counts(self):
+        # {interface: flaps} for the ports that flapped at least once
+        return {
+            self.interfaces[index]: int(self.flaps[index])
+            for index in np.flatnonzero(self.flaps)
+        }
@@ -0,0 +1,152 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+try:
+    # importing libraries
+    import concurrent.futures
+    import json
+except ImportError as error:
+    print(error)
+    quit()
+except Exception as exception:
+    print(exception)
+
+
+def run_on_fleet(hosts, worker, max_workers=32, logger=None, max_pending=None):
+    # Runs worker(host) for every host on a thread pool (pyeapi is blocking, so
+    # threads give us the I/O concurrency) and yields (host, result) as each
+    # switch finishes. A worker that raises yields (host, None).
+    # hosts can be any iterable, e.g. netlib.inventory.read_inventory(). At most
+    # max_pending hosts (twice max_workers by default) are queued at a time and
+    # the next ones are only taken from hosts as earlier ones finish, so a slow
+    # fleet or a slow consumer of the results holds back the input instead of
+    # piling up work and results in memory.
+    # Usage example:
+    # for host, result in run_on_fleet(switch_list, scan_switch):
+    #     sink.write("scan", host, result)
+    max_pending = max_pending or 2 * max_workers
+    host_iterator = iter(hosts)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {}
+        try:
+            while True:
+                for host in host_iterator:
+                    futures[executor.submit(worker, host)] = host
+                    if len(futures) >= max_pending:
+                        break
+                if not futures:
+                    return
+                done, _ = concurrent.futures.wait(
+                    futures, return_when=concurrent.futures.FIRST_COMPLETED
+                )
+                for future in done:
+                    host = futures.pop(future)
+                    try:
+                        result = future.result()
+                    except (Exception, SystemExit) as exception:
+                        # try_eapi_command calls sys.exit() on unresolvable
+                        # names, which should only end this switch, not the run
+                        print(f"{host} failed: {exception}")
+                        if logger is not None:
+                            logger.warning(
+                                f"Fleet worker failed: {exception}",
+                                extra={"host": host},
+                            )
+                        result = None
+                    yield host, result
+        except KeyboardInterrupt:
+            for future in futures:
+                future.cancel()
+            raise
+
+
+def decode_reply(raw_reply):
+    # a reply body from AristaPyeapi try_eapi_command(commands, "raw") back to
+    # the list of command results, without the leading "enable" one. Meant to
+    # run in the analyze function of analyze_on_pool, an eAPI error raises
+    reply = json.loads(raw_reply)
+    if "error" in reply:
+        raise ValueError(
+            f"eAPI error {reply['error'].get('code')}: "
+            f"{reply['error'].get('message')}"
+        )
+    return reply["result"][1:]
+
+
+def _analysis_failed(host, exception, logger):
+    # one switch's bad reply (e.g. an eAPI error from decode_reply) only ends
+    # that switch, inline or on the pool
+    print(f"{host} analysis failed: {exception}")
+    if logger is not None:
+        logger.warning(f"Analysis failed: {exception}", extra={"host": host})
+
+
+def analyze_on_pool(fleet_results, analyze, processes=0, logger=None):
+    # Second stage for run_on_fleet: analyze(result) runs on a pool of
+    # processes, so parsing and NumPy work on big replies is not serialized by
+    # the GIL with the I/O threads. The results should be the raw reply
+    # bytes (try_eapi_command(commands, "raw")) with analyze starting with
+    # decode_reply: pickling a decoded reply over to a worker costs about as
+    # much as the work saved, bytes are only copied. analyze must be a module
+    # level function (it is pickled to the workers) and should return compact
+    # data, e.g. NumPy arrays, rather than the reply it was given.
+    # processes=0 runs it inline. Results are pulled from fleet_results only
+    # as the pool frees up, so the I/O stage is held back by a busy pool.
+    # Yields (host, analysis), (host, None) when the collection or the
+    # analysis failed.
+    # Usage example:
+    # for host, arrays in analyze_on_pool(
+    #     run_on_fleet(switch_list, scan_switch), netlib.optics.compact_reply, 8
+    # ):
+    if not processes:
+        for host, result in fleet_results:
+            analysis = None
+            if result is not None:
+                try:
+                    analysis = analyze(result)
+                except Exception as exception:
+                    _analysis_failed(host, exception, logger)
+            yield host, analysis
+        return
+    fleet_results = iter(fleet_results)
+    collecting = True
+    with concurrent.futures.ProcessPoolExecutor(max_workers=processes) as executor:
+        futures = {}
+        try:
+            while True:
+                while collecting and len(futures) < 2 * processes:
+                    try:
+                        host, result = next(fleet_results)
+                    except StopIteration:
+                        collecting = False
+                        break
+                    if result is None:
+                        yield host, None
+                    else:
+                        futures[executor.submit(analyze, result)] = host
+                if not futures:
+                    return
+                done, _ = concurrent.futures.wait(
+                    futures, return_when=concurrent.futures.FIRST_COMPLETED
+                )
+                for future in done:
+                    host = futures.pop(future)
+                    try:
+                        analysis = future.result()
+                    except Exception as exception:
+                        _analysis_failed(host, exception, logger)
+                        analysis = None
+                    yield host, analysis
+        except KeyboardInterrupt:
+            for future in futures:
+                future.cancel()
+            raise
@@ -0,0 +1,118 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Local index of the FPGA uncorrectable CRC counters seen on each switch, so a
+# fleet sweep only reports what happened since the previous one. Every switch
+# is still queried on every sweep: the counters can grow without a reload, so
+# nothing cheaper than reading them tells a switch has nothing new. The index
+# only spares the reports and index writes of unchanged switches. It is a
+# JSON file of
+# {switch: {"hostname", "scanned", "boot_time", "fpgas": {fpga: {"count",
+# "lastOccurrence"}}}}
+
+try:
+    # importing libraries
+    import json
+    import os
+    import time
+except ImportError as error:
+    print(error)
+    quit()
+except Exception as exception:
+    print(exception)
+
+# boot times derived from uptime drift by a few seconds between runs
+BOOT_TIME_TOLERANCE = 120
+
+
+def load_index(index_file):
+    if not os.path.exists(index_file):
+        return {}
+    with open(index_file) as my_file:
+        return json.load(my_file)
+
+
+def save_index(index_file, fpga_index):
+    # write and rename so an interrupted run never leaves half an index behind
+    temporary_file = f"{index_file}.tmp"
+    with open(temporary_file, "w") as my_file:
+        json.dump(fpga_index, my_file, indent=2, sort_keys=True)
+    os.replace(temporary_file, index_file)
+
+
+def boot_time(show_version, now=None):
+    now = time.time() if now is None else now
+    return show_version.get("bootupTimestamp", now - show_version["uptime"])
+
+
+def _rebooted(entry, switch_boot_time):
+    return entry is None or (
+        abs(switch_boot_time - entry["boot_time"]) > BOOT_TIME_TOLERANCE
+    )
+
+
+def unchanged(entry, switch_boot_time, fpga_uncorrected):
+    # same boot (the uptime only grew) and the same count and last occurrence
+    # on every FPGA: nothing to report and nothing to write to the index. The
+    # counters had to be read to tell, the switch was queried either way
+    if _rebooted(entry, switch_boot_time):
+        return False
+    for fpga, counters in fpga_uncorrected.items():
+        previous = entry["fpgas"].get(fpga, {"count": 0, "lastOccurrence": 0})
+        if counters["count"] != previous["count"] or counters.get(
+            "lastOccurrence", 0
+        ) != previous.get("lastOccurrence", 0):
+            return False
+    return True
+
+
+def new_occurrences(entry, switch_boot_time, fpga_uncorrected):
+    # returns [fpga, new_count, count, last_occurrence, rebooted] for every
+    # FPGA that logged an error since the entry was recorded. The counters
+    # restart with the switch, so after a reboot everything counted is new.
+    rebooted = _rebooted(entry, switch_boot_time)
+    occurrences = []
+    for fpga, counters in fpga_uncorrected.items():
+        count = counters["count"]
+        if count == 0:
+            continue
+        previous = {} if rebooted else entry["fpgas"].get(fpga, {})
+        if count < previous.get("count", 0):
+            # cleared without a reload, count from zero like after a reboot
+            previous = {}
+        if counters.get("lastOccurrence", 0) <= previous.get("lastOccurrence", 0):
+            continue
+        occurrences.append(
+            [
+                fpga,
+                count - previous.get("count", 0),
+                count,
+                counters.get("lastOccurrence"),
+                rebooted and entry is not None,
+            ]
+        )
+    return occurrences
+
+
+def index_entry(hostname, switch_boot_time, fpga_uncorrected, now=None):
+    return {
+        "hostname": hostname,
+        "scanned": time.time() if now is None else now,
+        "boot_time": switch_boot_time,
+        "fpgas": {
+            fpga: {
+                "count": counters["count"],
+                "lastOccurrence": counters.get("lastOccurrence", 0),
+            }
+            for fpga, counters in fpga_uncorrected.items()
+        },
+    }
@@ -0,0 +1,173 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Host inventories for the --switches option, read one entry at a time:
+#
+#   switches.txt   one host per line, optional key=value tags after it,
+#                  blank lines and # comments skipped
+#                    sw1.example.com role=leaf site=ams
+#   switches.csv   a "host" (or "hostname") column, every other column a tag
+#   switches.yaml  a list of hosts or of {host: ..., tag: ...} mappings, or a
+#                  {host: {tag: ...}} mapping, one or more YAML documents
+#                  (needs PyYAML)
+#
+# Duplicates are dropped, --filter key=glob keeps the hosts whose tags match
+# and --shard i/n keeps the hosts hashed to shard i of n, so n processes or
+# machines given the same inventory split it without talking to each other.
+
+try:
+    # importing libraries
+    import argparse
+    import csv
+    import fnmatch
+    import os
+    import zlib
+except ImportError as error:
+    print(error)
+    quit()
+except Exception as exception:
+    print(exception)
+
+HOST_COLUMNS = ["host", "hostname"]
+
+
+def _text_entries(inventory_file):
+    with open(inventory_file) as my_file:
+        for line in my_file:
+            fields = line.split("#", 1)[0].split()
+            if not fields:
+                continue
+            tags = {}
+            for field in fields[1:]:
+                key, _, value = field.partition("=")
+                tags[key] = value
+            yield [fields[0], tags]
+
+
+def _csv_entries(inventory_file):
+    with open(inventory_file, newline="") as my_file:
+        reader = csv.DictReader(my_file)
+        host_column = next(
+            (column for column in HOST_COLUMNS if column in (reader.fieldnames or [])),
+            None,
+        )
+        if host_column is None:
+            raise ValueError(
+                f"{inventory_file} needs a {' or '.join(HOST_COLUMNS)} column"
+            )
+        for row in reader:
+            host = (row.pop(host_column) or "").strip()
+            if host:
+                yield [host, {key: value for key, value in row.items() if key}]
+
+
+def _yaml_entries(inventory_file):
+    # PyYAML is only needed for YAML inventories
+    try:
+        import yaml
+    except ImportError:
+        raise ValueError(f"Reading {inventory_file} needs PyYAML (pip install pyyaml)")
+    with open(inventory_file) as my_file:
+        for document in yaml.safe_load_all(my_file):
+            if isinstance(document, dict):
+                document = [
+                    dict(tags or {}, host=host) for host, tags in document.items()
+                ]
+            for entry in document or []:
+                if isinstance(entry, dict):
+                    entry = dict(entry)
+                    host = str(entry.pop("host", entry.pop("hostname", ""))).strip()
+                    tags = {key: str(value) for key, value in entry.items()}
+                else:
+                    host = str(entry).strip()
+                    tags = {}
+                if host:
+                    yield [host, tags]
+
+
+def inventory_entries(inventory_file):
+    # [host, tags] for every entry, in file order, duplicates included
+    extension = os.path.splitext(inventory_file)[1].lower()
+    if extension == ".csv":
+        return _csv_entries(inventory_file)
+    elif extension in [".yaml", ".yml"]:
+        return _yaml_entries(inventory_file)
+    return _text_entries(inventory_file)
+
+
+def shard_of(host, shard_count):
+    # 0 based, stable across runs and machines unlike hash()
+    return zlib.crc32(host.lower().encode()) % shard_count
+
+
+def _matches(host, tags, filters):
+    for key, pattern in filters:
+        value = host if key in HOST_COLUMNS else tags.get(key)
+        if value is None or not fnmatch.fnmatch(value, pattern):
+            return False
+    return True
+
+
+def read_inventory(inventory_file, filters=None, shard=None):
+    # yields the host names to work on, lazily. Only the set of hosts already
+    # seen is kept, for the de-duplication.
+    # Usage example:
+    # switch_list = list(read_inventory("fleet.csv", [["role", "leaf"]], [1, 4]))
+    seen_hosts = set()
+    for host, tags in inventory_entries(inventory_file):
+        if host in seen_hosts:
+            continue
+        seen_hosts.add(host)
+        if filters and not _matches(host, tags, filters):
+            continue
+        if shard and shard_of(host, shard[1]) != shard[0] - 1:
+            continue
+        yield host
+
+
+def parse_filter(text):
+    # argparse type for --filter role=leaf, site=ams* or host=*spine*
+    key, separator, pattern = text.partition("=")
+    if not separator or not key:
+        raise argparse.ArgumentTypeError(f"expected key=pattern, got {text}")
+    return [key, pattern]
+
+
+def parse_shard(text):
+    # argparse type for --shard 2/8, returns [2, 8]
+    try:
+        index, count = [int(part) for part in text.split("/")]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected i/n like 2/8, got {text}")
+    if count < 1 or not 1 <= index <= count:
+        raise argparse.ArgumentTypeError(f"shard {text} is not between 1/n and n/n")
+    return [index, count]
+
+
+def add_inventory_arguments(parser):
+    parser.add_argument(
+        "--filter",
+        type=parse_filter,
+        required=False,
+        action="append",
+        default=None,
+        metavar="role=leaf",
+        help="Only the inventory hosts whose tag matches, can be given several times",
+    )
+    parser.add_argument(
+        "--shard",
+        type=parse_shard,
+        required=False,
+        default=None,
+        metavar="i/n",
+        help="Only the hosts of shard i out of n, to split a run across machines",
+    )
@@ -0,0 +1,87 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Port-channel health from "show port-channel summary" joined in memory with
+# two samples of the interface error and discard counters
+
+try:
+    # importing libraries
+    import netlib.counters
+except ImportError as error:
+    print(error)
+    quit()
+except Exception as exception:
+    print(exception)
+
+
+def lag_members(port_channels):
+    # {port_channel: [active members, inactive members]}
+    members = {}
+    for port_channel, summary in port_channels.items():
+        ports = summary.get("ports", {})
+        members[port_channel] = [
+            sorted(port for port, state in ports.items() if state.get("activeLag")),
+            sorted(port for port, state in ports.items() if not state.get("activeLag")),
+        ]
+    return members
+
+
+def rising_counters(first_rows, second_rows, counter_keys, interface):
+    # "FCS +3, Rx +3" for the counters of interface that went up between the
+    # samples, counters that went down were cleared and are left out
+    first_values = first_rows.get(interface, [0] * len(counter_keys))
+    second_values = second_rows.get(interface, first_values)
+    return ", ".join(
+        f"{counter_key[1]} +{second - first}"
+        for counter_key, first, second in zip(counter_keys, first_values, second_values)
+        if second > first
+    )
+
+
+def lag_health(port_channels, first_sample, second_sample):
+    # samples are [error_rows, discard_rows] as returned by
+    # netlib.counters.counter_rows. Returns one record per port-channel that
+    # has inactive members or members with rising error counters.
+    flagged = []
+    for port_channel, [active, inactive] in sorted(lag_members(port_channels).items()):
+        rising_errors = {}
+        rising_discards = {}
+        for member in active + inactive:
+            errors = rising_counters(
+                first_sample[0],
+                second_sample[0],
+                netlib.counters.ERROR_COUNTERS,
+                member,
+            )
+            discards = rising_counters(
+                first_sample[1],
+                second_sample[1],
+                netlib.counters.DISCARD_COUNTERS,
+                member,
+            )
+            if errors:
+                rising_errors[member] = errors
+            if discards:
+                rising_discards[member] = discards
+        if not inactive and not rising_errors:
+            continue
+        flagged.append(
+            {
+                "port_channel": port_channel,
+                "link_state": port_channels[port_channel].get("linkState"),
+                "active_members": active,
+                "inactive_members": inactive,
+                "rising_errors": rising_errors,
+                "rising_discards": rising_discards,
+            }
+        )
+    return flagged
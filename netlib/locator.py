@@ -0,0 +1,153 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# On-disk IP/MAC locator built from the ARP and IPv6 neighbor tables of the
+# fleet. Entries are indexed by address and by MAC, so finding where a host
+# lives is an index lookup, and every switch is refreshed on its own so a
+# sweep only has to visit the switches whose entries went stale.
+
+try:
+    # importing libraries
+    import ipaddress
+    import re
+    import sqlite3
+    import time
+except ImportError as error:
+    print(error)
+    quit()
+except Exception as exception:
+    print(exception)
+
+LOCATOR_SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS switches (switch TEXT PRIMARY KEY, hostname TEXT, "
+    "refreshed REAL)",
+    "CREATE TABLE IF NOT EXISTS neighbors (switch TEXT, hostname TEXT, "
+    "address TEXT, family INTEGER, mac TEXT, interface TEXT, vlan INTEGER, "
+    "refreshed REAL)",
+    "CREATE INDEX IF NOT EXISTS neighbors_address ON neighbors (address)",
+    "CREATE INDEX IF NOT EXISTS neighbors_mac ON neighbors (mac)",
+    "CREATE INDEX IF NOT EXISTS neighbors_switch ON neighbors (switch)",
+]
+LOOKUP_COLUMNS = ["hostname", "address", "mac", "interface", "vlan", "refreshed"]
+# the full or partial MACs lookup accepts: bare hex digits, colon or dash
+# separated pairs, or dotted groups of four. Dotted digits like 10.1.2 and
+# IPv6 like fe80::1 match none of them and are not searched as MACs
+MAC_QUERIES = [
+    re.compile(r"[0-9a-f]{1,12}"),
+    re.compile(r"([0-9a-f]{2}[:-]){1,5}[0-9a-f]{0,2}"),
+    re.compile(r"([0-9a-f]{4}\.){1,2}[0-9a-f]{0,4}"),
+]
+
+
+def normalize_mac(mac):
+    # aabb.ccdd.eeff, AA-BB-CC-DD-EE-FF and aa:bb:cc... all become the
+    # lowercase colon form, a partial MAC stays partial for prefix lookups
+    hex_digits = re.sub(r"[^0-9a-f]", "", mac.lower())
+    return ":".join(re.findall(r"..?", hex_digits))
+
+
+def neighbor_entries(neighbors, family):
+    # "show ip arp" / "show ipv6 neighbors" entries as index rows. The
+    # interface is "Vlan100, Ethernet1/1" on SVIs and just the port when routed
+    entries = []
+    for neighbor in neighbors:
+        interface = neighbor.get("interface", "")
+        vlan = None
+        vlan_match = re.match(r"Vlan(\d+), (.*)", interface)
+        if vlan_match:
+            vlan = int(vlan_match.group(1))
+            interface = vlan_match.group(2)
+        entries.append(
+            [
+                # one spelling per address, whatever the switch printed
+                str(ipaddress.ip_address(neighbor["address"])),
+                family,
+                normalize_mac(neighbor.get("hwAddress", "")),
+                interface,
+                vlan,
+            ]
+        )
+    return entries
+
+
+class LocatorIndex:
+    def __init__(self, index_file):
+        self.connection = sqlite3.connect(index_file)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        for statement in LOCATOR_SCHEMA:
+            self.connection.execute(statement)
+        self.connection.commit()
+
+    def stale_switches(self, switch_list, max_age, now=None):
+        # switches never indexed or last refreshed more than max_age seconds
+        # ago, taken lazily from switch_list (any iterable)
+        now = time.time() if now is None else now
+        refreshed = dict(
+            self.connection.execute("SELECT switch, refreshed FROM switches")
+        )
+        return (
+            switch
+            for switch in switch_list
+            if now - refreshed.get(switch, 0) >= max_age
+        )
+
+    def replace_switch(self, switch, hostname, entries, timestamp=None):
+        # the switch's previous entries go away in the same transaction, so a
+        # lookup never sees a half refreshed switch
+        timestamp = time.time() if timestamp is None else timestamp
+        with self.connection:
+            self.connection.execute("DELETE FROM neighbors WHERE switch = ?", (switch,))
+            self.connection.executemany(
+                "INSERT INTO neighbors VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [[switch, hostname] + entry + [timestamp] for entry in entries],
+            )
+            self.connection.execute(
+                "INSERT OR REPLACE INTO switches VALUES (?, ?, ?)",
+                (switch, hostname, timestamp),
+            )
+
+    def lookup(self, query):
+        # an IP address is matched exactly, a full or partial MAC is matched
+        # as a prefix (a range scan on the index). Raises ValueError for
+        # anything else, a mistyped IP is not searched as a MAC
+        columns = ", ".join(LOOKUP_COLUMNS)
+        try:
+            address = str(ipaddress.ip_address(query))
+        except ValueError:
+            address = None
+        if address is not None:
+            cursor = self.connection.execute(
+                f"SELECT {columns} FROM neighbors WHERE address = ? "
+                "ORDER BY hostname",
+                (address,),
+            )
+        else:
+            if not any(
+                mac_query.fullmatch(query.strip().lower()) for mac_query in MAC_QUERIES
+            ):
+                raise ValueError(f"{query} is neither an IP address nor a MAC")
+            mac_prefix = normalize_mac(query)
+            cursor = self.connection.execute(
+                f"SELECT {columns} FROM neighbors WHERE mac >= ? AND mac < ? "
+                "ORDER BY mac, hostname",
+                (mac_prefix, mac_prefix + "\uffff"),
+            )
+        return [dict(zip(LOOKUP_COLUMNS, row)) for row in cursor]
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
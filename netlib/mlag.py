@@ -0,0 +1,134 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# MLAG peer discovery and the cross-peer consistency check, working on the
+# dicts returned by netlib.collectors.collect_mlag
+
+
+def peer_fqdn(mlag_data):
+    # the peer is whatever LLDP sees on the peer-link members. LLDP reports
+    # the system name, which only carries a domain if the peer has one
+    # configured, so borrow ours when it is missing
+    for neighbor in mlag_data["peer_link_neighbors"].values():
+        peer_name = neighbor["neighborDevice"]
+        if "." not in peer_name and "." in mlag_data["fqdn"]:
+            peer_name = f"{peer_name}.{mlag_data['fqdn'].split('.', 1)[1]}"
+        return peer_name
+    # no LLDP on the peer-link, the peer-link SVI address is all we have
+    return mlag_data["mlag"].get("peerAddress") or None
+
+
+def _linked(first, second):
+    # LLDP on either side's peer-link naming the other is enough. Without it
+    # either side's peerAddress being the other's peer-link SVI address is,
+    # within the same domain-id (SVI addresses are often the same on every
+    # pair). One side reporting is enough, the other may have no local address
+    for local, remote in [[first, second], [second, first]]:
+        for neighbor in local["peer_link_neighbors"].values():
+            if neighbor["neighborDevice"].split(".")[0] == remote["hostname"]:
+                return True
+        if (
+            local["mlag"].get("domainId") == remote["mlag"].get("domainId")
+            and local["mlag"].get("peerAddress")
+            and local["mlag"]["peerAddress"] == remote.get("local_address")
+        ):
+            return True
+    return False
+
+
+def group_domains(mlag_switches):
+    # the switches of each MLAG domain, sorted by hostname. A healthy domain
+    # has two, a lone switch lost its peer, more than two could not be told
+    # apart (no LLDP and the same domain-id and addresses on several pairs)
+    domains = []
+    for mlag_data in sorted(mlag_switches, key=lambda switch: switch["hostname"]):
+        linked = [
+            domain
+            for domain in domains
+            if any(_linked(mlag_data, member) for member in domain)
+        ]
+        domains = [
+            domain
+            for domain in domains
+            if not any(domain is linked_domain for linked_domain in linked)
+        ]
+        domains.append(
+            sorted(
+                [mlag_data] + [member for domain in linked for member in domain],
+                key=lambda switch: switch["hostname"],
+            )
+        )
+    return sorted(domains, key=lambda domain: domain[0]["hostname"])
+
+
+def _switch_issues(mlag_data):
+    mlag = mlag_data["mlag"]
+    hostname = mlag_data["hostname"]
+    issues = []
+    for key, expected in [
+        ["state", "active"],
+        ["negStatus", "connected"],
+        ["peerLinkStatus", "up"],
+        ["localIntfStatus", "up"],
+        ["configSanity", "consistent"],
+    ]:
+        if mlag.get(key) != expected:
+            issues.append(f"{hostname} {key} is {mlag.get(key)}")
+    for port in mlag_data["peer_link_inactive"]:
+        issues.append(f"{hostname} {port} is inactive in {mlag.get('peerLink')}")
+    return issues
+
+
+def check_pair(first, second):
+    # returns a list of issues, empty when both peers agree and are healthy
+    issues = _switch_issues(first)
+    if second is None:
+        return issues + [f"{first['hostname']} peer could not be queried"]
+    issues += _switch_issues(second)
+    if first["mlag"].get("domainId") != second["mlag"].get("domainId"):
+        issues.append(
+            f"domain {first['mlag'].get('domainId')} on {first['hostname']} but "
+            f"{second['mlag'].get('domainId')} on {second['hostname']}"
+        )
+    # every peer-link member should land, per LLDP, on a member of the
+    # peer's peer-link, and both sides should have the same member count
+    for local, remote in [[first, second], [second, first]]:
+        remote_members = set(remote["peer_link_members"])
+        for port, neighbor in sorted(local["peer_link_neighbors"].items()):
+            if neighbor["neighborPort"] not in remote_members:
+                issues.append(
+                    f"{local['hostname']} {port} goes to {neighbor['neighborPort']}, "
+                    f"not in {remote['hostname']} {remote['mlag'].get('peerLink')}"
+                )
+    if len(first["peer_link_members"]) != len(second["peer_link_members"]):
+        issues.append(
+            f"{len(first['peer_link_members'])} peer-link members on "
+            f"{first['hostname']} but {len(second['peer_link_members'])} on "
+            f"{second['hostname']}"
+        )
+    return issues
+
+
+def check_domain(members):
+    # check_pair for the two switches of a domain, every switch's own issues
+    # and the member count otherwise
+    if len(members) == 1:
+        return check_pair(members[0], None)
+    if len(members) == 2:
+        return check_pair(members[0], members[1])
+    issues = []
+    for member in members:
+        issues += _switch_issues(member)
+    return issues + [
+        f"{len(members)} switches in one MLAG domain, expected two: "
+        + ", ".join(member["hostname"] for member in members)
+    ]
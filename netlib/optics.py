@@ -0,0 +1,238 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+try:
+    # importing libraries
+    import json
+    import os
+
+    import numpy as np
+
+    import netlib.fleet
+except ImportError as error:
+    print(error)
+    quit()
+except Exception as exception:
+    print(exception)
+
+# "show interfaces transceiver" keys, in the column order of the DOM arrays
+OPTIC_FIELDS = ["temperature", "voltage", "txBias", "txPower", "rxPower"]
+
+# low alarm, low warning, high warning, high alarm for each field. These are
+# generic SFP/QSFP values, pass a JSON file of the same shape to override them
+DEFAULT_THRESHOLDS = {
+    "temperature": [-5.0, 0.0, 70.0, 75.0],
+    "voltage": [2.97, 3.13, 3.46, 3.63],
+    "txBias": [1.0, 2.0, 90.0, 100.0],
+    "txPower": [-11.0, -9.0, 3.5, 4.5],
+    "rxPower": [-14.0, -12.0, 3.5, 4.5],
+}
+
+OPTIC_OK = 0
+OPTIC_WARNING = 1
+OPTIC_ALARM = 2
+OPTIC_STATUS_NAMES = {OPTIC_OK: "ok", OPTIC_WARNING: "warning", OPTIC_ALARM: "alarm"}
+
+
+def load_thresholds(thresholds_file=None):
+    thresholds = dict(DEFAULT_THRESHOLDS)
+    if thresholds_file:
+        with open(thresholds_file) as my_file:
+            thresholds.update(json.load(my_file))
+    return np.array([thresholds[field] for field in OPTIC_FIELDS], dtype="f8")
+
+
+def switch_dom_arrays(interfaces):
+    # one switch's "show interfaces transceiver" interfaces as a ports array
+    # and a ports x OPTIC_FIELDS float matrix (NaN where the optic does not
+    # report a value)
+    ports = []
+    rows = []
+    for port, levels in interfaces.items():
+        if not levels:
+            # empty cage or a copper cable, nothing to monitor
+            continue
+        ports.append(port)
+        rows.append([levels.get(field, np.nan) for field in OPTIC_FIELDS])
+    dom_values = np.array(rows, dtype="f8").reshape(len(rows), len(OPTIC_FIELDS))
+    return np.array(ports, dtype=object), dom_values
+
+
+def build_dom_arrays(fleet_transceivers):
+    # fleet_transceivers is {hostname: "show interfaces transceiver" interfaces}
+    # returns parallel arrays: hosts, ports and a ports x OPTIC_FIELDS float
+    # matrix
+    return merge_dom_arrays(
+        [
+            [hostname] + list(switch_dom_arrays(interfaces))
+            for hostname, interfaces in fleet_transceivers.items()
+        ]
+    )
+
+
+def merge_dom_arrays(switch_arrays):
+    # [hostname, ports, dom_values] per switch into the fleet wide arrays of
+    # build_dom_arrays
+    if not switch_arrays:
+        return (
+            np.zeros(0, dtype=object),
+            np.zeros(0, dtype=object),
+            np.zeros((0, len(OPTIC_FIELDS)), dtype="f8"),
+        )
+    hosts = np.concatenate(
+        [
+            np.full(len(ports), hostname, dtype=object)
+            for hostname, ports, dom_values in switch_arrays
+        ]
+    )
+    ports = np.concatenate([ports for hostname, ports, dom_values in switch_arrays])
+    dom_values = np.concatenate(
+        [dom_values for hostname, ports, dom_values in switch_arrays]
+    )
+    return hosts, ports, dom_values
+
+
+def compact_reply(raw_reply):
+    # process pool side of get_optics_scan: the raw reply of "show hostname",
+    # "show interfaces transceiver" and "show lldp neighbors" in, so the JSON
+    # is parsed in the worker too, only the DOM arrays and LLDP pairs back out
+    show_hostname, transceivers, lldp = netlib.fleet.decode_reply(raw_reply)
+    return compact_scan(
+        {
+            "hostname": show_hostname["hostname"],
+            "fqdn": show_hostname["fqdn"],
+            "transceivers": transceivers["interfaces"],
+            "lldp": lldp["lldpNeighbors"],
+        }
+    )
+
+
+def compact_scan(scan_results):
+    # the decoded replies of one switch in, only its DOM arrays and LLDP
+    # pairs back out
+    ports, dom_values = switch_dom_arrays(scan_results["transceivers"])
+    return {
+        "hostname": scan_results["hostname"],
+        "fqdn": scan_results["fqdn"],
+        "ports": ports,
+        "dom_values": dom_values,
+        "lldp_pairs": [
+            (
+                scan_results["hostname"],
+                neighbor["port"],
+                neighbor["neighborDevice"],
+                neighbor["neighborPort"],
+            )
+            for neighbor in scan_results["lldp"]
+        ],
+    }
+
+
+def classify_dom(dom_values, thresholds):
+    # one vectorized pass over every port in the fleet: thresholds is the
+    # fields x 4 array from load_thresholds, result is ports x fields of
+    # OPTIC_OK / OPTIC_WARNING / OPTIC_ALARM (NaN readings are left ok)
+    low_alarm, low_warning, high_warning, high_alarm = thresholds.T
+    status = np.zeros(dom_values.shape, dtype="i1")
+    with np.errstate(invalid="ignore"):
+        warning = (dom_values < low_warning) | (dom_values > high_warning)
+        alarm = (dom_values <= low_alarm) | (dom_values >= high_alarm)
+    status[warning] = OPTIC_WARNING
+    status[alarm] = OPTIC_ALARM
+    return status
+
+
+def link_loss(hosts, ports, dom_values, lldp_pairs, host_aliases=None):
+    # Tx on the local port minus Rx on the far end, for every LLDP pair where
+    # both ends were scanned. lldp_pairs is a list of
+    # (host, port, neighbor_device, neighbor_port); host_aliases maps FQDNs /
+    # short names as LLDP reports them onto the hostnames used in hosts.
+    # Returns (local_index, remote_index, loss_db) arrays.
+    host_aliases = host_aliases or {}
+    row_index = {
+        (host, port): index for index, (host, port) in enumerate(zip(hosts, ports))
+    }
+    local_rows = []
+    remote_rows = []
+    for host, port, neighbor_device, neighbor_port in lldp_pairs:
+        neighbor_host = host_aliases.get(neighbor_device, neighbor_device)
+        local_row = row_index.get((host, port))
+        remote_row = row_index.get((neighbor_host, neighbor_port))
+        if local_row is not None and remote_row is not None:
+            local_rows.append(local_row)
+            remote_rows.append(remote_row)
+    local_rows = np.array(local_rows, dtype="i8")
+    remote_rows = np.array(remote_rows, dtype="i8")
+    tx_column = OPTIC_FIELDS.index("txPower")
+    rx_column = OPTIC_FIELDS.index("rxPower")
+    loss_db = dom_values[local_rows, tx_column] - dom_values[remote_rows, rx_column]
+    return local_rows, remote_rows, loss_db
+
+
+def _load_baseline(baseline_file):
+    if not os.path.exists(baseline_file):
+        return np.zeros(0, dtype=str), np.zeros((0, len(OPTIC_FIELDS)), dtype="f8")
+    baseline = np.load(baseline_file, allow_pickle=False)
+    return baseline["keys"], baseline["dom_values"]
+
+
+def save_baseline(baseline_file, hosts, ports, dom_values, advance=False):
+    # merges the scan into the baseline by host|port: ports seen for the first
+    # time are added, ports that were not scanned (failed switches, other
+    # shards) keep their rows, and ports already in the baseline only move to
+    # the new levels when advance is set
+    baseline_keys, baseline_values = _load_baseline(baseline_file)
+    baseline_keys = list(baseline_keys)
+    baseline_values = baseline_values.copy()
+    baseline_index = {key: index for index, key in enumerate(baseline_keys)}
+    added_rows = []
+    for index, (host, port) in enumerate(zip(hosts, ports)):
+        key = f"{host}|{port}"
+        baseline_row = baseline_index.get(key)
+        if baseline_row is None:
+            baseline_index[key] = len(baseline_keys)
+            baseline_keys.append(key)
+            added_rows.append(index)
+        elif advance:
+            baseline_values[baseline_row] = dom_values[index]
+    baseline_values = np.concatenate(
+        [baseline_values, dom_values[np.array(added_rows, dtype="i8")]]
+    )
+    # written next to the old one and renamed over it, a crash mid-write
+    # leaves the previous baseline in place
+    with open(f"{baseline_file}.tmp", "wb") as my_file:
+        np.savez_compressed(
+            my_file, keys=np.array(baseline_keys, dtype=str), dom_values=baseline_values
+        )
+    os.replace(f"{baseline_file}.tmp", baseline_file)
+
+
+def rx_drop_since_baseline(baseline_file, hosts, ports, dom_values):
+    # dB of Rx power lost since the baseline for each port (NaN for ports
+    # that were not in the baseline), the "slowly degrading" signal
+    drop = np.full(len(hosts), np.nan)
+    baseline_keys, baseline_values = _load_baseline(baseline_file)
+    baseline_index = {key: index for index, key in enumerate(baseline_keys)}
+    current_rows = []
+    baseline_rows = []
+    for index, (host, port) in enumerate(zip(hosts, ports)):
+        baseline_row = baseline_index.get(f"{host}|{port}")
+        if baseline_row is not None:
+            current_rows.append(index)
+            baseline_rows.append(baseline_row)
+    current_rows = np.array(current_rows, dtype="i8")
+    baseline_rows = np.array(baseline_rows, dtype="i8")
+    rx_column = OPTIC_FIELDS.index("rxPower")
+    drop[current_rows] = (
+        baseline_values[baseline_rows, rx_column] - dom_values[current_rows, rx_column]
+    )
+    return drop
@@ -0,0 +1,98 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Fleet-wide ranking of the worst interfaces. Each switch's counter deltas are
+# cut down to its own top N with argpartition, and those candidates go through
+# a min-heap of size N, so memory stays at N entries however many switches and
+# ports are scanned.
+
+try:
+    # importing libraries
+    import heapq
+    import itertools
+
+    import numpy as np
+except ImportError as error:
+    print(error)
+    quit()
+except Exception as exception:
+    print(exception)
+
+# what the ranking can be ordered by: new errors, new discards, or both
+# together per second between the two samples
+RANK_BY = ["errors", "discards", "rate"]
+
+
+def _change_totals(counter_change, interfaces):
+    # summed delta per interface, in the order of interfaces. Counters that
+    # went backwards were cleared and count as no new errors.
+    return np.array(
+        [
+            np.sum(np.maximum(counter_change.get(interface, 0), 0))
+            for interface in interfaces
+        ],
+        dtype="i8",
+    )
+
+
+class WorstInterfaces:
+    # Usage example:
+    # worst = WorstInterfaces(20, rank_by="errors")
+    # worst.add_switch(hostname_short, error_change, discard_change, 12.5)
+    # for switch, interface, errors, discards, rate in worst.ranking(): ...
+    def __init__(self, size=20, rank_by="errors"):
+        self.size = size
+        self.rank_by = rank_by
+        # (score, tie breaker, [switch, interface, errors, discards, rate]),
+        # the smallest score on top so it is the one pushed out
+        self.heap = []
+        self.counter = itertools.count()
+
+    def add_switch(self, switch, error_change, discard_change, elapsed):
+        # error_change and discard_change are {interface: deltas} as returned
+        # by netlib.counters.compare_counters, elapsed the seconds between the
+        # two samples
+        interfaces = sorted(set(error_change) | set(discard_change))
+        if not interfaces or self.size <= 0:
+            return
+        errors = _change_totals(error_change, interfaces)
+        discards = _change_totals(discard_change, interfaces)
+        rates = (errors + discards) / max(elapsed, 1e-3)
+        scores = {"errors": errors, "discards": discards, "rate": rates}[self.rank_by]
+        candidates = np.flatnonzero(scores > 0)
+        if len(candidates) > self.size:
+            candidates = candidates[
+                np.argpartition(-scores[candidates], self.size - 1)[: self.size]
+            ]
+        for index in candidates:
+            entry = (
+                float(scores[index]),
+                next(self.counter),
+                [
+                    switch,
+                    interfaces[index],
+                    int(errors[index]),
+                    int(discards[index]),
+                    float(rates[index]),
+                ],
+            )
+            if len(self.heap) < self.size:
+                heapq.heappush(self.heap, entry)
+            elif entry[0] > self.heap[0][0]:
+                heapq.heapreplace(self.heap, entry)
+
+    def ranking(self):
+        # worst first, ties in the order they were added
+        return [
+            entry[2]
+            for entry in sorted(self.heap, key=lambda entry: (-entry[0], entry[1]))
+        ]
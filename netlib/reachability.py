@@ -0,0 +1,247 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+try:
+    # importing libraries
+    import asyncio
+    import itertools
+    import os
+    import socket
+    import struct
+    import time
+except ImportError as error:
+    print(error)
+    quit()
+except Exception as exception:
+    print(exception)
+
+# eAPI is reached over https, so a completed TCP handshake on 443 is the closest
+# thing to "the script will be able to talk to this switch"
+EAPI_PORT = 443
+ICMP_ECHO_REQUEST = 8
+ICMP_ECHO_REPLY = 0
+
+_icmp_sequence = itertools.count(1)
+
+
+def _icmp_checksum(packet):
+    if len(packet) % 2:
+        packet += b"\x00"
+    total = sum(struct.unpack(f"!{len(packet) // 2}H", packet))
+    total = (total >> 16) + (total & 0xFFFF)
+    total += total >> 16
+    return ~total & 0xFFFF
+
+
+def _icmp_echo_packet(identifier, sequence):
+    payload = struct.pack("!d", time.perf_counter()) + b"nanog-api" * 4
+    header = struct.pack("!BBHHH", ICMP_ECHO_REQUEST, 0, 0, identifier, sequence)
+    checksum = _icmp_checksum(header + payload)
+    header = struct.pack("!BBHHH", ICMP_ECHO_REQUEST, 0, checksum, identifier, sequence)
+    return header + payload
+
+
+def _open_icmp_socket():
+    # unprivileged "ping" sockets first (net.ipv4.ping_group_range), then raw
+    # sockets when running as root, otherwise ICMP is not available
+    for sock_type in (socket.SOCK_DGRAM, socket.SOCK_RAW):
+        try:
+            icmp_socket = socket.socket(socket.AF_INET, sock_type, socket.IPPROTO_ICMP)
+            icmp_socket.setblocking(False)
+            return icmp_socket
+        except (PermissionError, OSError):
+            continue
+    return None
+
+
+def icmp_available():
+    icmp_socket = _open_icmp_socket()
+    if icmp_socket is None:
+        return False
+    icmp_socket.close()
+    return True
+
+
+async def _resolve(host, port):
+    loop = asyncio.get_running_loop()
+    try:
+        address_info = await loop.getaddrinfo(
+            host, port, type=socket.SOCK_STREAM, proto=socket.IPPROTO_TCP
+        )
+    except (socket.gaierror, UnicodeError):
+        return None
+    # prefer IPv4, ICMP probing below only speaks ICMPv4
+    address_info.sort(key=lambda entry: entry[0] != socket.AF_INET)
+    return address_info[0][4][0]
+
+
+async def _tcp_probe(address, port, timeout):
+    start = time.perf_counter()
+    try:
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection(address, port), timeout
+        )
+    except (OSError, asyncio.TimeoutError):
+        return None
+    rtt = (time.perf_counter() - start) * 1000
+    writer.close()
+    try:
+        await writer.wait_closed()
+    except OSError:
+        pass
+    return rtt
+
+
+async def _icmp_probe(address, timeout):
+    loop = asyncio.get_running_loop()
+    icmp_socket = _open_icmp_socket()
+    if icmp_socket is None:
+        return None
+    raw_socket = icmp_socket.type == socket.SOCK_RAW
+    identifier = os.getpid() & 0xFFFF
+    sequence = next(_icmp_sequence) & 0xFFFF
+    try:
+        start = time.perf_counter()
+        icmp_socket.sendto(_icmp_echo_packet(identifier, sequence), (address, 0))
+        deadline = start + timeout
+        while True:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                return None
+            reply = await asyncio.wait_for(loop.sock_recv(icmp_socket, 1024), remaining)
+            if raw_socket:
+                # raw sockets hand back the IPv4 header as well, and see every
+                # echo reply on the box, so the identifier has to match too
+                ip_header_length = (reply[0] & 0x0F) * 4
+                reply = reply[ip_header_length:]
+            if len(reply) < 8:
+                continue
+            reply_type, _, _, reply_id, reply_sequence = struct.unpack(
+                "!BBHHH", reply[:8]
+            )
+            if reply_type != ICMP_ECHO_REPLY or reply_sequence != sequence:
+                continue
+            if raw_socket and reply_id != identifier:
+                continue
+            return (time.perf_counter() - start) * 1000
+    except (OSError, asyncio.TimeoutError):
+        return None
+    finally:
+        icmp_socket.close()
+
+
+def _unreachable_result(host, method, count):
+    return {
+        "host": host,
+        "address": None,
+        "method": method,
+        "sent": count,
+        "received": 0,
+        "loss": 100,
+        "rtt_min": None,
+        "rtt_avg": None,
+        "rtt_max": None,
+    }
+
+
+async def _probe_host(host, method, port, count, timeout, interval, semaphore):
+    result = _unreachable_result(host, method, count)
+    if not host:
+        # blank lines keep their place in the results, as a lost host
+        result["error"] = "No host name"
+        return result
+    async with semaphore:
+        address = await _resolve(host, port)
+        if address is None:
+            result["error"] = "Name or service not known"
+            return result
+        result["address"] = address
+        round_trips = []
+        for attempt in range(count):
+            if method == "icmp":
+                rtt = await _icmp_probe(address, timeout)
+            else:
+                rtt = await _tcp_probe(address, port, timeout)
+            if rtt is not None:
+                round_trips.append(rtt)
+            if attempt < count - 1 and interval:
+                await asyncio.sleep(interval)
+    result["received"] = len(round_trips)
+    result["loss"] = int(round(100 * (count - len(round_trips)) / count))
+    if round_trips:
+        result["rtt_min"] = round(min(round_trips), 3)
+        result["rtt_avg"] = round(sum(round_trips) / len(round_trips), 3)
+        result["rtt_max"] = round(max(round_trips), 3)
+    return result
+
+
+async def probe_hosts_async(
+    hosts,
+    method="tcp",
+    port=EAPI_PORT,
+    count=2,
+    timeout=2.0,
+    interval=0.0,
+    concurrency=512,
+):
+    if method == "icmp" and not icmp_available():
+        # no ping sockets and no root, fall back to probing the eAPI port
+        method = "tcp"
+    semaphore = asyncio.Semaphore(concurrency)
+    probes = [
+        _probe_host(host, method, port, count, timeout, interval, semaphore)
+        for host in hosts
+    ]
+    return await asyncio.gather(*probes)
+
+
+def probe_hosts(hosts, **kwargs):
+    # Usage example:
+    # results = probe_hosts(["switch1.example.com", "switch2.example.com"])
+    # returns one dict per host, in input order, with loss (percent) and rtt (ms)
+    hosts = [host.strip() for host in hosts]
+    if not hosts:
+        return []
+    return asyncio.run(probe_hosts_async(hosts, **kwargs))
+
+
+def reachable_hosts(hosts, max_loss=10, **kwargs):
+    # pre-flight filter for fleet scans: returns the reachable hosts sorted by
+    # average round trip time (closest first) and the unreachable probe results
+    results = probe_hosts(hosts, **kwargs)
+    reachable = [result for result in results if result["loss"] < max_loss]
+    unreachable = [result for result in results if result["loss"] >= max_loss]
+    reachable.sort(key=lambda result: result["rtt_avg"])
+    return [[result["host"] for result in reachable], unreachable]
+
+
+def iter_reachable_hosts(hosts, on_unreachable=None, chunk_size=256, **kwargs):
+    # reachable_hosts for inventories of any size: hosts (any iterable, e.g.
+    # netlib.inventory.read_inventory()) is probed chunk_size hosts at a time,
+    # only when the consumer wants more, so neither the inventory nor the
+    # probe results are ever held in full. Yields the reachable hosts, closest
+    # first within each chunk, and hands every unreachable probe result to
+    # on_unreachable.
+    # Usage example:
+    # for host, result in run_on_fleet(
+    #     iter_reachable_hosts(read_inventory("fleet.csv"), skip_switch), scan
+    # ):
+    host_iterator = iter(hosts)
+    while True:
+        chunk = list(itertools.islice(host_iterator, chunk_size))
+        if not chunk:
+            return
+        reachable, unreachable = reachable_hosts(chunk, **kwargs)
+        if on_unreachable is not None:
+            for result in unreachable:
+                on_unreachable(result)
+        yield from reachable
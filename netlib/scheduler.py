@@ -0,0 +1,127 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Adaptive polling: every key (usually a switch) has its own interval that
+# drops to min_interval while its counters move and doubles back towards
+# max_interval while they do not. A token bucket caps the requests per second
+# across all keys, so noisy switches are polled faster without the fleet as a
+# whole being asked more often than the budget allows.
+
+try:
+    # importing libraries
+    import heapq
+    import itertools
+    import time
+except ImportError as error:
+    print(error)
+    quit()
+except Exception as exception:
+    print(exception)
+
+
+class TokenBucket:
+    def __init__(self, rate, burst=None, clock=time.monotonic):
+        # rate tokens per second, at most burst of them saved up
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1.0, rate)
+        self.clock = clock
+        self.tokens = self.burst
+        self.last = clock()
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.burst, self.tokens + (now - self.last) * self.rate)
+        self.last = now
+
+    def take(self, wanted):
+        # takes up to wanted whole tokens, returns how many it got
+        self._refill()
+        granted = min(int(self.tokens), wanted)
+        self.tokens -= granted
+        return granted
+
+    def charge(self, count):
+        # takes count tokens even if that leaves the bucket in debt, for
+        # requests that are already committed to
+        self._refill()
+        self.tokens -= count
+
+    def wait_time(self):
+        # seconds until the next whole token
+        self._refill()
+        return max(0.0, (1 - self.tokens) / self.rate)
+
+
+class AdaptiveScheduler:
+    def __init__(
+        self,
+        min_interval=10,
+        max_interval=300,
+        requests_per_second=1.0,
+        backoff=2.0,
+        clock=time.monotonic,
+    ):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.clock = clock
+        self.bucket = TokenBucket(requests_per_second, clock=clock)
+        self.intervals = {}
+        # (due time, tie breaker, key), the tie breaker keeps keys that are
+        # due at the same time in the order they were scheduled
+        self.heap = []
+        self.counter = itertools.count()
+
+    def add(self, key, delay=0.0):
+        self.intervals[key] = self.min_interval
+        heapq.heappush(self.heap, (self.clock() + delay, next(self.counter), key))
+
+    def pending(self):
+        # keys waiting for their turn, the ones handed out by ready() and not
+        # yet done() are not counted
+        return len(self.heap)
+
+    def ready(self, max_keys, cost=None):
+        # never blocks: returns up to max_keys due keys, one token each, in
+        # due order. cost(key) is the number of requests polling the key
+        # takes, anything over one is charged to the bucket as debt so the
+        # keys after it wait longer. Keys left over stay at the top of the
+        # heap.
+        keys = []
+        now = self.clock()
+        while self.heap and len(keys) < max_keys and self.heap[0][0] <= now:
+            if self.bucket.take(1) == 0:
+                break
+            key = heapq.heappop(self.heap)[2]
+            if cost is not None and cost(key) > 1:
+                self.bucket.charge(cost(key) - 1)
+            keys.append(key)
+        return keys
+
+    def wait_time(self):
+        # seconds until ready() may hand out a key, None when there are none
+        if not self.heap:
+            return None
+        due_in = self.heap[0][0] - self.clock()
+        if due_in > 0:
+            return due_in
+        return self.bucket.wait_time()
+
+    def done(self, key, active):
+        # active keys come back after min_interval, quiet ones back off
+        if active:
+            interval = self.min_interval
+        else:
+            interval = min(self.max_interval, self.intervals[key] * self.backoff)
+        self.intervals[key] = interval
+        heapq.heappush(self.heap, (self.clock() + interval, next(self.counter), key))
+        return interval
@@ -0,0 +1,216 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+try:
+    # importing libraries
+    import csv
+    import datetime
+    import json
+    import os
+    import sqlite3
+    import threading
+except ImportError as error:
+    print(error)
+    quit()
+except Exception as exception:
+    print(exception)
+
+OUTPUT_FORMATS = ["table", "jsonl", "csv", "sqlite"]
+
+
+class BatchedSink:
+    # Records are buffered per sink and written out in batches, so fleet
+    # workers only pay for a list append and the disk sees few large writes.
+    # Usage example:
+    # with netlib.open_sink("jsonl", output_dir, "get_power_status") as sink:
+    #     sink.write("psu", hostname, {"psu": "1", "state": "ok"})
+    def __init__(self, filename, batch_size=500):
+        self.filename = filename
+        self.batch_size = batch_size
+        self.records = []
+        self.lock = threading.Lock()
+
+    def write(self, record_type, host, record):
+        row = {"type": record_type, "host": host}
+        row.update(record)
+        with self.lock:
+            self.records.append(row)
+            if len(self.records) >= self.batch_size:
+                self._flush_locked()
+
+    def write_many(self, record_type, host, records):
+        for record in records:
+            self.write(record_type, host, record)
+
+    def flush(self):
+        with self.lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        if self.records:
+            self._write_batch(self.records)
+            self.records = []
+
+    def _write_batch(self, records):
+        raise NotImplementedError
+
+    def close(self):
+        self.flush()
+        print(f"Outputs written to {self.filename}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class JsonLinesSink(BatchedSink):
+    def _write_batch(self, records):
+        with open(self.filename, "a") as my_file:
+            my_file.writelines(
+                json.dumps(record, default=str) + "\n" for record in records
+            )
+
+
+def _columns(records):
+    # every key of records in the order first seen
+    columns = []
+    for record in records:
+        for column in record:
+            if column != "type" and column not in columns:
+                columns.append(column)
+    return columns
+
+
+class CsvSink(BatchedSink):
+    # one csv per record type, the header comes from the first batch of
+    # records of that type. A csv header can not grow once written, keys only
+    # seen in later batches are dropped with a warning, once per key
+    def __init__(self, filename, batch_size=500):
+        super().__init__(filename, batch_size)
+        self.fieldnames = {}
+        self.dropped = {}
+
+    def _csv_filename(self, record_type):
+        return f"{os.path.splitext(self.filename)[0]}_{record_type}.csv"
+
+    def _write_batch(self, records):
+        records_by_type = {}
+        for record in records:
+            records_by_type.setdefault(record["type"], []).append(record)
+        for record_type, typed_records in records_by_type.items():
+            csv_filename = self._csv_filename(record_type)
+            new_file = record_type not in self.fieldnames
+            if new_file:
+                self.fieldnames[record_type] = _columns(typed_records)
+            dropped = self.dropped.setdefault(record_type, set())
+            for column in _columns(typed_records):
+                if column not in self.fieldnames[record_type] and column not in dropped:
+                    dropped.add(column)
+                    print(
+                        f"Warning: {column} is not a column of {csv_filename}, "
+                        "it is left out of the csv"
+                    )
+            with open(csv_filename, "a", newline="") as my_file:
+                writer = csv.DictWriter(
+                    my_file,
+                    fieldnames=self.fieldnames[record_type],
+                    extrasaction="ignore",
+                )
+                if new_file:
+                    writer.writeheader()
+                writer.writerows(typed_records)
+
+    def close(self):
+        self.flush()
+        for record_type in self.fieldnames:
+            print(f"Outputs written to {self._csv_filename(record_type)}")
+
+
+class SqliteSink(BatchedSink):
+    # one table per record type, columns are added as new keys show up
+    def __init__(self, filename, batch_size=500):
+        super().__init__(filename, batch_size)
+        self.columns = {}
+        # workers never touch the connection directly, writes happen under the
+        # sink lock, so sharing it between threads is safe
+        self.connection = sqlite3.connect(filename, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+
+    def _create_table(self, record_type, records):
+        columns = _columns(records)
+        column_sql = ", ".join(f'"{column}"' for column in columns)
+        self.connection.execute(
+            f'CREATE TABLE IF NOT EXISTS "{record_type}" ({column_sql})'
+        )
+        self.columns[record_type] = columns
+
+    def _add_columns(self, record_type, records):
+        # keys the table has not seen yet, earlier rows read NULL for them
+        columns = self.columns[record_type]
+        for column in _columns(records):
+            if column in columns:
+                continue
+            self.connection.execute(
+                f'ALTER TABLE "{record_type}" ADD COLUMN "{column}"'
+            )
+            columns.append(column)
+
+    def _write_batch(self, records):
+        records_by_type = {}
+        for record in records:
+            records_by_type.setdefault(record["type"], []).append(record)
+        with self.connection:
+            for record_type, typed_records in records_by_type.items():
+                if record_type not in self.columns:
+                    self._create_table(record_type, typed_records)
+                else:
+                    self._add_columns(record_type, typed_records)
+                columns = self.columns[record_type]
+                placeholders = ", ".join("?" for column in columns)
+                column_sql = ", ".join(f'"{column}"' for column in columns)
+                self.connection.executemany(
+                    f'INSERT INTO "{record_type}" ({column_sql}) '
+                    f"VALUES ({placeholders})",
+                    [
+                        [_sqlite_value(record.get(column)) for column in columns]
+                        for record in typed_records
+                    ],
+                )
+
+    def close(self):
+        super().close()
+        self.connection.close()
+
+
+def _sqlite_value(value):
+    if isinstance(value, (dict, list, tuple)):
+        return json.dumps(value, default=str)
+    return value
+
+
+def open_sink(output_format, output_dir, script_function, batch_size=500):
+    # returns None for "table", meaning the script should render rich tables
+    if output_format == "table":
+        return None
+    if not os.path.exists(output_dir):
+        os.mkdir(output_dir)
+    time_stamp = datetime.datetime.now().strftime("%Y_%m_%d_%H_%M_%S")
+    base_filename = f"{output_dir}/{script_function}_{time_stamp}"
+    if output_format == "jsonl":
+        return JsonLinesSink(f"{base_filename}.jsonl", batch_size)
+    elif output_format == "csv":
+        return CsvSink(f"{base_filename}.csv", batch_size)
+    elif output_format == "sqlite":
+        return SqliteSink(f"{base_filename}.db", batch_size)
+    raise ValueError(f"Unknown output format: {output_format}")
@@ -0,0 +1,80 @@
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+try:
+    # importing libraries
+    import numpy as np
+except ImportError as error:
+    print(error)
+    quit()
+except Exception as exception:
+    print(exception)
+
+
+def cluster_timestamps(timestamps, gap_seconds=300):
+    # Groups event timestamps into clusters: after sorting, a new cluster
+    # starts wherever two consecutive events are more than gap_seconds apart.
+    # Returns (cluster_ids in the input order, cluster_starts, cluster_ends).
+    timestamps = np.asarray(timestamps, dtype="f8")
+    if len(timestamps) == 0:
+        return np.zeros(0, dtype="i8"), np.zeros(0), np.zeros(0)
+    order = np.argsort(timestamps, kind="stable")
+    sorted_timestamps = timestamps[order]
+    new_cluster = np.concatenate(([0], np.diff(sorted_timestamps) > gap_seconds))
+    sorted_ids = np.cumsum(new_cluster)
+    cluster_ids = np.empty_like(sorted_ids)
+    cluster_ids[order] = sorted_ids
+    cluster_count = sorted_ids[-1] + 1
+    cluster_starts = np.full(cluster_count, np.inf)
+    cluster_ends = np.full(cluster_count, -np.inf)
+    np.minimum.at(cluster_starts, sorted_ids, sorted_timestamps)
+    np.maximum.at(cluster_ends, sorted_ids, sorted_timestamps)
+    return cluster_ids, cluster_starts, cluster_ends
+
+
+def summarize_clusters(timestamps, labels, gap_seconds=300):
+    # one entry per (cluster, label), largest events first, e.g.
+    # {"count": 312, "label": "power loss", "start": ..., "end": ...}
+    timestamps = np.asarray(timestamps, dtype="f8")
+    cluster_ids, cluster_starts, cluster_ends = cluster_timestamps(
+        timestamps, gap_seconds
+    )
+    if len(timestamps) == 0:
+        return []
+    label_names, label_codes = np.unique(
+        np.asarray(labels, dtype=str), return_inverse=True
+    )
+    # a single key per (cluster, label) pair, then group-by on the keys
+    event_keys = cluster_ids * len(label_names) + label_codes
+    unique_keys, event_index, event_counts = np.unique(
+        event_keys, return_inverse=True, return_counts=True
+    )
+    event_starts = np.full(len(unique_keys), np.inf)
+    event_ends = np.full(len(unique_keys), -np.inf)
+    np.minimum.at(event_starts, event_index, timestamps)
+    np.maximum.at(event_ends, event_index, timestamps)
+    events = []
+    for event, event_key in enumerate(unique_keys):
+        cluster_id = event_key // len(label_names)
+        events.append(
+            {
+                "cluster": int(cluster_id),
+                "label": str(label_names[event_key % len(label_names)]),
+                "count": int(event_counts[event]),
+                "start": float(event_starts[event]),
+                "end": float(event_ends[event]),
+                "cluster_start": float(cluster_starts[cluster_id]),
+                "cluster_end": float(cluster_ends[cluster_id]),
+            }
+        )
+    events.sort(key=lambda event: (-event["count"], event["start"]))
+    return events
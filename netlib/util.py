@@ -14,11 +14,16 @@ try:
     # importing libraries
     import datetime
     import getpass
-    import subprocess
+    import json
     import logging
+    import logging.handlers
     import os
-    from subprocess import check_output
+    import queue
+    import subprocess
     import sys
+    from subprocess import check_output
+
+    import netlib.reachability
 except ImportError as error:
     print(error)
     quit()
@@ -26,25 +31,88 @@ except Exception as exception:
     print(exception)
 
 
-def setup_logging(script_function, output_dir=os.environ.get("HOME", "/tmp")):
+# background writers for each log file, stopped (and drained) by
+# cleanup_log_if_empty so nothing is lost when the script exits
+_log_listeners = {}
+
+
+class HostFieldsFilter(logging.Filter):
+    # makes sure every record carries the structured host/command fields, set
+    # them with logger.warning(..., extra={"host": host, "command": command})
+    def filter(self, record):
+        if not hasattr(record, "host"):
+            record.host = None
+        if not hasattr(record, "command"):
+            record.command = None
+        return True
+
+
+class HostFieldsFormatter(logging.Formatter):
+    def format(self, record):
+        formatted = super().format(record)
+        if record.host:
+            formatted = f"{formatted} [host={record.host}"
+            if record.command:
+                formatted = f"{formatted} command={record.command}"
+            formatted = f"{formatted}]"
+        return formatted
+
+
+class JsonLinesFormatter(logging.Formatter):
+    def format(self, record):
+        log_entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "host": record.host,
+            "command": record.command,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            log_entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(log_entry)
+
+
+def setup_logging(
+    script_function,
+    output_dir=os.environ.get("HOME", "/tmp"),
+    json_lines=False,
+):
     if not os.path.exists(output_dir):
         os.mkdir(output_dir)
     print(f"\nIf log entries are present, the file will be saved under: {output_dir}\n")
     script_time_stamp = datetime.datetime.now().strftime("%Y_%m_%d_%H_%M_%S")
-    log_filename = f"{output_dir}/{script_function}_log_{script_time_stamp}.log"
+    log_extension = "jsonl" if json_lines else "log"
+    log_filename = (
+        f"{output_dir}/{script_function}_log_{script_time_stamp}.{log_extension}"
+    )
     logger = logging.getLogger(script_function)
     # create file handler which logs even debug messages
     fh = logging.FileHandler(log_filename)
     fh.setLevel(logging.WARNING)
     # create formatter and add it to the handlers
-    formatter = logging.Formatter("%(asctime)-15s %(levelname)-8s %(message)s")
+    if json_lines:
+        formatter = JsonLinesFormatter()
+    else:
+        formatter = HostFieldsFormatter("%(asctime)-15s %(levelname)-8s %(message)s")
     fh.setFormatter(formatter)
+    # workers only put records on the queue, a single listener thread does the
+    # file writes so concurrent fleet runs never block on log I/O
+    log_queue = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.addFilter(HostFieldsFilter())
+    listener = logging.handlers.QueueListener(log_queue, fh, respect_handler_level=True)
+    listener.start()
+    _log_listeners[log_filename] = listener
     # add the handlers to the logger
-    logger.addHandler(fh)
+    logger.addHandler(queue_handler)
     return [logger, log_filename]
 
 
 def cleanup_log_if_empty(logger_full_path):
+    listener = _log_listeners.pop(logger_full_path, None)
+    if listener is not None:
+        listener.stop()
     logging.shutdown()
     if os.stat(logger_full_path).st_size == 0:
         print(f"\nLog file was empty, removing file: {logger_full_path}")
@@ -71,19 +139,31 @@ def get_credentials(prefix="TACACS"):
         sys.exit()
 
 
-def check_ping(device_hostname):
+def _system_ping(device_hostname):
     try:
-        check_ping = check_output(f"ping -c 2 {device_hostname}", shell=True).decode(
-            "utf-8"
-        )
-        # search for percentage packet loss
-        for ping_stat in check_ping.split("\n"):
-            if "% packet loss" in ping_stat:
-                ping_ret = int(
-                    ping_stat.split(",")[-2].strip().split(" ")[0].rstrip("%")
-                )
-        return ping_ret
+        check_ping = check_output(
+            ["ping", "-c", "2", device_hostname], stderr=subprocess.DEVNULL
+        ).decode("utf-8")
     except subprocess.CalledProcessError:
-        ping_ret = int(100)
-        return ping_ret
-        print(f"{device_hostname} is not pinging, ping returned error code.")
+        return 100
+    # search for percentage packet loss
+    for ping_stat in check_ping.split("\n"):
+        if "% packet loss" in ping_stat:
+            return int(ping_stat.split(",")[-2].strip().split(" ")[0].rstrip("%"))
+    return 100
+
+
+def check_ping(device_hostname, method="icmp"):
+    # kept for older scripts, returns the percentage of probes lost like the
+    # old "ping -c 2" parsing did; use netlib.probe_hosts for many hosts at once.
+    # ICMP by default like before, method="tcp" probes the eAPI port instead
+    if method == "icmp" and not netlib.reachability.icmp_available():
+        # no ping sockets for this user, the system ping binary still has them
+        ping_loss = _system_ping(device_hostname.strip())
+        if ping_loss == 100:
+            print(f"{device_hostname} is not pinging, ping returned no replies.")
+        return ping_loss
+    ping_ret = netlib.reachability.probe_hosts([device_hostname], method=method)[0]
+    if ping_ret["loss"] == 100:
+        print(f"{device_hostname} is not reachable, probes returned no replies.")
+    return ping_ret["loss"]